@@ -55,6 +55,12 @@ class PlayingApp(tkinter.Frame):
             self._run_controls, text="Go", command=self._run_strategy
         )
         self._go.pack(side=tkinter.RIGHT)
+        self._abort_button = tkinter.Button(
+            self._run_controls, text="Abort search", command=self._backend.abort_search
+        )
+        self._abort_button.pack(side=tkinter.RIGHT)
+        self._progress_label = tkinter.Label(self._control_panel, text="")
+        self._progress_label.pack(side=tkinter.TOP)
         self._state_controls = tkinter.Frame(self._control_panel)
         self._state_controls.pack(side=tkinter.TOP)
         self._save_state_button = tkinter.Button(
@@ -87,6 +93,19 @@ class PlayingApp(tkinter.Frame):
             self.set_data(data)
         except Empty:
             pass
+        # Only the latest progress is interesting
+        progress = None
+        try:
+            while True:
+                progress = self._backend.get_progress_queue().get(block=False)
+        except Empty:
+            pass
+        if progress is not None:
+            self._progress_label.config(
+                text=f"Expansions: {progress.expansions}, "
+                f"frontier: {progress.frontier_size}, "
+                f"best heuristic: {progress.best_heuristic}"
+            )
         self._main_window.after(QUEUE_POLL_INTERVAL, self._check_queue)
 
     def set_data(self, data: DrodBotState):
@@ -5,7 +5,7 @@ import queue
 from apps.util import run_coroutine
 from drod_bot.drod_bot import DrodBot, SaveTestRoomBehavior
 from drod_bot.state.drod_bot_state import DrodBotState
-from room_simulator import ElementType, Direction
+from room_simulator import ElementType, Direction, SearchProgress
 
 
 # The values are also what will be displayed in the GUI
@@ -40,6 +40,8 @@ class PlayingAppBackend:
         self._bot.subscribe_to_state_update(self._push_state_update)
         self._queue: queue.Queue[DrodBotState] = queue.Queue()
         self._queue.put(self._bot.state)
+        self._bot.subscribe_to_search_progress(self._push_search_progress)
+        self._progress_queue: queue.Queue[SearchProgress] = queue.Queue()
         self._event_loop = event_loop
 
     def get_queue(self):
@@ -51,6 +53,15 @@ class PlayingAppBackend:
         """
         return self._queue
 
+    def get_progress_queue(self):
+        """Get a queue with the progress of solving rooms.
+
+        Returns
+        -------
+        The queue
+        """
+        return self._progress_queue
+
     def run_strategy(
         self,
         strategy: Strategy,
@@ -127,5 +138,14 @@ class PlayingAppBackend:
         """Interpret the current room again and replace the state."""
         run_coroutine(self._bot.reinterpret_room(), self._event_loop)
 
+    def abort_search(self):
+        """Stop solving the current room, if DRODbot is solving one."""
+        # This is safe to call from the GUI thread, and must not wait for
+        # the event loop, which may be waiting for the search
+        self._bot.cancel_search()
+
     def _push_state_update(self, state: DrodBotState):
         self._queue.put(state)
+
+    def _push_search_progress(self, progress: SearchProgress):
+        self._progress_queue.put(progress)
@@ -24,6 +24,7 @@ from room_simulator import (
     get_full_room,
 )
 from room_tester import RoomTester
+from simulator_thread import run_in_simulator_thread
 from util import expand_planning_solution
 
 
@@ -101,18 +102,18 @@ class RoomSolverAppBackend:
         await self._interface.initialize()
         self._room, _ = await self._interpreter.get_initial_room()
         print(f"Interpreted room in {time.time()-t:.2f}s")
-        self._show_data()
+        await self._show_data()
 
     async def get_room_from_bot(self):
         """Set the current room to the current room from the bot."""
         self._room = self._bot.get_current_room()
-        self._show_data()
+        await self._show_data()
 
     async def get_room_from_tester(self):
         """Set the current room to the current room from the tester."""
         test = self._room_tester.get_marked_test()
         self._room = test.room
-        self._show_data()
+        await self._show_data()
 
     async def init_search(
         self,
@@ -139,6 +140,25 @@ class RoomSolverAppBackend:
         """
         if self._room is None:
             raise UserError("Must get a room before searching")
+        await run_in_simulator_thread(
+            self._create_searcher,
+            goal,
+            heuristic_in_priority,
+            path_cost_in_priority,
+            avoid_duplicates,
+            target,
+        )
+        await self._show_data()
+
+    def _create_searcher(
+        self,
+        goal,
+        heuristic_in_priority,
+        path_cost_in_priority,
+        avoid_duplicates,
+        target,
+    ):
+        # This sets up DRODLib, so it runs in the simulator thread
         if goal == RoomSolverGoal.MOVE_TO_CONQUER_TOKEN_PATHFINDING:
             conquer_tokens = self._room.find_coordinates(ElementType.CONQUER_TOKEN)
             start, _ = self._room.find_player()
@@ -226,8 +246,6 @@ class RoomSolverAppBackend:
                 self._searcher.get_room_player().get_derived_room(), objective
             )
 
-        self._show_data()
-
     async def expand_next_node(self):
         """Expand the next node in the searcher.
 
@@ -237,9 +255,12 @@ class RoomSolverAppBackend:
         if self._inspect_solution_mode:
             self._inspected_actions_index += 1
         else:
-            searcher = self._get_current_searcher()
-            searcher.expand_next_node()
-        self._show_data()
+
+            def expand():
+                self._get_current_searcher().expand_next_node()
+
+            await run_in_simulator_thread(expand)
+        await self._show_data()
 
     async def rewind_expansion(self):
         """Go back to the previous node in the searcher.
@@ -250,12 +271,16 @@ class RoomSolverAppBackend:
         if self._inspect_solution_mode:
             self._inspected_actions_index -= 1
         else:
-            searcher = self._get_current_searcher()
-            iterations = searcher.get_iterations()
-            searcher.reset()
-            for _ in range(iterations - 1):
-                searcher.expand_next_node()
-        self._show_data()
+
+            def replay():
+                searcher = self._get_current_searcher()
+                iterations = searcher.get_iterations()
+                searcher.reset()
+                for _ in range(iterations - 1):
+                    searcher.expand_next_node()
+
+            await run_in_simulator_thread(replay)
+        await self._show_data()
 
     async def find_solution(self):
         """Search until we find a solution.
@@ -266,12 +291,15 @@ class RoomSolverAppBackend:
         if self._inspect_solution_mode:
             self._inspected_actions_index = -1
         else:
-            searcher = self._get_current_searcher()
+
+            def search():
+                self._get_current_searcher().find_solution()
+
             print("Thinking...")
             t = time.time()
-            searcher.find_solution()
+            await run_in_simulator_thread(search)
             print(f"Thought in {time.time()-t:.2f}s")
-        self._show_data()
+        await self._show_data()
 
     async def next_objective_reacher_phase(self):
         """Go to the next phase in the objective reacher."""
@@ -279,8 +307,8 @@ class RoomSolverAppBackend:
             raise UserError("No phases in inspect solution mode")
         if not isinstance(self._searcher, ObjectiveReacher):
             raise UserError("Searcher is not an objective reacher")
-        self._searcher.next_phase()
-        self._show_data()
+        await run_in_simulator_thread(self._searcher.next_phase)
+        await self._show_data()
 
     async def set_inspect_solution_mode(self, mode):
         """Turn on or off inspect solution mode.
@@ -292,9 +320,26 @@ class RoomSolverAppBackend:
         """
         self._inspect_solution_mode = mode
         self._inspected_actions_index = 0
-        self._show_data()
+        await self._show_data()
+
+    async def _show_data(self):
+        room, searcher_data, objective_reacher_data = await run_in_simulator_thread(
+            self._get_data
+        )
+        reconstructed_image = self._interpreter.reconstruct_room_image(room)
+        start_position, _ = self._room.find_player()
+        self._queue.put(
+            (
+                reconstructed_image,
+                room,
+                start_position,
+                searcher_data,
+                objective_reacher_data,
+            )
+        )
 
-    def _show_data(self):
+    def _get_data(self):
+        # This queries the searchers, so it runs in the simulator thread
         try:
             searcher = self._get_current_searcher()
             if self._inspect_solution_mode:
@@ -327,18 +372,7 @@ class RoomSolverAppBackend:
                     room = get_full_room(self._room, solution.final_state)
         else:
             objective_reacher_data = None
-
-        reconstructed_image = self._interpreter.reconstruct_room_image(room)
-        start_position, _ = self._room.find_player()
-        self._queue.put(
-            (
-                reconstructed_image,
-                room,
-                start_position,
-                searcher_data,
-                objective_reacher_data,
-            )
-        )
+        return room, searcher_data, objective_reacher_data
 
     def _get_current_searcher(self):
         if self._searcher is None:
@@ -9,6 +9,7 @@ from room_interpreter import RoomInterpreter
 
 from room_simulator import Room
 from room_tester import RoomTester, Test
+from simulator_thread import run_in_simulator_thread
 
 
 @dataclass
@@ -70,7 +71,7 @@ class RoomTesterAppBackend:
         run_coroutine(self._run_tests(), self._event_loop)
 
     async def _run_tests(self):
-        self._room_tester.run_tests()
+        await run_in_simulator_thread(self._room_tester.run_tests)
         self._push_state_update()
 
     def _push_state_update(self):
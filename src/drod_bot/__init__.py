@@ -1,4 +1,22 @@
 from .drod_bot import DrodBot
-from .solve_room import SaveTestRoomBehavior, solve_room
+from .solution_cache import SolutionCache, SolutionCacheStats
+from .solve_room import (
+    SaveTestRoomBehavior,
+    SolveSettings,
+    solve_room,
+    solve_room_from_starts,
+)
+from .solver_pool import SolverPool
+from .speculative_planner import SpeculativePlanner
 
-__all__ = ("DrodBot", "SaveTestRoomBehavior", "solve_room")
+__all__ = (
+    "DrodBot",
+    "SaveTestRoomBehavior",
+    "SolutionCache",
+    "SolutionCacheStats",
+    "SolveSettings",
+    "SolverPool",
+    "SpeculativePlanner",
+    "solve_room",
+    "solve_room_from_starts",
+)
@@ -1,13 +1,15 @@
 import asyncio
 from pathlib import Path
 import time
-from typing import Callable, List
+from typing import Callable, List, Optional, Tuple
 
 from common import ROOM_HEIGHT_IN_TILES, ROOM_WIDTH_IN_TILES
 from drod_interface.play_interface import PlayInterface
 from room_interpreter.room_interpreter import RoomInterpreter
-from util import position_in_direction
-from .solve_room import solve_room, SaveTestRoomBehavior
+from util import inside_room, position_in_direction
+from .solve_room import solve_room, solve_room_from_starts, SaveTestRoomBehavior
+from .solution_cache import SolutionCache
+from .speculative_planner import SpeculativePlanner
 from .level_walker import find_path_in_level
 from room_interpreter import RoomText, get_room_text
 from room_simulator import (
@@ -15,13 +17,17 @@ from room_simulator import (
     Direction,
     Element,
     Action,
+    Room,
     simulate_actions,
     ReachObjective,
     StabObjective,
     MonsterCountObjective,
+    SearchBudget,
+    SearchProgress,
 )
 from .state import DrodBotState
 from search import NoSolutionError
+from simulator_thread import run_in_simulator_thread
 
 _ACTION_DELAY = 0.1
 
@@ -38,6 +44,17 @@ class DrodBot:
         Where to save test rooms.
     drod_interface
         The interface for playing rooms.
+    room_interpreter
+        The interpreter for getting the room content from the screen.
+    solution_cache
+        If set, reuse room solutions from here, and store new ones.
+    speculative_planner
+        If set, use this to solve the rooms we will probably need solutions
+        for next while executing a plan. It should store its solutions in
+        the same place as solution_cache.
+    search_stats_log
+        If set, append the stats of each room solved to this file, as
+        lines of JSON.
 
     Attributes
     ----------
@@ -51,12 +68,21 @@ class DrodBot:
         test_room_location: str | Path,
         drod_interface: PlayInterface,
         room_interpreter: RoomInterpreter,
+        solution_cache: Optional[SolutionCache] = None,
+        speculative_planner: Optional[SpeculativePlanner] = None,
+        search_stats_log: Optional[str | Path] = None,
     ):
         self._state_file = state_file
         self._test_room_location = test_room_location
         self._interface = drod_interface
         self._interpreter = room_interpreter
+        self._solution_cache = solution_cache
+        self._speculative_planner = speculative_planner
+        self._search_stats_log = search_stats_log
         self._state_subscribers: List[Callable[[DrodBotState], None]] = []
+        self._search_progress_subscribers: List[Callable[[SearchProgress], None]] = []
+        # The budget of the room being solved, so it can be cancelled
+        self._search_budget: Optional[SearchBudget] = None
         try:
             self.state = DrodBotState.parse_file(self._state_file)
             print(f"Loaded state from {self._state_file}")
@@ -74,6 +100,28 @@ class DrodBot:
         """
         self._state_subscribers.append(callback)
 
+    def subscribe_to_search_progress(self, callback: Callable[[SearchProgress], None]):
+        """Subscribe to the progress of solving rooms.
+
+        Parameters
+        ----------
+        callback
+            A function that will be called regularly while solving a room,
+            with a SearchProgress instance. It's called from the thread
+            doing the solving, so it should return quickly.
+        """
+        self._search_progress_subscribers.append(callback)
+
+    def cancel_search(self):
+        """Stop the current search, if we are searching.
+
+        This can be called from any thread. The search fails with a
+        NoSolutionError that has cancelled set, which also stops exploring.
+        """
+        budget = self._search_budget
+        if budget is not None:
+            budget.cancel()
+
     def get_current_room(self):
         """Get the current room.
 
@@ -87,6 +135,15 @@ class DrodBot:
         for callback in self._state_subscribers:
             callback(self.state)
 
+    def _notify_search_progress(self, progress: SearchProgress):
+        for callback in self._search_progress_subscribers:
+            callback(progress)
+
+    def _new_search_budget(self) -> SearchBudget:
+        self._search_budget = SearchBudget()
+        self._search_budget.set_progress_callback(self._notify_search_progress)
+        return self._search_budget
+
     async def initialize(self):
         """Focus the window and get the room content."""
         await self._interface.initialize()
@@ -127,11 +184,15 @@ class DrodBot:
         t = time.time()
         room = self.state.current_room
         goal_tiles = room.find_coordinates(element)
-        actions = solve_room(
+        actions = await run_in_simulator_thread(
+            solve_room,
             room,
             ReachObjective(tiles=set(goal_tiles)),
             save_test_rooms=save_test_rooms,
             test_room_location=self._test_room_location,
+            solution_cache=self._solution_cache,
+            budget=self._new_search_budget(),
+            stats_log_file=self._search_stats_log,
         )
         print(f"Thought in {time.time()-t:.2f}s")
         self.state.plan = actions
@@ -159,13 +220,15 @@ class DrodBot:
         goal_tiles = self.state.level.find_element(element)
         print("Thinking...")
         t = time.time()
-        actions = find_path_in_level(
+        actions = await run_in_simulator_thread(
+            find_path_in_level,
             goal_tiles,
             self.state.current_room,
             self.state.current_room_position,
             self.state.level,
             save_test_rooms=save_test_rooms,
             test_room_location=self._test_room_location,
+            budget=self._new_search_budget(),
         )
         print(f"Thought in {time.time()-t:.2f}s")
         self.state.plan = actions
@@ -187,13 +250,15 @@ class DrodBot:
         print("Trying to go to an unvisited room...")
         t = time.time()
         try:
-            actions = find_path_in_level(
+            actions = await run_in_simulator_thread(
+                find_path_in_level,
                 goal_tiles,
                 self.state.current_room,
                 self.state.current_room_position,
                 self.state.level,
                 save_test_rooms=save_test_rooms,
                 test_room_location=self._test_room_location,
+                budget=self._new_search_budget(),
             )
             print(f"Thought in {time.time()-t:.2f}s, found a solution")
             self.state.plan = actions
@@ -236,23 +301,17 @@ class DrodBot:
         exits = self.state.level.get_room_exits(
             self.state.current_room_position, allow_unexplored_target=True
         )
-        if direction == Direction.N:
-            goal_tiles = [e[0] for e in exits if e[0][1] == 0]
-            last_action = Action.N
-        elif direction == Direction.E:
-            goal_tiles = [e[0] for e in exits if e[0][0] == ROOM_WIDTH_IN_TILES - 1]
-            last_action = Action.E
-        elif direction == Direction.S:
-            goal_tiles = [e[0] for e in exits if e[0][1] == ROOM_HEIGHT_IN_TILES - 1]
-            last_action = Action.S
-        elif direction == Direction.W:
-            goal_tiles = [e[0] for e in exits if e[0][0] == 0]
-            last_action = Action.W
-        actions = solve_room(
+        goal_tiles = _exit_tiles(exits, direction)
+        last_action = getattr(Action, direction.name)
+        actions = await run_in_simulator_thread(
+            solve_room,
             self.state.current_room,
             ReachObjective(tiles=set(goal_tiles)),
             save_test_rooms=save_test_rooms,
             test_room_location=self._test_room_location,
+            solution_cache=self._solution_cache,
+            budget=self._new_search_budget(),
+            stats_log_file=self._search_stats_log,
         )
         actions.append(last_action)
         print(f"Thought in {time.time()-t:.2f}s")
@@ -280,7 +339,9 @@ class DrodBot:
                 try:
                     await self.conquer_room(save_test_rooms=save_test_rooms)
                     continue
-                except NoSolutionError:
+                except NoSolutionError as e:
+                    if e.cancelled:
+                        raise
                     print(
                         "Can't conquer current room from here, checking other entrances"
                     )
@@ -289,38 +350,30 @@ class DrodBot:
                     self.state.current_room_position,
                     allow_unexplored_target=True,
                 )
-                possible_entrances = []
-                for exit in exits:
-                    position, _, _ = exit
-                    if position == self.state.current_room.find_player()[0]:
-                        # We already tried this one
-                        continue
-                    print(f"Trying {position}...")
-                    t = time.time()
-                    room = self.state.level.rooms[
-                        self.state.current_room_position
-                    ].copy()
-                    tile = room.get_tile(position)
-                    tile.monster = Element(
-                        # Make up a direction
-                        element_type=ElementType.BEETHRO,
-                        direction=Direction.SW,
-                    )
-                    room.set_tile(position, tile)
-                    try:
-                        solve_room(
-                            room,
-                            MonsterCountObjective(monsters=0),
-                            save_test_rooms=save_test_rooms,
-                            test_room_location=self._test_room_location,
-                        )
-                        print(f"Thought in {time.time()-t:.2f}s, found a solution")
-                        possible_entrances.append(position)
-                    except NoSolutionError:
-                        print(
-                            f"Thought in {time.time()-t:.2f}s, "
-                            "did not find a solution"
-                        )
+                # We don't know which direction we'll be facing when entering,
+                # so try all of them
+                starts = [
+                    (position, None)
+                    for position, _, _ in exits
+                    if position != self.state.current_room.find_player()[0]
+                ]
+                print(f"Trying {len(starts)} other entrances...")
+                t = time.time()
+                room = self.state.level.rooms[self.state.current_room_position].copy()
+                reachable_starts = await run_in_simulator_thread(
+                    solve_room_from_starts,
+                    room,
+                    starts,
+                    MonsterCountObjective(monsters=0),
+                    budget=self._new_search_budget(),
+                )
+                possible_entrances = list(
+                    dict.fromkeys(position for position, _ in reachable_starts)
+                )
+                print(
+                    f"Thought in {time.time()-t:.2f}s, "
+                    f"found solutions from {possible_entrances}"
+                )
                 self.state.room_backlog.extend(
                     [
                         (self.state.current_room_position, pos)
@@ -331,25 +384,30 @@ class DrodBot:
                 try:
                     print("Trying to reach a room entrance from the backlog...")
                     t = time.time()
-                    actions = find_path_in_level(
+                    actions = await run_in_simulator_thread(
+                        find_path_in_level,
                         self.state.room_backlog,
                         self.state.current_room,
                         self.state.current_room_position,
                         self.state.level,
                         save_test_rooms=save_test_rooms,
                         test_room_location=self._test_room_location,
+                        budget=self._new_search_budget(),
                     )
                     print(f"Thought in {time.time()-t:.2f}s, found a solution")
                     self.state.plan = actions
                     await self._execute_plan()
                     continue
-                except NoSolutionError:
+                except NoSolutionError as e:
+                    if e.cancelled:
+                        raise
                     print(f"Thought in {time.time()-t:.2f}s, did not find a solution")
             try:
                 await self.go_to_unvisited_room(save_test_rooms=save_test_rooms)
                 continue
-            except NoSolutionError:
-                pass
+            except NoSolutionError as e:
+                if e.cancelled:
+                    raise
             if self.state.just_conquered_current_room:
                 try:
                     print("Just conquered current room, trying to leave it...")
@@ -357,37 +415,45 @@ class DrodBot:
                     exits = self.state.level.get_room_exits(
                         self.state.current_room_position
                     )
-                    actions = find_path_in_level(
+                    actions = await run_in_simulator_thread(
+                        find_path_in_level,
                         [e[2] for e in exits],
                         self.state.current_room,
                         self.state.current_room_position,
                         self.state.level,
                         save_test_rooms=save_test_rooms,
                         test_room_location=self._test_room_location,
+                        budget=self._new_search_budget(),
                     )
                     print(f"Thought in {time.time()-t:.2f}s, found a solution")
                     self.state.plan = actions
                     await self._execute_plan()
                     continue
-                except NoSolutionError:
+                except NoSolutionError as e:
+                    if e.cancelled:
+                        raise
                     print(f"Thought in {time.time()-t:.2f}s, did not find a solution")
             try:
                 print("Trying to reach stairs...")
                 t = time.time()
                 stair_tiles = self.state.level.find_element(ElementType.STAIRS)
-                actions = find_path_in_level(
+                actions = await run_in_simulator_thread(
+                    find_path_in_level,
                     stair_tiles,
                     self.state.current_room,
                     self.state.current_room_position,
                     self.state.level,
                     save_test_rooms=save_test_rooms,
                     test_room_location=self._test_room_location,
+                    budget=self._new_search_budget(),
                 )
                 self.state.plan = actions
                 print(f"Thought in {time.time()-t:.2f}s")
                 await self._execute_plan()
                 continue
-            except NoSolutionError:
+            except NoSolutionError as e:
+                if e.cancelled:
+                    raise
                 print(f"Thought in {time.time()-t:.2f}s, " "did not find a solution")
             print("Done exploring")
             break
@@ -410,11 +476,15 @@ class DrodBot:
             raise RuntimeError("No current room")
         room = self.state.current_room
         goal_tiles = room.find_coordinates(element)
-        actions = solve_room(
+        actions = await run_in_simulator_thread(
+            solve_room,
             room,
             StabObjective(tiles=set(goal_tiles)),
             save_test_rooms=save_test_rooms,
             test_room_location=self._test_room_location,
+            solution_cache=self._solution_cache,
+            budget=self._new_search_budget(),
+            stats_log_file=self._search_stats_log,
         )
         self.state.plan = actions
         await self._execute_plan()
@@ -435,11 +505,15 @@ class DrodBot:
         t = time.time()
         try:
             room = self.state.current_room
-            actions = solve_room(
+            actions = await run_in_simulator_thread(
+                solve_room,
                 room,
                 MonsterCountObjective(monsters=0),
                 save_test_rooms=save_test_rooms,
                 test_room_location=self._test_room_location,
+                solution_cache=self._solution_cache,
+                budget=self._new_search_budget(),
+                stats_log_file=self._search_stats_log,
             )
             print(f"Thought in {time.time()-t:.2f}s, found a solution")
             self.state.plan = actions
@@ -451,7 +525,7 @@ class DrodBot:
                 if r[0] != self.state.current_room_position
             ]
             # Remove monsters from the room in the level
-            self.state.level.rooms[self.state.current_room_position].make_conquered()
+            self.state.level.make_room_conquered(self.state.current_room_position)
             self.state.just_conquered_current_room = True
         except NoSolutionError as e:
             print(f"Thought in {time.time()-t:.2f}s, did not find a solution")
@@ -476,11 +550,12 @@ class DrodBot:
         tile = room_in_level.get_tile(player_position)
         tile.monster = Element()
         room_in_level.set_tile(player_position, tile)
-        self.state.level.rooms[self.state.current_room_position] = room_in_level
+        self.state.level.set_room(self.state.current_room_position, room_in_level)
         self._notify_state_update()
         print(f"Interpreted room in {time.time()-t:.2f}s")
 
     async def _execute_plan(self):
+        await self._speculate_after_plan()
         while self.state.plan:
             action = self.state.plan.pop(0)
             (x, y), _ = self.state.current_room.find_player()
@@ -510,8 +585,8 @@ class DrodBot:
                 await self._leave_level()
             else:
                 await self._interface.do_action(action)
-                self.state.current_room = simulate_actions(
-                    self.state.current_room, [action]
+                self.state.current_room = await run_in_simulator_thread(
+                    simulate_actions, self.state.current_room, [action]
                 )
             self._notify_state_update()
             await asyncio.sleep(_ACTION_DELAY)
@@ -535,28 +610,23 @@ class DrodBot:
             if player_y != 0:
                 raise RuntimeError(f"Cannot enter new room by moving N, y={player_y}")
             action = Action.N
-            new_room_coords = (room_x, room_y - 1)
-            position_after = (player_x, ROOM_HEIGHT_IN_TILES - 1)
         elif direction == Direction.W:
             if player_x != 0:
                 raise RuntimeError(f"Cannot enter new room by moving W, x={player_x}")
             action = Action.W
-            new_room_coords = (room_x - 1, room_y)
-            position_after = (ROOM_WIDTH_IN_TILES - 1, player_y)
         elif direction == Direction.S:
             if player_y != ROOM_HEIGHT_IN_TILES - 1:
                 raise RuntimeError(f"Cannot enter new room by moving S, y={player_y}")
             action = Action.S
-            new_room_coords = (room_x, room_y + 1)
-            position_after = (player_x, 0)
         elif direction == Direction.E:
             if player_x != ROOM_WIDTH_IN_TILES - 1:
                 raise RuntimeError(f"Cannot enter new room by moving E, x={player_x}")
             action = Action.E
-            new_room_coords = (room_x + 1, room_y)
-            position_after = (0, player_y)
         else:
             raise RuntimeError(f"Unknown direction {direction}")
+        new_room_coords, position_after = _room_entered(
+            (room_x, room_y), position_in_direction((player_x, player_y), action)
+        )
         await self._interface.do_action(action)
         # Wait for the animation to finish
         await asyncio.sleep(1)
@@ -567,17 +637,81 @@ class DrodBot:
             room_text = get_room_text(room_image)
             if room_text in [RoomText.EXIT_LEVEL, RoomText.EXIT_LEVEL_AND_SECRET_ROOM]:
                 self.state.level.clear()
-            room = self.state.level.rooms[new_room_coords].copy()
-            tile = room.get_tile(position_after)
-            tile.monster = Element(
-                element_type=ElementType.BEETHRO, direction=player_direction
+            self.state.current_room = _with_player(
+                self.state.level.rooms[new_room_coords],
+                position_after,
+                player_direction,
             )
-            room.set_tile(position_after, tile)
-            self.state.current_room = room
             self._notify_state_update()
         else:
             await self._interpret_room()
 
+    async def _speculate_after_plan(self):
+        """Start solving what we'll probably need after the current plan."""
+        if self._speculative_planner is None or not self.state.plan:
+            return
+        plan_end = await run_in_simulator_thread(self._predict_plan_end)
+        if plan_end is None:
+            return
+        room_position, room = plan_end
+        # Conquering the room, going to stairs, or going to another room
+        problems = []
+        if room.find_monster_coordinates():
+            problems.append((room, MonsterCountObjective(monsters=0)))
+        stair_tiles = room.find_coordinates(ElementType.STAIRS)
+        if stair_tiles:
+            problems.append((room, ReachObjective(tiles=set(stair_tiles))))
+        exits = self.state.level.get_room_exits(
+            room_position, allow_unexplored_target=True
+        )
+        for direction in [Direction.N, Direction.E, Direction.S, Direction.W]:
+            goal_tiles = _exit_tiles(exits, direction)
+            if goal_tiles:
+                problems.append((room, ReachObjective(tiles=set(goal_tiles))))
+        self._speculative_planner.speculate(problems)
+
+    def _predict_plan_end(self) -> Optional[Tuple[Tuple[int, int], Room]]:
+        """Predict which room the current plan ends in.
+
+        Returns
+        -------
+        The room position and the room after the plan, or None if the
+        plan leaves the level, enters a room we haven't seen, or doesn't
+        go the way we expect.
+        """
+        room_position = self.state.current_room_position
+        room = self.state.current_room
+        position, _ = room.find_player()
+        room_actions = []
+        for action in self.state.plan:
+            next_position = position_in_direction(position, action)
+            if not inside_room(next_position):
+                if action not in [Action.N, Action.E, Action.S, Action.W]:
+                    return None
+                room = simulate_actions(room, room_actions)
+                player_position, player_direction = room.find_player()
+                if player_position != position:
+                    return None
+                room_position, position = _room_entered(room_position, next_position)
+                if room_position not in self.state.level.rooms:
+                    return None
+                room = _with_player(
+                    self.state.level.rooms[room_position], position, player_direction
+                )
+                room_actions = []
+                continue
+            if (
+                room.get_tile(next_position).room_piece.element_type
+                == ElementType.STAIRS
+            ):
+                return None
+            room_actions.append(action)
+            position = next_position
+        room = simulate_actions(room, room_actions)
+        if room.find_player()[0] != position:
+            return None
+        return room_position, room
+
     async def _leave_level(self):
         print("Leaving level")
         # Let's watch Beethro walk down the stairs for a while
@@ -591,3 +725,80 @@ class DrodBot:
 
         self.state = DrodBotState()
         await self._interpret_room()
+
+
+def _exit_tiles(
+    exits: List[Tuple[Tuple[int, int], Action, Tuple]], direction: Direction
+) -> List[Tuple[int, int]]:
+    """Get the exit tiles on one edge of a room.
+
+    Parameters
+    ----------
+    exits
+        The exits of the room, from Level.get_room_exits().
+    direction
+        The edge of the room. Cannot be diagonal.
+
+    Returns
+    -------
+    The positions of the exits on that edge.
+    """
+    if direction == Direction.N:
+        return [e[0] for e in exits if e[0][1] == 0]
+    if direction == Direction.E:
+        return [e[0] for e in exits if e[0][0] == ROOM_WIDTH_IN_TILES - 1]
+    if direction == Direction.S:
+        return [e[0] for e in exits if e[0][1] == ROOM_HEIGHT_IN_TILES - 1]
+    if direction == Direction.W:
+        return [e[0] for e in exits if e[0][0] == 0]
+    raise RuntimeError(f"Unknown direction {direction}")
+
+
+def _room_entered(
+    room_position: Tuple[int, int], outside_position: Tuple[int, int]
+) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Get where we end up when moving out of a room.
+
+    Parameters
+    ----------
+    room_position
+        The position of the room we leave.
+    outside_position
+        The position we move to, just outside the room.
+
+    Returns
+    -------
+    The position of the new room, and the player position in it.
+    """
+    room_x, room_y = room_position
+    x, y = outside_position
+    if y < 0:
+        return (room_x, room_y - 1), (x, ROOM_HEIGHT_IN_TILES - 1)
+    if x >= ROOM_WIDTH_IN_TILES:
+        return (room_x + 1, room_y), (0, y)
+    if y >= ROOM_HEIGHT_IN_TILES:
+        return (room_x, room_y + 1), (x, 0)
+    return (room_x - 1, room_y), (ROOM_WIDTH_IN_TILES - 1, y)
+
+
+def _with_player(room: Room, position: Tuple[int, int], direction: Direction) -> Room:
+    """Get a copy of a room with Beethro added.
+
+    Parameters
+    ----------
+    room
+        The room, without Beethro.
+    position
+        Where to put Beethro.
+    direction
+        The direction Beethro faces.
+
+    Returns
+    -------
+    A copy of the room with Beethro in it.
+    """
+    room = room.copy()
+    tile = room.get_tile(position)
+    tile.monster = Element(element_type=ElementType.BEETHRO, direction=direction)
+    room.set_tile(position, tile)
+    return room
@@ -0,0 +1,244 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Union
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+import room_simulator
+from room_simulator import (
+    Action,
+    OrObjective,
+    ReachObjective,
+    MonsterCountObjective,
+    StabObjective,
+    Room,
+)
+from util import objective_to_dict, room_from_dict, room_to_dict
+
+# Increase this when the stored format changes
+SCHEMA_VERSION = 1
+
+
+@dataclass
+class SolutionCacheStats:
+    """Statistics about the use of a solution cache.
+
+    Attributes
+    ----------
+    hits
+        The number of lookups that found a solution.
+    misses
+        The number of lookups that didn't find a solution.
+    stores
+        The number of solutions that were stored.
+    evictions
+        The number of solutions that were removed to keep the cache
+        within its size limit.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class CachedSolution:
+    """A solution from the cache.
+
+    Attributes
+    ----------
+    actions
+        The actions that solve the room.
+    final_room
+        The room after taking the actions.
+    """
+
+    actions: List[Action]
+    final_room: Room
+
+
+class SolutionCache:
+    """A cache of room solutions on disk.
+
+    Solutions are keyed by a hash of the room and objective, and only
+    solutions that were found are stored. Any solution is a valid one, so
+    they are shared between different solve_room() settings. Entries from
+    a different build of the room simulator are ignored, since it may
+    simulate rooms differently.
+
+    Parameters
+    ----------
+    path
+        The SQLite database file. It's created if it doesn't exist.
+    max_entries
+        When there are more solutions than this, remove the ones that
+        were least recently used.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = 10000):
+        self._max_entries = max_entries
+        self._version = f"{SCHEMA_VERSION}-{_simulator_build_id()}"
+        self._stats = SolutionCacheStats()
+        # The bot solves rooms in another thread than it's created in
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions ("
+                "key TEXT PRIMARY KEY, "
+                "version TEXT NOT NULL, "
+                "actions TEXT NOT NULL, "
+                "final_room BLOB NOT NULL, "
+                "last_used REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS solutions_last_used "
+                "ON solutions (last_used)"
+            )
+            # Solutions from other builds will never be used
+            self._connection.execute(
+                "DELETE FROM solutions WHERE version != ?", (self._version,)
+            )
+
+    def get(
+        self,
+        room: Room,
+        objective: Union[
+            OrObjective, ReachObjective, StabObjective, MonsterCountObjective
+        ],
+    ) -> Optional[CachedSolution]:
+        """Look up the solution for a room and objective.
+
+        Parameters
+        ----------
+        room
+            The room.
+        objective
+            The objective.
+
+        Returns
+        -------
+        The cached solution, or None if there is none.
+        """
+        key = _cache_key(room, objective)
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT actions, final_room FROM solutions "
+                "WHERE key = ? AND version = ?",
+                (key, self._version),
+            ).fetchone()
+            if row is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            self._connection.execute(
+                "UPDATE solutions SET last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        actions_json, final_room_data = row
+        return CachedSolution(
+            actions=[getattr(Action, a) for a in json.loads(actions_json)],
+            final_room=room_from_dict(
+                json.loads(zlib.decompress(final_room_data).decode())
+            ),
+        )
+
+    def put(
+        self,
+        room: Room,
+        objective: Union[
+            OrObjective, ReachObjective, StabObjective, MonsterCountObjective
+        ],
+        actions: List[Action],
+        final_room: Room,
+    ):
+        """Store the solution for a room and objective.
+
+        Parameters
+        ----------
+        room
+            The room.
+        objective
+            The objective.
+        actions
+            The actions that solve the room.
+        final_room
+            The room after taking the actions.
+        """
+        key = _cache_key(room, objective)
+        final_room_data = zlib.compress(
+            json.dumps(room_to_dict(final_room), separators=(",", ":")).encode()
+        )
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO solutions "
+                "(key, version, actions, final_room, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    self._version,
+                    json.dumps([a.name for a in actions]),
+                    final_room_data,
+                    time.time(),
+                ),
+            )
+            self._stats.stores += 1
+            evicted = self._connection.execute(
+                "DELETE FROM solutions WHERE key IN ("
+                "SELECT key FROM solutions ORDER BY last_used DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            ).rowcount
+            self._stats.evictions += evicted
+
+    def get_stats(self) -> SolutionCacheStats:
+        """Get the hit and miss statistics since the cache was opened.
+
+        Returns
+        -------
+        A copy of the statistics.
+        """
+        with self._lock:
+            return SolutionCacheStats(**vars(self._stats))
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._connection.close()
+
+
+def _cache_key(
+    room: Room,
+    objective: Union[OrObjective, ReachObjective, StabObjective, MonsterCountObjective],
+) -> str:
+    content = json.dumps(
+        {
+            "objective": _sorted_tiles(objective_to_dict(objective)),
+            "room": room_to_dict(room),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _sorted_tiles(objective_dict: dict) -> dict:
+    # The tiles come from sets, so their order isn't stable
+    if "tiles" in objective_dict:
+        return {**objective_dict, "tiles": sorted(objective_dict["tiles"])}
+    if "objectives" in objective_dict:
+        return {
+            **objective_dict,
+            "objectives": [_sorted_tiles(o) for o in objective_dict["objectives"]],
+        }
+    return objective_dict
+
+
+def _simulator_build_id() -> str:
+    with open(room_simulator.__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
@@ -1,11 +1,15 @@
+from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Optional, Union
+from typing import List, Optional, Tuple, Union
+import hashlib
 import json
 import os
 import os.path
+import time
 
 from room_simulator import (
+    Direction,
     ObjectiveReacher,
     OrObjective,
     ReachObjective,
@@ -14,9 +18,14 @@ from room_simulator import (
     PlanningProblem,
     Room,
     SearcherDerivedRoomObjective,
+    SearchBudget,
+    SearchSettings,
+    SolveStats,
     FailureReason,
+    get_full_room,
 )
 from search import NoSolutionError
+from .solution_cache import SolutionCache
 from util import expand_planning_solution, objective_to_dict, room_to_dict
 
 
@@ -27,11 +36,65 @@ class SaveTestRoomBehavior(str, Enum):
     SAVE_ALL = "Save all room+objective combinations"
 
 
+@dataclass
+class SolveSettings:
+    """How to search when solving a room.
+
+    These only affect how the search is done, not which room or objective
+    it is for, so the same settings can be used for many rooms.
+
+    Attributes
+    ----------
+    idle_pruning_radius
+        If set, don't consider waiting or turning when there is nothing
+        within this distance of the player that it could affect.
+    macro_action_radius
+        If set, walk along shortest paths as single search actions when
+        there are no monsters within this distance of the player.
+    fast_simulation
+        Whether to simulate the room without DRODLib, if the room only
+        has elements that FastRoomPlayer supports. FastRoomPlayer hasn't
+        been checked against DRODLib yet, so this is only for experiments
+        until compare_simulators() passes.
+    simulation_search_settings
+        How to search when simulating the room. By default, use greedy
+        best-first search without memory limits.
+    defer_subobjective_checks
+        Whether to only check if a sub-objective can be reached when the
+        planner is about to continue from it, instead of checking all
+        sub-objectives from each state up front.
+    objective_cache_max_bytes
+        If set, keep the cached solutions for reaching sub-objectives within
+        approximately this many bytes. Solutions that are removed are
+        searched for again if they are needed, which spends from the budget
+        and fails if it has run out.
+    prune_orb_strikes
+        Whether to skip striking orbs that don't change the region the
+        player can walk in. This makes the search smaller, but can make
+        rooms unsolvable.
+    """
+
+    idle_pruning_radius: Optional[int] = None
+    macro_action_radius: Optional[int] = None
+    fast_simulation: bool = False
+    simulation_search_settings: Optional[SearchSettings] = None
+    defer_subobjective_checks: bool = False
+    objective_cache_max_bytes: Optional[int] = None
+    prune_orb_strikes: bool = False
+
+
 def solve_room(
     room: Room,
     objective: Union[OrObjective, ReachObjective, StabObjective, MonsterCountObjective],
     save_test_rooms: SaveTestRoomBehavior = SaveTestRoomBehavior.NO_SAVING,
     test_room_location: Optional[Path | str] = None,
+    settings: Optional[SolveSettings] = None,
+    deadline: Optional[float] = None,
+    max_expansions: Optional[int] = None,
+    solution_cache: Optional[SolutionCache] = None,
+    budget: Optional[SearchBudget] = None,
+    return_stats: bool = False,
+    stats_log_file: Optional[Path | str] = None,
 ):
     """Find a sequence of actions to solve a room.
 
@@ -46,21 +109,283 @@ def solve_room(
     test_room_location
         Where to save test rooms. Can only be None if
         save_test_rooms is NO_SAVING.
+    settings
+        How to search. By default, use SolveSettings().
+    deadline
+        If set, give up when time.monotonic() reaches this.
+    max_expansions
+        If set, give up after expanding this many search nodes in total,
+        including the searches for reaching each sub-objective.
+    solution_cache
+        If set, look for a solution here before searching, and store the
+        solution if one is found.
+    budget
+        If set, search with this budget, instead of one created from
+        deadline and max_expansions. This lets another thread cancel the
+        search or follow its progress.
+    return_stats
+        Whether to also return a SolveStats with what the search did. If
+        the solution was cached, the stats are all zero.
+    stats_log_file
+        If set, append a line of JSON with the SolveStats and the outcome
+        to this file, for finding out afterwards why some rooms are slow.
+
+    Returns
+    -------
+    The actions that solve the room. If return_stats is True, a tuple of
+    the actions and a SolveStats.
+
+    Raises
+    ------
+    NoSolutionError
+        If the room couldn't be solved. If the deadline or max_expansions
+        was reached, or the budget was cancelled, partial_actions has the
+        actions leading to the best progress so far. If stats were
+        requested, they are in its stats attribute.
     """
-    objective_reacher = ObjectiveReacher(room)
-    problem = PlanningProblem(objective, objective_reacher)
-    searcher = SearcherDerivedRoomObjective(problem)
+    if budget is not None and (deadline is not None or max_expansions is not None):
+        raise RuntimeError("Cannot set both a budget and deadline or max_expansions")
+    if deadline is not None or max_expansions is not None:
+        time_limit = None if deadline is None else max(deadline - time.monotonic(), 0)
+        budget = SearchBudget(time_limit=time_limit, max_expansions=max_expansions)
+    start_time = time.monotonic()
+    stats = None
+    if return_stats or stats_log_file is not None:
+        stats = SolveStats()
+    cached_solution = None
+    if solution_cache is not None:
+        cached_solution = solution_cache.get(room, objective)
+    if cached_solution is None:
+        solution, objective_reacher = _search_room(
+            room, objective, settings or SolveSettings(), budget, stats
+        )
+        failure_reason = solution.failure_reason
+    else:
+        failure_reason = None
+    if stats_log_file is not None:
+        _log_stats(
+            stats_log_file,
+            room,
+            objective,
+            stats,
+            time.monotonic() - start_time,
+            failure_reason=failure_reason,
+            cached=cached_solution is not None,
+        )
+    if cached_solution is not None:
+        actions = cached_solution.actions
+    elif not solution.exists:
+        partial_actions = None
+        if solution.actions is not None:
+            partial_actions = expand_planning_solution(
+                solution.actions, objective_reacher
+            )
+        raise NoSolutionError(
+            iteration_limited=failure_reason == FailureReason.ITERATION_LIMIT_REACHED,
+            deadline_reached=failure_reason == FailureReason.DEADLINE_REACHED,
+            partial_actions=partial_actions,
+            cancelled=failure_reason == FailureReason.CANCELLED,
+            stats=stats,
+        )
+    else:
+        actions = expand_planning_solution(solution.actions, objective_reacher)
+        if solution_cache is not None:
+            solution_cache.put(
+                room, objective, actions, get_full_room(room, solution.final_state)
+            )
+    maybe_save_room(room, objective, save_test_rooms, test_room_location)
+    if return_stats:
+        return actions, stats
+    return actions
+
+
+def _search_room(
+    room: Room,
+    objective: Union[OrObjective, ReachObjective, StabObjective, MonsterCountObjective],
+    settings: SolveSettings,
+    budget: Optional[SearchBudget],
+    stats: Optional[SolveStats],
+):
+    objective_reacher = _create_objective_reacher(room, settings)
+    # Set these before creating the searcher, since that already looks
+    # for solutions to sub-objectives
+    objective_reacher.set_budget(budget)
+    objective_reacher.set_stats(stats)
+    problem = PlanningProblem(
+        objective, objective_reacher, prune_orb_strikes=settings.prune_orb_strikes
+    )
+    searcher = SearcherDerivedRoomObjective(
+        problem, defer_evaluation=settings.defer_subobjective_checks
+    )
+    searcher.set_budget(budget)
+    searcher.set_stats(stats)
     solution = searcher.find_solution()
-    if not solution.exists:
+    if stats is not None:
+        stats.planner_expansions = searcher.get_iterations()
+    # The solutions to the sub-objectives are cached, but make sure they
+    # can be expanded even if the budget is gone
+    objective_reacher.set_budget(None)
+    return solution, objective_reacher
+
+
+def _create_objective_reacher(
+    room: Room,
+    settings: SolveSettings,
+    starts: Optional[List[Tuple[Tuple[int, int], Direction]]] = None,
+) -> ObjectiveReacher:
+    return ObjectiveReacher(
+        room,
+        idle_pruning_radius=settings.idle_pruning_radius,
+        macro_action_radius=settings.macro_action_radius,
+        fast_simulation=settings.fast_simulation,
+        simulation_search_settings=settings.simulation_search_settings
+        or SearchSettings(),
+        cache_max_bytes=settings.objective_cache_max_bytes,
+        starts=starts or [],
+    )
+
+
+def solve_room_from_starts(
+    room: Room,
+    starts: List[Tuple[Tuple[int, int], Optional[Direction]]],
+    objective: Union[OrObjective, ReachObjective, StabObjective, MonsterCountObjective],
+    settings: Optional[SolveSettings] = None,
+    budget: Optional[SearchBudget] = None,
+) -> List[Tuple[Tuple[int, int], Direction]]:
+    """Find which starting positions in a room can reach an objective.
+
+    This does one search from all starts at once, so states that can be
+    reached from several starts are only explored once.
+
+    Parameters
+    ----------
+    room
+        The room. Any player in it is ignored.
+    starts
+        The player positions and directions to start from. If the
+        direction is None, try all 8 directions.
+    objective
+        The objective to reach.
+    settings
+        How to search. By default, use SolveSettings().
+    budget
+        If set, search with this budget, so the search can be stopped.
+
+    Returns
+    -------
+    The (position, direction) starts that can reach the objective.
+
+    Raises
+    ------
+    NoSolutionError
+        If the budget ran out, since we can't tell which starts can reach
+        the objective then.
+    """
+    all_directions = [
+        Direction.N,
+        Direction.NE,
+        Direction.E,
+        Direction.SE,
+        Direction.S,
+        Direction.SW,
+        Direction.W,
+        Direction.NW,
+    ]
+    expanded_starts = [
+        (position, start_direction)
+        for position, direction in starts
+        for start_direction in (all_directions if direction is None else [direction])
+    ]
+    if not expanded_starts:
+        return []
+    if settings is None:
+        settings = SolveSettings()
+    objective_reacher = _create_objective_reacher(room, settings, expanded_starts)
+    # Set this before creating the searcher, since that already looks for
+    # solutions to sub-objectives
+    objective_reacher.set_budget(budget)
+    problem = PlanningProblem(
+        objective, objective_reacher, prune_orb_strikes=settings.prune_orb_strikes
+    )
+    searcher = SearcherDerivedRoomObjective(
+        problem, defer_evaluation=settings.defer_subobjective_checks
+    )
+    searcher.set_budget(budget)
+    reachable = searcher.find_reachable_starts()
+    if budget is not None and budget.is_exhausted():
+        failure_reason = budget.exhausted_reason()
         raise NoSolutionError(
-            iteration_limited=solution.failure_reason
-            == FailureReason.ITERATION_LIMIT_REACHED
+            iteration_limited=failure_reason == FailureReason.ITERATION_LIMIT_REACHED,
+            deadline_reached=failure_reason == FailureReason.DEADLINE_REACHED,
+            cancelled=failure_reason == FailureReason.CANCELLED,
         )
-    _maybe_save_room(room, objective, save_test_rooms, test_room_location)
-    return expand_planning_solution(solution.actions, objective_reacher)
+    return [expanded_starts[i] for i in sorted(reachable)]
+
+
+# The SolveStats attributes, in the order they are logged
+_STATS_FIELDS = [
+    "planner_expansions",
+    "pathfinding_expansions",
+    "simulation_expansions",
+    "objective_cache_hits",
+    "objective_cache_misses",
+    "pathfinding_time",
+    "simulation_time",
+    "performed_actions",
+    "replayed_actions",
+    "undo_calls",
+    "undone_actions",
+    "derived_room_calls",
+    "derived_room_time",
+    "peak_frontier_size",
+    "peak_explored_size",
+]
+
+
+def _stats_to_dict(stats: SolveStats) -> dict:
+    """Convert solve stats to a dict, for logging them as JSON.
+
+    Parameters
+    ----------
+    stats
+        The stats.
+
+    Returns
+    -------
+    A dict with the stats attributes.
+    """
+    return {field: getattr(stats, field) for field in _STATS_FIELDS}
+
+
+def _log_stats(
+    stats_log_file: Path | str,
+    room: Room,
+    objective: Union[OrObjective, ReachObjective, StabObjective, MonsterCountObjective],
+    stats: SolveStats,
+    seconds: float,
+    failure_reason: Optional[FailureReason],
+    cached: bool,
+):
+    # The room hash groups log lines for the same room, and the test room
+    # for it can be saved with save_test_rooms
+    room_json = json.dumps(room_to_dict(room), sort_keys=True, separators=(",", ":"))
+    line = json.dumps(
+        {
+            "time": time.time(),
+            "room_hash": hashlib.sha256(room_json.encode()).hexdigest()[:16],
+            "objective": objective_to_dict(objective),
+            "solved": failure_reason in (None, FailureReason.NO_FAILURE),
+            "failure_reason": None if failure_reason is None else failure_reason.name,
+            "cached": cached,
+            "seconds": seconds,
+            "stats": _stats_to_dict(stats),
+        }
+    )
+    with open(stats_log_file, "a") as f:
+        f.write(line + "\n")
 
 
-def _maybe_save_room(
+def maybe_save_room(
     room: Room,
     objective: Union[OrObjective, ReachObjective, StabObjective, MonsterCountObjective],
     save_test_rooms: SaveTestRoomBehavior,
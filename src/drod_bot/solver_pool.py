@@ -0,0 +1,269 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+import dataclasses
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zlib
+
+import room_simulator
+from room_simulator import (
+    Action,
+    OrObjective,
+    ReachObjective,
+    MonsterCountObjective,
+    StabObjective,
+    Room,
+    SearchSettings,
+    SearchStrategy,
+)
+from search import NoSolutionError
+from util import objective_from_dict, objective_to_dict, room_from_dict, room_to_dict
+from .solution_cache import SolutionCache
+from .solve_room import SolveSettings, solve_room
+
+# The solution cache of this worker process, if any
+_worker_solution_cache: Optional[SolutionCache] = None
+
+
+class SolverPool:
+    """Solves rooms in a pool of worker processes.
+
+    The DRODLib state used by the room simulator is global, so rooms can't
+    be solved in parallel threads. Instead, each worker process initializes
+    its own room simulator, with its own fake DROD home directory.
+
+    Parameters
+    ----------
+    processes
+        The number of worker processes. By default, one per CPU.
+    solution_cache_path
+        If set, the workers look for solutions in the SolutionCache
+        at this path before searching, and store their solutions there.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        solution_cache_path: Optional[str | Path] = None,
+    ):
+        self._home_root = tempfile.mkdtemp(prefix="drodbot_solver_pool_")
+        if solution_cache_path is not None:
+            # The workers have other working directories
+            solution_cache_path = os.path.abspath(solution_cache_path)
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            # Forking would copy the already initialized DRODLib state
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_worker,
+            initargs=(self._home_root, solution_cache_path),
+        )
+
+    def solve_many(
+        self,
+        problems: List[
+            Tuple[
+                Room,
+                Union[
+                    OrObjective, ReachObjective, StabObjective, MonsterCountObjective
+                ],
+            ]
+        ],
+        settings: Optional[SolveSettings] = None,
+        deadline: Optional[float] = None,
+        max_expansions: Optional[int] = None,
+    ) -> List[Future]:
+        """Start solving several rooms in the worker processes.
+
+        Parameters
+        ----------
+        problems
+            The (room, objective) pairs to solve.
+        settings
+            Passed to solve_room().
+        deadline
+            Passed to solve_room(). time.monotonic() uses the same clock
+            in all processes, so this is the same deadline for each room.
+        max_expansions
+            Passed to solve_room(). This is a separate budget for each room.
+
+        Returns
+        -------
+        A future for each problem, in the same order. The result is the
+        actions that solve the room, or the future raises NoSolutionError.
+        """
+        solve_kwargs = {
+            "settings": _solve_settings_to_dict(settings),
+            "deadline": deadline,
+            "max_expansions": max_expansions,
+        }
+        futures = []
+        for room, objective in problems:
+            worker_future = self._executor.submit(
+                _solve_in_worker, _encode_problem(room, objective), solve_kwargs
+            )
+            futures.append(_decode_result_when_done(worker_future))
+        return futures
+
+    def shutdown(self, cancel_futures: bool = False):
+        """Stop the worker processes and remove their home directories.
+
+        Parameters
+        ----------
+        cancel_futures
+            Whether to cancel the problems that haven't started yet,
+            instead of waiting for them.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=cancel_futures)
+        shutil.rmtree(self._home_root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+def _encode_problem(
+    room: Room,
+    objective: Union[OrObjective, ReachObjective, StabObjective, MonsterCountObjective],
+) -> bytes:
+    # Most tiles are identical, so the JSON compresses very well
+    content = json.dumps(
+        {"objective": objective_to_dict(objective), "room": room_to_dict(room)},
+        separators=(",", ":"),
+    )
+    return zlib.compress(content.encode())
+
+
+def _decode_problem(data: bytes):
+    content = json.loads(zlib.decompress(data).decode())
+    return room_from_dict(content["room"]), objective_from_dict(content["objective"])
+
+
+def _solve_settings_to_dict(settings: Optional[SolveSettings]) -> Optional[dict]:
+    # SearchSettings can't be pickled, so send it as a dict too
+    if settings is None:
+        return None
+    return {
+        **dataclasses.asdict(
+            dataclasses.replace(settings, simulation_search_settings=None)
+        ),
+        "simulation_search_settings": _settings_to_dict(
+            settings.simulation_search_settings
+        ),
+    }
+
+
+def _solve_settings_from_dict(settings_dict: Optional[dict]) -> Optional[SolveSettings]:
+    if settings_dict is None:
+        return None
+    return SolveSettings(
+        **{
+            **settings_dict,
+            "simulation_search_settings": _settings_from_dict(
+                settings_dict["simulation_search_settings"]
+            ),
+        }
+    )
+
+
+def _settings_to_dict(settings: Optional[SearchSettings]) -> Optional[dict]:
+    if settings is None:
+        return None
+    return {
+        "strategy": settings.strategy.name,
+        "weight": settings.weight,
+        "beam_width": settings.beam_width,
+        "explored_limit": settings.explored_limit,
+        "frontier_limit": settings.frontier_limit,
+    }
+
+
+def _settings_from_dict(settings_dict: Optional[dict]) -> Optional[SearchSettings]:
+    if settings_dict is None:
+        return None
+    return SearchSettings(
+        getattr(SearchStrategy, settings_dict["strategy"]),
+        weight=settings_dict["weight"],
+        beam_width=settings_dict["beam_width"],
+        explored_limit=settings_dict["explored_limit"],
+        frontier_limit=settings_dict["frontier_limit"],
+    )
+
+
+def _initialize_worker(home_root: str, solution_cache_path: Optional[str]):
+    global _worker_solution_cache
+    # The room simulator creates its fake home directory in the working
+    # directory, so give each worker its own
+    os.chdir(tempfile.mkdtemp(dir=home_root))
+    room_simulator.initialize()
+    if solution_cache_path is not None:
+        _worker_solution_cache = SolutionCache(solution_cache_path)
+
+
+def _solve_in_worker(problem: bytes, solve_kwargs: dict):
+    room, objective = _decode_problem(problem)
+    solve_kwargs = {
+        **solve_kwargs,
+        "settings": _solve_settings_from_dict(solve_kwargs["settings"]),
+    }
+    # Send actions by name, so the result doesn't depend on pickling the
+    # extension module's types
+    try:
+        actions = solve_room(
+            room, objective, solution_cache=_worker_solution_cache, **solve_kwargs
+        )
+    except NoSolutionError as e:
+        partial_actions = (
+            None if e.partial_actions is None else [a.name for a in e.partial_actions]
+        )
+        return {
+            "solved": False,
+            "iteration_limited": e.iteration_limited,
+            "deadline_reached": e.deadline_reached,
+            "partial_actions": partial_actions,
+        }
+    return {"solved": True, "actions": [a.name for a in actions]}
+
+
+def _decode_result_when_done(worker_future: Future) -> Future:
+    future = Future()
+
+    def on_done(done_future: Future):
+        if future.cancelled():
+            return
+        if done_future.cancelled():
+            future.cancel()
+            future.set_running_or_notify_cancel()
+            return
+        if done_future.exception() is not None:
+            future.set_exception(done_future.exception())
+            return
+        result = done_future.result()
+        if result["solved"]:
+            future.set_result([getattr(Action, a) for a in result["actions"]])
+            return
+        partial_actions = result["partial_actions"]
+        future.set_exception(
+            NoSolutionError(
+                iteration_limited=result["iteration_limited"],
+                deadline_reached=result["deadline_reached"],
+                partial_actions=(
+                    None
+                    if partial_actions is None
+                    else [getattr(Action, a) for a in partial_actions]
+                ),
+            )
+        )
+
+    def on_cancel(cancelled_future: Future):
+        if cancelled_future.cancelled():
+            worker_future.cancel()
+
+    worker_future.add_done_callback(on_done)
+    future.add_done_callback(on_cancel)
+    return future
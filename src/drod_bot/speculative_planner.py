@@ -0,0 +1,64 @@
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List, Tuple, Union
+
+from room_simulator import (
+    OrObjective,
+    ReachObjective,
+    MonsterCountObjective,
+    StabObjective,
+    Room,
+)
+from .solver_pool import SolverPool
+
+
+class SpeculativePlanner:
+    """Solves rooms we will probably need solutions for, in the background.
+
+    The solutions are stored in a SolutionCache, so solve_room() finds them
+    there if the guess was right. Wrong guesses only cost background CPU
+    time.
+
+    Parameters
+    ----------
+    solution_cache_path
+        The SolutionCache to store solutions in. solve_room() should use
+        a SolutionCache at the same path.
+    processes
+        The number of worker processes to solve rooms in.
+    """
+
+    def __init__(self, solution_cache_path: str | Path, processes: int = 1):
+        self._pool = SolverPool(processes, solution_cache_path=solution_cache_path)
+        self._futures: List[Future] = []
+
+    def speculate(
+        self,
+        problems: List[
+            Tuple[
+                Room,
+                Union[
+                    OrObjective, ReachObjective, StabObjective, MonsterCountObjective
+                ],
+            ]
+        ],
+    ):
+        """Start solving some rooms in the background.
+
+        Speculation that hasn't started yet is cancelled, since the new
+        guesses are based on newer information.
+
+        Parameters
+        ----------
+        problems
+            The (room, objective) pairs to solve, most likely first.
+        """
+        for future in self._futures:
+            future.cancel()
+        self._futures = self._pool.solve_many(problems)
+
+    def shutdown(self):
+        """Cancel any remaining speculation and stop the worker processes."""
+        for future in self._futures:
+            future.cancel()
+        self._pool.shutdown(cancel_futures=True)
@@ -1,7 +1,7 @@
 from itertools import groupby
 from typing import Dict, Tuple
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, PrivateAttr, validator
 
 from util import room_from_dict
 from common import ROOM_HEIGHT_IN_TILES, ROOM_WIDTH_IN_TILES
@@ -15,10 +15,20 @@ class Level(BaseModel):
     ----------
     rooms
         The rooms, indexed by coordinates. The coordinates do not
-        necessarily correspond to the in-game coordinates.
+        necessarily correspond to the in-game coordinates. Use
+        set_room() instead of changing it directly, to keep the
+        cached exits and transits up to date.
     """
 
     rooms: Dict[Tuple[int, int], Room] = {}
+    # Cached results of get_room_exits(), indexed by
+    # (room position, allow_unexplored_target)
+    _exits: Dict = PrivateAttr(default_factory=dict)
+    # Whether each room can be crossed from an entrance tile to an exit tile,
+    # indexed by room position and then (entrance tile, exit tile). Only
+    # crossings that were found are kept, since failing to find one may be
+    # because of an iteration limit or an exhausted budget.
+    _transits: Dict = PrivateAttr(default_factory=dict)
 
     class Config:
         arbitrary_types_allowed = True
@@ -63,6 +73,8 @@ class Level(BaseModel):
         """
         # Possibly a bit hacky, but it's simpler than passing around whether
         # the level is cleared when simulating rooms
+        self._exits.clear()
+        self._transits.clear()
         for room in self.rooms.values():
             blue_doors = room.find_coordinates(ElementType.BLUE_DOOR)
             open_blue_doors = room.find_coordinates(ElementType.BLUE_DOOR_OPEN)
@@ -75,6 +87,76 @@ class Level(BaseModel):
                 tile.room_piece = Element(ElementType.BLUE_DOOR)
                 room.set_tile(position, tile)
 
+    def set_room(self, room_position, room):
+        """Add or replace a room.
+
+        Parameters
+        ----------
+        room_position
+            The position of the room.
+        room
+            The room.
+        """
+        self.rooms[room_position] = room
+        self._invalidate_room(room_position)
+
+    def make_room_conquered(self, room_position):
+        """Remove all monsters from a room, and do anything else conquering does.
+
+        Parameters
+        ----------
+        room_position
+            The position of the room.
+        """
+        self.rooms[room_position].make_conquered()
+        self._invalidate_room(room_position)
+
+    def get_transits(self):
+        """Get the known ways to cross rooms.
+
+        Returns
+        -------
+        A dict from (room_position, entrance_tile, exit_tile) to whether
+        the room can be crossed between those tiles.
+        """
+        return {
+            (room_position, entrance, exit): crossable
+            for room_position, room_transits in self._transits.items()
+            for (entrance, exit), crossable in room_transits.items()
+        }
+
+    def add_transits(self, transits):
+        """Remember which rooms can be crossed between some tiles.
+
+        Rooms that could not be crossed are not remembered, since that
+        may change with a larger iteration limit or budget.
+
+        Parameters
+        ----------
+        transits
+            A dict from (room_position, entrance_tile, exit_tile) to whether
+            the room can be crossed between those tiles.
+        """
+        for (room_position, entrance, exit), crossable in transits.items():
+            if crossable and room_position in self.rooms:
+                self._transits.setdefault(room_position, {})[
+                    (entrance, exit)
+                ] = crossable
+
+    def _invalidate_room(self, room_position):
+        # The exits depend on the edges of the neighboring rooms as well
+        room_x, room_y = room_position
+        for position in [
+            room_position,
+            (room_x, room_y - 1),
+            (room_x + 1, room_y),
+            (room_x, room_y + 1),
+            (room_x - 1, room_y),
+        ]:
+            self._exits.pop((position, False), None)
+            self._exits.pop((position, True), None)
+        self._transits.pop(room_position, None)
+
     def find_element(self, element):
         """Find instances of an element in the level.
 
@@ -158,6 +240,14 @@ class Level(BaseModel):
         A list of tuples:
             (tile_position_from, movement_action, (room_position_to, tile_position_to))
         """
+        cache_key = (room_position, allow_unexplored_target)
+        if cache_key not in self._exits:
+            self._exits[cache_key] = self._find_room_exits(
+                room_position, allow_unexplored_target
+            )
+        return list(self._exits[cache_key])
+
+    def _find_room_exits(self, room_position, allow_unexplored_target):
         room_x, room_y = room_position
         exits = []
         for (
@@ -1,4 +1,5 @@
 import asyncio
+import os
 import threading
 import tkinter
 import sys
@@ -8,7 +9,7 @@ import room_simulator
 from room_tester import RoomTester
 from tile_classifier import TileClassifier
 from room_interpreter import RoomInterpreter
-from drod_bot import DrodBot
+from drod_bot import DrodBot, SolutionCache, SolveSettings, SpeculativePlanner
 from drod_interface import PlayInterface, EditorInterface
 from apps import (
     MainApp,
@@ -18,9 +19,17 @@ from apps import (
     RoomSolverAppBackend,
     RoomTesterAppBackend,
 )
-from room_tester import test_rooms_standalone
+from room_tester import (
+    benchmark_search,
+    benchmark_solve,
+    compare_simulators,
+    compare_solve_stats,
+    test_rooms_standalone,
+)
 
 TEST_ROOM_DIR = "saved_test_rooms"
+SOLUTION_CACHE_FILE = "solution_cache.sqlite"
+SEARCH_STATS_LOG = "search_stats.jsonl"
 
 
 def main():
@@ -38,7 +47,18 @@ def main():
     classifier = TileClassifier()
     classifier.load_tile_data("tile_data")
     interpreter = RoomInterpreter(classifier, play_interface)
-    bot = DrodBot("bot_state.json", TEST_ROOM_DIR, play_interface, interpreter)
+    solution_cache = SolutionCache(SOLUTION_CACHE_FILE)
+    # Solves rooms in another process while the bot is playing
+    speculative_planner = SpeculativePlanner(SOLUTION_CACHE_FILE)
+    bot = DrodBot(
+        "bot_state.json",
+        TEST_ROOM_DIR,
+        play_interface,
+        interpreter,
+        solution_cache=solution_cache,
+        speculative_planner=speculative_planner,
+        search_stats_log=SEARCH_STATS_LOG,
+    )
 
     classification_app_backend = ClassificationAppBackend(
         classifier, "tile_data", "sample_tiles", editor_interface
@@ -70,6 +90,9 @@ def main():
     finally:
         loop.call_soon_threadsafe(loop.stop)
         asyncio_thread.join()
+        speculative_planner.shutdown()
+        print(f"Solution cache: {solution_cache.get_stats()}")
+        solution_cache.close()
 
 
 if __name__ == "__main__":
@@ -77,6 +100,36 @@ if __name__ == "__main__":
         main()
     elif sys.argv[1] == "--test":
         room_simulator.initialize()
-        test_rooms_standalone(TEST_ROOM_DIR)
+        # Optionally test with an idle pruning radius and a macro action
+        # radius, e.g. --test 3 5
+        idle_pruning_radius = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        macro_action_radius = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        test_rooms_standalone(
+            TEST_ROOM_DIR,
+            settings=SolveSettings(
+                idle_pruning_radius=idle_pruning_radius,
+                macro_action_radius=macro_action_radius,
+            ),
+        )
+    elif sys.argv[1] == "--test-parallel":
+        # Solve the test rooms in worker processes, which initialize their
+        # own room simulators. Optionally give the number of processes,
+        # e.g. --test-parallel 4
+        processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+        test_rooms_standalone(TEST_ROOM_DIR, processes=processes)
+    elif sys.argv[1] == "--compare-simulators":
+        room_simulator.initialize()
+        compare_simulators(TEST_ROOM_DIR)
+    elif sys.argv[1] == "--benchmark-search":
+        room_simulator.initialize()
+        benchmark_search(TEST_ROOM_DIR)
+    elif sys.argv[1] == "--benchmark-solve":
+        # Record the stats of solving each test room, to compare before and
+        # after a change, e.g. --benchmark-solve before.jsonl
+        room_simulator.initialize()
+        benchmark_solve(TEST_ROOM_DIR, sys.argv[2])
+    elif sys.argv[1] == "--compare-solve-stats":
+        # e.g. --compare-solve-stats before.jsonl after.jsonl
+        compare_solve_stats(sys.argv[2], sys.argv[3])
     else:
         raise UserError("Weird command line arguments")
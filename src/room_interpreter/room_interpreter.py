@@ -145,8 +145,12 @@ class RoomInterpreter:
             room_image, minimap, skip_coords=tile_contents.keys()
         )
 
-        classified_tiles, difficult_positions = self._classifier.classify_tiles(
-            tiles, minimap_colors, room_style=detected_style
+        # This takes a while, so don't block the event loop
+        classified_tiles, difficult_positions = await asyncio.to_thread(
+            self._classifier.classify_tiles,
+            tiles,
+            minimap_colors,
+            room_style=detected_style,
         )
         tile_contents.update(classified_tiles)
 
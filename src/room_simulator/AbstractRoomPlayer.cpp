@@ -0,0 +1,23 @@
+#include "AbstractRoomPlayer.h"
+#include "RoomPlayer.h"
+#include "FastRoomPlayer.h"
+#include "MultiStartRoomPlayer.h"
+
+// Create a room player for a room. If fastSimulation is set and the room
+// only has elements FastRoomPlayer supports, use that instead of DRODLib.
+// If starts are given, the room player can start from any of them instead
+// of where the player is in the room.
+AbstractRoomPlayer *createRoomPlayer(Room room,
+                                     bool fastSimulation,
+                                     std::vector<std::tuple<Position, Direction>> starts)
+{
+    if (!starts.empty())
+    {
+        return new MultiStartRoomPlayer(room, starts, fastSimulation);
+    }
+    if (fastSimulation && FastRoomPlayer::supportsRoom(room))
+    {
+        return new FastRoomPlayer(room);
+    }
+    return new RoomPlayer(room);
+}
\ No newline at end of file
@@ -0,0 +1,37 @@
+#ifndef DRODBOT_ABSTRACTROOMPLAYER_H
+#define DRODBOT_ABSTRACTROOMPLAYER_H
+
+#include <vector>
+#include "typedefs.h"
+#include "Room.h"
+#include "DerivedRoom.h"
+#include "ActionHistory.h"
+#include "SolveStats.h"
+
+// Something that can take actions in a room. RoomPlayer uses DRODLib and
+// can play any room, while FastRoomPlayer only supports some elements.
+class AbstractRoomPlayer
+{
+public:
+    virtual ~AbstractRoomPlayer(){};
+    virtual std::vector<Action> getPossibleActions() = 0;
+    virtual void setActions(std::vector<Action> newActions) = 0;
+    virtual void setActions(ActionHistory newActions) = 0;
+    virtual bool isPassableInDirection(Position position, Direction fromDirection) = 0;
+    virtual Room getRoom() = 0;
+    virtual Room getBaseRoom() = 0;
+    virtual DerivedRoom getDerivedRoom() = 0;
+    // Room players can have several starting positions, see
+    // MultiStartRoomPlayer. Setting actions with a list of actions uses the
+    // current start, while an ActionHistory knows which start it is from.
+    virtual int getStartCount() { return 1; };
+    virtual void setStart(int start){};
+    // Set stats to count actions and time in, or nullptr to not count
+    virtual void setStats(SolveStats *stats) = 0;
+};
+
+AbstractRoomPlayer *createRoomPlayer(Room room,
+                                     bool fastSimulation = false,
+                                     std::vector<std::tuple<Position, Direction>> starts = {});
+
+#endif // DRODBOT_ABSTRACTROOMPLAYER_H
\ No newline at end of file
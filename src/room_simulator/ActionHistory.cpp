@@ -0,0 +1,112 @@
+#include <algorithm>
+#include <functional>
+#include <stdexcept>
+#include "ActionHistory.h"
+
+// Create an empty history, as the root of a new trie.
+ActionHistory::ActionHistory() : node(std::make_shared<ActionNode>(ActionNode{nullptr, std::nullopt, 0, {}})){};
+
+ActionHistory::ActionHistory(std::shared_ptr<ActionNode> node) : node(node){};
+
+// Get the history with one more action. If it already exists in the trie,
+// the existing node is reused.
+ActionHistory ActionHistory::child(Action action)
+{
+    auto childIterator = this->node->children.find(action);
+    if (childIterator != this->node->children.end())
+    {
+        std::shared_ptr<ActionNode> existingChild = childIterator->second.lock();
+        if (existingChild)
+        {
+            return ActionHistory(existingChild);
+        }
+    }
+    std::shared_ptr<ActionNode> newChild = std::make_shared<ActionNode>(
+        ActionNode{this->node, action, this->node->depth + 1, {}});
+    this->node->children[action] = newChild;
+    return ActionHistory(newChild);
+}
+
+ActionHistory ActionHistory::parent()
+{
+    if (!this->node->parent)
+    {
+        throw std::runtime_error("Empty action history has no parent");
+    }
+    return ActionHistory(this->node->parent);
+}
+
+// Get the empty history at the root of this history's trie
+ActionHistory ActionHistory::root()
+{
+    const std::shared_ptr<ActionNode> *node = &this->node;
+    while ((*node)->parent)
+    {
+        node = &(*node)->parent;
+    }
+    return ActionHistory(*node);
+}
+
+Action ActionHistory::lastAction()
+{
+    if (!this->node->action)
+    {
+        throw std::runtime_error("Empty action history has no last action");
+    }
+    return this->node->action.value();
+}
+
+int ActionHistory::size()
+{
+    return this->node->depth;
+}
+
+std::vector<Action> ActionHistory::getActions()
+{
+    std::vector<Action> actions = {};
+    actions.reserve(this->node->depth);
+    for (ActionNode *current = this->node.get(); current->parent; current = current->parent.get())
+    {
+        actions.push_back(current->action.value());
+    }
+    std::reverse(actions.begin(), actions.end());
+    return actions;
+}
+
+bool ActionHistory::operator==(const ActionHistory other) const
+{
+    return this->node == other.node;
+}
+
+bool ActionHistory::operator<(const ActionHistory other) const
+{
+    return std::less<ActionNode *>()(this->node.get(), other.node.get());
+}
+
+// Find the longest common prefix of two histories. This walks up from the
+// deeper one, so it only visits the nodes that are not shared. If the
+// histories belong to different tries, there is no common prefix.
+std::optional<ActionHistory> ActionHistory::commonPrefix(ActionHistory first, ActionHistory second)
+{
+    // Walk with pointers to the owning pointers, to avoid touching reference counts
+    const std::shared_ptr<ActionNode> *firstNode = &first.node;
+    const std::shared_ptr<ActionNode> *secondNode = &second.node;
+    while ((*firstNode)->depth > (*secondNode)->depth)
+    {
+        firstNode = &(*firstNode)->parent;
+    }
+    while ((*secondNode)->depth > (*firstNode)->depth)
+    {
+        secondNode = &(*secondNode)->parent;
+    }
+    while (*firstNode != *secondNode)
+    {
+        if (!(*firstNode)->parent)
+        {
+            return std::nullopt;
+        }
+        firstNode = &(*firstNode)->parent;
+        secondNode = &(*secondNode)->parent;
+    }
+    return ActionHistory(*firstNode);
+}
@@ -0,0 +1,44 @@
+#ifndef DRODBOT_ACTIONHISTORY_H
+#define DRODBOT_ACTIONHISTORY_H
+
+#include <map>
+#include <memory>
+#include <optional>
+#include <vector>
+#include "typedefs.h"
+
+// A node in a trie of action sequences. Each node owns its parent, so a
+// node keeps its whole prefix alive. Children are only weakly referenced,
+// so they can be found again but are freed when nothing uses them.
+struct ActionNode
+{
+    std::shared_ptr<ActionNode> parent;
+    std::optional<Action> action; // Not set for the root
+    int depth;
+    std::map<Action, std::weak_ptr<ActionNode>> children;
+};
+
+// A sequence of actions, stored as a handle to a node in a shared trie.
+// Copying it is cheap, and sequences with a common prefix share the nodes
+// for that prefix.
+class ActionHistory
+{
+public:
+    ActionHistory();
+    ActionHistory child(Action action);
+    ActionHistory parent();
+    ActionHistory root();
+    Action lastAction();
+    int size();
+    std::vector<Action> getActions();
+    bool operator==(const ActionHistory) const;
+    // Arbitrary but consistent order, to be able to use histories as keys
+    bool operator<(const ActionHistory) const;
+    static std::optional<ActionHistory> commonPrefix(ActionHistory first, ActionHistory second);
+
+private:
+    ActionHistory(std::shared_ptr<ActionNode> node);
+    std::shared_ptr<ActionNode> node;
+};
+
+#endif // DRODBOT_ACTIONHISTORY_H
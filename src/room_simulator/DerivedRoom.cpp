@@ -1,22 +1,121 @@
 #include "DerivedRoom.h"
 
-DerivedRoom::DerivedRoom(std::vector<Action> actions,
+// Helper function to get the Zobrist key of a feature of a room. Instead of
+// a table of random numbers, this hashes the feature with splitmix64, which
+// gives equally well-distributed keys without a table covering every
+// combination of monster index, type, position and direction.
+uint64_t zobristKey(uint64_t feature)
+{
+    uint64_t z = feature + 0x9e3779b97f4a7c15;
+    z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9;
+    z = (z ^ (z >> 27)) * 0x94d049bb133111eb;
+    return z ^ (z >> 31);
+}
+
+// Helper function to identify a tile in a DerivedRoom bitset
+int tileIndex(Position position)
+{
+    return std::get<0>(position) * 32 + std::get<1>(position);
+}
+
+// Kinds of features, used as the top byte of the Zobrist feature
+const uint64_t PLAYER_FEATURE = 1;
+const uint64_t DOOR_FEATURE = 2;
+const uint64_t DEAD_PLAYER_FEATURE = 3;
+const uint64_t MONSTER_FEATURE = 4;
+
+bool PackedMonster::operator==(const PackedMonster other) const
+{
+    return this->type == other.type &&
+           this->x == other.x &&
+           this->y == other.y &&
+           this->direction == other.direction;
+}
+
+bool PackedMonster::operator<(const PackedMonster other) const
+{
+    return std::tuple(this->type, this->x, this->y, this->direction) <
+           std::tuple(other.type, other.x, other.y, other.direction);
+}
+
+DerivedRoom::DerivedRoom(ActionHistory actions,
                          std::tuple<Position, Direction> player,
                          std::set<Position> toggledDoors,
                          bool deadPlayer,
                          bool playerLeftRoom,
                          Monsters monsters) : actions(actions),
+                                              hash(0),
                                               player(player),
-                                              toggledDoors(toggledDoors),
+                                              toggledDoors(),
                                               deadPlayer(deadPlayer),
                                               playerLeftRoom(playerLeftRoom),
-                                              monsters(monsters){};
+                                              monsters()
+{
+    auto [playerX, playerY] = std::get<0>(player);
+    uint64_t playerDirection = (uint64_t)std::get<1>(player);
+    this->hash ^= zobristKey(PLAYER_FEATURE << 56 | playerX << 16 | playerY << 8 | playerDirection);
+    for (auto it = toggledDoors.begin(); it != toggledDoors.end(); ++it)
+    {
+        int index = tileIndex(*it);
+        this->toggledDoors.set(index);
+        this->hash ^= zobristKey(DOOR_FEATURE << 56 | index);
+    }
+    if (deadPlayer)
+    {
+        this->hash ^= zobristKey(DEAD_PLAYER_FEATURE << 56);
+    }
+    this->monsters.reserve(monsters.size());
+    for (uint64_t i = 0; i < monsters.size(); ++i)
+    {
+        auto [type, position, direction] = monsters[i];
+        PackedMonster monster = {(uint8_t)type,
+                                 (uint8_t)std::get<0>(position),
+                                 (uint8_t)std::get<1>(position),
+                                 (uint8_t)direction};
+        this->monsters.push_back(monster);
+        // The index is part of the key, since turn order matters
+        this->hash ^= zobristKey(MONSTER_FEATURE << 56 | i << 32 | (uint64_t)monster.type << 24 |
+                                 monster.x << 16 | monster.y << 8 | monster.direction);
+    }
+};
 
 std::vector<Action> DerivedRoom::getActions()
+{
+    return this->actions.getActions();
+}
+
+ActionHistory DerivedRoom::getActionHistory()
 {
     return this->actions;
 }
 
+std::set<Position> DerivedRoom::getToggledDoors()
+{
+    std::set<Position> doors = {};
+    if (this->toggledDoors.none())
+    {
+        return doors;
+    }
+    for (int index = 0; index < 38 * 32; ++index)
+    {
+        if (this->toggledDoors.test(index))
+        {
+            doors.insert({index / 32, index % 32});
+        }
+    }
+    return doors;
+}
+
+std::bitset<38 * 32> DerivedRoom::getToggledDoorBits()
+{
+    return this->toggledDoors;
+}
+
+bool DerivedRoom::doorIsToggled(Position position)
+{
+    return this->toggledDoors.test(tileIndex(position));
+}
+
 std::tuple<Position, Direction> DerivedRoom::findPlayer()
 {
     return this->player;
@@ -38,15 +137,16 @@ std::vector<Position> DerivedRoom::findMonsterCoordinates(std::optional<ElementT
     std::vector<Position> monsterCoords = {};
     for (auto it = this->monsters.begin(); it != this->monsters.end(); ++it)
     {
-        if (monsterType && monsterType.value() != std::get<0>(*it))
+        Position position = {it->x, it->y};
+        if (monsterType && (uint8_t)monsterType.value() != it->type)
         {
             continue;
         }
-        if (area && !area.value().contains(std::get<1>(*it)))
+        if (area && !area.value().contains(position))
         {
             continue;
         }
-        monsterCoords.push_back(std::get<1>(*it));
+        monsterCoords.push_back(position);
     }
     return monsterCoords;
 }
@@ -61,11 +161,11 @@ int DerivedRoom::monsterCount(std::optional<ElementType> monsterType,
     int monsterCount = 0;
     for (auto it = this->monsters.begin(); it != this->monsters.end(); ++it)
     {
-        if (monsterType && monsterType.value() != std::get<0>(*it))
+        if (monsterType && (uint8_t)monsterType.value() != it->type)
         {
             continue;
         }
-        if (area && !area.value().contains(std::get<1>(*it)))
+        if (area && !area.value().contains({it->x, it->y}))
         {
             continue;
         }
@@ -79,10 +179,16 @@ bool DerivedRoom::isConquered()
     return this->monsterCount() == 0;
 }
 
+uint64_t DerivedRoom::getHash() const
+{
+    return this->hash;
+}
+
 bool DerivedRoom::operator==(const DerivedRoom otherRoom) const
 {
     // TODO: Turn numbers
-    return otherRoom.player == this->player &&
+    return otherRoom.hash == this->hash &&
+           otherRoom.player == this->player &&
            otherRoom.toggledDoors == this->toggledDoors &&
            otherRoom.deadPlayer == this->deadPlayer &&
            otherRoom.monsters == this->monsters;
@@ -91,6 +197,11 @@ bool DerivedRoom::operator==(const DerivedRoom otherRoom) const
 bool DerivedRoom::operator<(const DerivedRoom otherRoom) const
 {
     // TODO: Turn numbers
+    // The hash decides almost all comparisons, so the rest is rarely needed
+    if (otherRoom.hash != this->hash)
+    {
+        return otherRoom.hash < this->hash;
+    }
     if (otherRoom.player != this->player)
     {
         return otherRoom.player < this->player;
@@ -101,7 +212,14 @@ bool DerivedRoom::operator<(const DerivedRoom otherRoom) const
     }
     if (otherRoom.toggledDoors != this->toggledDoors)
     {
-        return otherRoom.toggledDoors < this->toggledDoors;
+        // bitset has no ordering, so compare the first differing bit
+        std::bitset<38 * 32> difference = otherRoom.toggledDoors ^ this->toggledDoors;
+        int index = 0;
+        while (!difference.test(index))
+        {
+            ++index;
+        }
+        return otherRoom.toggledDoors.test(index) < this->toggledDoors.test(index);
     }
     if (otherRoom.monsters != this->monsters)
     {
@@ -4,25 +4,43 @@
 #include <vector>
 #include <set>
 #include <map>
+#include <bitset>
+#include <cstdint>
 #include "typedefs.h"
 #include "Room.h"
+#include "ActionHistory.h"
 
 typedef std::vector<std::tuple<ElementType, Position, Direction>> Monsters;
 
+// A monster stored in DerivedRoom, with one byte per field
+struct PackedMonster
+{
+    uint8_t type;
+    uint8_t x;
+    uint8_t y;
+    uint8_t direction;
+    bool operator==(const PackedMonster) const;
+    bool operator<(const PackedMonster) const;
+};
+
 // This class only makes sense in the context of one RoomPlayer.
 // Comparing instances of DerivedRoom originating from RoomPlayers
 // playing different rooms will produce nonsensical results.
 class DerivedRoom
 {
 public:
-    DerivedRoom(std::vector<Action> actions,
+    DerivedRoom(ActionHistory actions,
                 std::tuple<Position, Direction> player,
                 std::set<Position> toggledDoors,
                 bool deadPlayer,
                 bool playerLeftRoom,
                 Monsters monsters);
     std::vector<Action> getActions();
+    ActionHistory getActionHistory();
     std::tuple<Position, Direction> findPlayer();
+    std::set<Position> getToggledDoors();
+    std::bitset<38 * 32> getToggledDoorBits();
+    bool doorIsToggled(Position position);
     bool playerIsDead();
     bool playerHasLeft();
     std::vector<Position> findMonsterCoordinates(std::optional<ElementType> monsterType = std::nullopt,
@@ -30,17 +48,22 @@ public:
     int monsterCount(std::optional<ElementType> monsterType = std::nullopt,
                      std::optional<std::set<Position>> area = std::nullopt);
     bool isConquered();
+    uint64_t getHash() const;
     bool operator==(const DerivedRoom) const;
     bool operator<(const DerivedRoom) const;
 
 private:
-    std::vector<Action> actions;
+    ActionHistory actions;
+    // XOR of the Zobrist keys of everything below that is compared for
+    // equality. It's computed once when the room is created, so hashing and
+    // comparing rooms in the search doesn't need to look at the monsters.
+    uint64_t hash;
     // Things that may differentiate this room from the base:
     std::tuple<Position, Direction> player; // Player position and direction
-    std::set<Position> toggledDoors;        // Doors that are not the same as in the base room
+    std::bitset<38 * 32> toggledDoors;      // Doors that are not the same as in the base room, indexed by x * 32 + y
     bool deadPlayer;
     bool playerLeftRoom;
-    Monsters monsters;
+    std::vector<PackedMonster> monsters; // In turn order
     // Also the number of actions taken
 };
 
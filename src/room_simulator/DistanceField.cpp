@@ -0,0 +1,82 @@
+#include <array>
+#include <deque>
+#include <set>
+#include <algorithm>
+#include "typedefs.h"
+#include "Room.h"
+#include "DistanceField.h"
+#include "utils.h"
+
+// Do a breadth-first search backwards from the goals, so each tile gets
+// the distance to its nearest goal.
+DistanceField::DistanceField(Room room, std::set<Position> goals)
+{
+    for (auto column = this->distances.begin(); column != this->distances.end(); ++column)
+    {
+        column->fill(UNREACHABLE);
+    }
+    std::deque<Position> queue = {};
+    for (auto it = goals.begin(); it != goals.end(); ++it)
+    {
+        int x = std::get<0>(*it);
+        int y = std::get<1>(*it);
+        if (x >= 0 && x < 38 && y >= 0 && y < 32)
+        {
+            this->distances[x][y] = 0;
+            queue.push_back(*it);
+        }
+    }
+    std::array<Direction, 8> directions = {Direction::N,
+                                           Direction::NE,
+                                           Direction::E,
+                                           Direction::SE,
+                                           Direction::S,
+                                           Direction::SW,
+                                           Direction::W,
+                                           Direction::NW};
+    while (!queue.empty())
+    {
+        Position position = queue.front();
+        queue.pop_front();
+        int distance = std::min(this->distances[std::get<0>(position)][std::get<1>(position)] + 1,
+                                UNREACHABLE - 1);
+        for (auto it = directions.begin(); it != directions.end(); ++it)
+        {
+            // Check whether we can move here from the tile in the opposite direction
+            Position from = positionInDirection(position, oppositeDirection(*it));
+            int x = std::get<0>(from);
+            int y = std::get<1>(from);
+            if (!room.isPassable(x, y) || this->distances[x][y] != UNREACHABLE)
+            {
+                continue;
+            }
+            // Cannot move from a stair
+            if (room.getTile(from).roomPiece.type == ElementType::STAIRS)
+            {
+                continue;
+            }
+            if (room.isPassableInDirection(position, *it))
+            {
+                this->distances[x][y] = distance;
+                queue.push_back(from);
+            }
+        }
+    }
+}
+
+// Get the distance to the nearest goal, or UNREACHABLE.
+int DistanceField::getDistance(Position position)
+{
+    int x = std::get<0>(position);
+    int y = std::get<1>(position);
+    if (x < 0 || x >= 38 || y < 0 || y >= 32)
+    {
+        return UNREACHABLE;
+    }
+    return this->distances[x][y];
+}
+
+bool DistanceField::isReachable(Position position)
+{
+    return this->getDistance(position) != UNREACHABLE;
+}
\ No newline at end of file
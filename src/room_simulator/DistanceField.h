@@ -0,0 +1,25 @@
+#ifndef DRODBOT_DISTANCEFIELD_H
+#define DRODBOT_DISTANCEFIELD_H
+
+#include <array>
+#include <set>
+#include <cstdint>
+#include "typedefs.h"
+#include "Room.h"
+
+// The number of moves from each tile in a room to the nearest of some goal
+// tiles. This takes walls, doors, orbs and force arrows into account, but
+// not monsters. Distances are capped at 254, to fit in a byte.
+class DistanceField
+{
+public:
+    DistanceField(Room room, std::set<Position> goals);
+    int getDistance(Position position);
+    bool isReachable(Position position);
+    static const int UNREACHABLE = 255;
+
+private:
+    std::array<std::array<uint8_t, 32>, 38> distances;
+};
+
+#endif // DRODBOT_DISTANCEFIELD_H
\ No newline at end of file
@@ -0,0 +1,631 @@
+#include <vector>
+#include <set>
+#include <map>
+#include <tuple>
+#include <stdexcept>
+#include "FastRoomPlayer.h"
+#include "utils.h"
+
+// Helper function to get the sign of an int, as -1, 0 or 1.
+int signOf(int value)
+{
+    return (value > 0) - (value < 0);
+}
+
+// Helper function to get the direction of a movement offset.
+Direction offsetDirection(int dx, int dy)
+{
+    std::vector<Direction> directions = {Direction::N, Direction::NE, Direction::E, Direction::SE,
+                                         Direction::S, Direction::SW, Direction::W, Direction::NW};
+    for (auto it = directions.begin(); it != directions.end(); ++it)
+    {
+        if (positionInDirection({0, 0}, *it) == Position(dx, dy))
+        {
+            return *it;
+        }
+    }
+    return Direction::NONE;
+}
+
+// Helper function to check whether a force arrow allows moving in a
+// direction, either onto or off the tile it is on.
+bool forceArrowAllows(Direction arrow, Direction moveDirection)
+{
+    Direction opposite = oppositeDirection(moveDirection);
+    return arrow == Direction::NONE ||
+           !(arrow == opposite ||
+             arrow == clockwiseDirection(opposite) ||
+             arrow == counterClockwiseDirection(opposite));
+}
+
+// Helper function to check whether a position is inside the room.
+bool isInRoom(Position position)
+{
+    int x = std::get<0>(position);
+    int y = std::get<1>(position);
+    return x >= 0 && x < 38 && y >= 0 && y < 32;
+}
+
+// The roach queen lays eggs when the turn number is a multiple of this
+const int EGG_INTERVAL = 30;
+// The number of turns until a roach egg hatches
+const int EGG_HATCH_TURNS = 4;
+
+FastRoomPlayer::FastRoomPlayer(Room room) : baseRoom(room),
+                                            orbs({}),
+                                            states({}),
+                                            emptyActions(ActionHistory()),
+                                            actions(emptyActions),
+                                            stats(nullptr)
+{
+    if (!FastRoomPlayer::supportsRoom(room))
+    {
+        throw std::invalid_argument("Room has elements FastRoomPlayer doesn't support");
+    }
+    FastRoomState state = {{0, 0}, Direction::NONE, false, false, 0, {}, false, {}};
+    std::map<int, FastMonster> monsters = {};
+    for (int x = 0; x < 38; x += 1)
+    {
+        for (int y = 0; y < 32; y += 1)
+        {
+            Tile tile = room.getTile({x, y});
+            this->roomPieces[x][y] = tile.roomPiece.type;
+            this->items[x][y] = tile.item.type;
+            this->forceArrows[x][y] = tile.floorControl.type == ElementType::FORCE_ARROW
+                                          ? tile.floorControl.direction
+                                          : Direction::NONE;
+            if (tile.item.type == ElementType::ORB)
+            {
+                this->orbs[{x, y}] = {};
+                OrbEffects effects = tile.item.orbEffects;
+                for (auto it = effects.begin(); it != effects.end(); ++it)
+                {
+                    std::set<Position> doorTiles = floodFill({std::get<0>(*it), std::get<1>(*it)}, room);
+                    this->orbs[{x, y}].push_back({doorTiles, std::get<2>(*it)});
+                }
+            }
+            if (tile.monster.type == ElementType::BEETHRO)
+            {
+                state.playerPosition = {x, y};
+                state.playerDirection = tile.monster.direction;
+            }
+            else if (tile.monster.type != ElementType::NOTHING)
+            {
+                monsters[tile.monster.turnOrder.value()] = {tile.monster.type, {x, y}, tile.monster.direction, 0};
+            }
+        }
+    }
+    for (auto it = monsters.begin(); it != monsters.end(); ++it)
+    {
+        state.monsters.push_back(it->second);
+    }
+    this->states.push_back(state);
+};
+
+// Check whether a room only has elements FastRoomPlayer supports
+bool FastRoomPlayer::supportsRoom(Room room)
+{
+    bool hasMonsters = false;
+    bool hasClosedGreenDoors = false;
+    for (int x = 0; x < 38; x += 1)
+    {
+        for (int y = 0; y < 32; y += 1)
+        {
+            Tile tile = room.getTile({x, y});
+            switch (tile.roomPiece.type)
+            {
+            case ElementType::FLOOR:
+            case ElementType::WALL:
+            case ElementType::MASTER_WALL:
+            case ElementType::PIT:
+            case ElementType::STAIRS:
+            case ElementType::YELLOW_DOOR:
+            case ElementType::YELLOW_DOOR_OPEN:
+            case ElementType::GREEN_DOOR_OPEN:
+            case ElementType::BLUE_DOOR:
+            case ElementType::BLUE_DOOR_OPEN:
+                break;
+            case ElementType::GREEN_DOOR:
+                hasClosedGreenDoors = true;
+                break;
+            default:
+                return false;
+            }
+            switch (tile.item.type)
+            {
+            case ElementType::NOTHING:
+            case ElementType::ORB:
+            case ElementType::OBSTACLE:
+                break;
+            default:
+                return false;
+            }
+            switch (tile.monster.type)
+            {
+            case ElementType::NOTHING:
+            case ElementType::BEETHRO:
+                break;
+            case ElementType::ROACH:
+            case ElementType::ROACH_QUEEN:
+            case ElementType::EVIL_EYE:
+            case ElementType::EVIL_EYE_AWAKE:
+                hasMonsters = true;
+                break;
+            default:
+                return false;
+            }
+        }
+    }
+    // We don't know exactly when DRODLib opens green doors in a room that
+    // starts without monsters
+    return hasMonsters || !hasClosedGreenDoors;
+}
+
+std::vector<Action> FastRoomPlayer::getPossibleActions()
+{
+    FastRoomState &state = this->states.back();
+    if (state.deadPlayer || state.playerLeftRoom)
+    {
+        return {};
+    }
+    std::vector<std::pair<Action, Direction>> movementActions = {
+        {Action::N, Direction::N},
+        {Action::NE, Direction::NE},
+        {Action::E, Direction::E},
+        {Action::SE, Direction::SE},
+        {Action::S, Direction::S},
+        {Action::SW, Direction::SW},
+        {Action::W, Direction::W},
+        {Action::NW, Direction::NW},
+    };
+    std::vector<Action> actions = {Action::WAIT, Action::CW, Action::CCW};
+    // Don't add movement actions that will bump into things, they are equivalent to waiting.
+    for (auto it = movementActions.begin(); it != movementActions.end(); ++it)
+    {
+        Direction direction = (*it).second;
+        if (this->isPassableInDirection(positionInDirection(state.playerPosition, direction), direction))
+        {
+            actions.push_back((*it).first);
+        }
+    }
+    return actions;
+}
+
+// Set the actions performed from the base room
+void FastRoomPlayer::setActions(std::vector<Action> newActions)
+{
+    ActionHistory history = this->emptyActions;
+    for (auto it = newActions.begin(); it != newActions.end(); ++it)
+    {
+        history = history.child(*it);
+    }
+    this->setActions(history);
+}
+
+// Set the actions performed from the base room. The states after all
+// current actions are kept, so we only need to drop the ones after the
+// common prefix and play the rest.
+void FastRoomPlayer::setActions(ActionHistory newActions)
+{
+    std::optional<ActionHistory> commonPrefix = ActionHistory::commonPrefix(this->actions, newActions);
+    if (!commonPrefix)
+    {
+        // The history is from another trie, so look it up in ours instead
+        this->setActions(newActions.getActions());
+        return;
+    }
+    this->states.resize(commonPrefix.value().size() + 1);
+    this->actions = commonPrefix.value();
+    std::vector<Action> actionsToPerform = {};
+    for (ActionHistory history = newActions; !(history == commonPrefix.value()); history = history.parent())
+    {
+        actionsToPerform.push_back(history.lastAction());
+    }
+    if (this->stats)
+    {
+        this->stats->performedActions += actionsToPerform.size();
+        if (actionsToPerform.size() > 1)
+        {
+            this->stats->replayedActions += actionsToPerform.size() - 1;
+        }
+    }
+    for (auto it = actionsToPerform.rbegin(); it != actionsToPerform.rend(); ++it)
+    {
+        this->performAction(*it);
+    }
+}
+
+// Check whether the player can move to a position
+bool FastRoomPlayer::isPassableInDirection(Position position, Direction moveDirection)
+{
+    return this->playerCanMoveTo(this->states.back(), position, moveDirection);
+}
+
+bool FastRoomPlayer::playerCanMoveTo(FastRoomState &state, Position position, Direction moveDirection)
+{
+    if (!isInRoom(position) || this->isWall(state, position) || this->monsterAt(state, position) != -1)
+    {
+        return false;
+    }
+    int x = std::get<0>(position);
+    int y = std::get<1>(position);
+    if (this->items[x][y] == ElementType::ORB || this->items[x][y] == ElementType::OBSTACLE)
+    {
+        return false;
+    }
+    Position from = positionInDirection(position, oppositeDirection(moveDirection));
+    return forceArrowAllows(this->forceArrows[x][y], moveDirection) &&
+           (!isInRoom(from) ||
+            forceArrowAllows(this->forceArrows[std::get<0>(from)][std::get<1>(from)], moveDirection));
+}
+
+Room FastRoomPlayer::getRoom()
+{
+    FastRoomState &state = this->states.back();
+    Room room = this->baseRoom.copy();
+    for (int x = 0; x < 38; x += 1)
+    {
+        for (int y = 0; y < 32; y += 1)
+        {
+            Tile tile = room.getTile({x, y});
+            tile.roomPiece = Element(this->roomPieceAt(state, {x, y}));
+            tile.monster = Element();
+            room.setTile({x, y}, tile);
+        }
+    }
+    Tile playerTile = room.getTile(state.playerPosition);
+    playerTile.monster = Element(ElementType::BEETHRO, state.playerDirection);
+    room.setTile(state.playerPosition, playerTile);
+    for (unsigned int i = 0; i < state.monsters.size(); i += 1)
+    {
+        FastMonster monster = state.monsters[i];
+        Tile tile = room.getTile(monster.position);
+        tile.monster = Element(monster.type, monster.direction, {}, i);
+        room.setTile(monster.position, tile);
+    }
+    return room;
+}
+
+// Get the room as it was before any actions were performed.
+Room FastRoomPlayer::getBaseRoom()
+{
+    return this->baseRoom;
+}
+
+DerivedRoom FastRoomPlayer::getDerivedRoom()
+{
+    std::chrono::steady_clock::time_point start = std::chrono::steady_clock::now();
+    FastRoomState &state = this->states.back();
+    Monsters monsters = {};
+    for (auto it = state.monsters.begin(); it != state.monsters.end(); ++it)
+    {
+        monsters.push_back({it->type, it->position, it->direction});
+    }
+    DerivedRoom room = DerivedRoom(this->actions,
+                                   {state.playerPosition, state.playerDirection},
+                                   state.toggledDoors,
+                                   state.deadPlayer,
+                                   state.playerLeftRoom,
+                                   monsters);
+    if (this->stats)
+    {
+        this->stats->derivedRoomCalls += 1;
+        this->stats->derivedRoomTime += secondsSince(start);
+    }
+    return room;
+}
+
+void FastRoomPlayer::setStats(SolveStats *stats)
+{
+    this->stats = stats;
+}
+
+// Perform an action in the room. The player acts first, then the monsters
+// in turn order.
+void FastRoomPlayer::performAction(Action action)
+{
+    FastRoomState state = this->states.back();
+    this->actions = this->actions.child(action);
+    if (state.deadPlayer || state.playerLeftRoom)
+    {
+        this->states.push_back(state);
+        return;
+    }
+    Position oldSwordPosition = this->swordPosition(state);
+    switch (action)
+    {
+    case Action::CW:
+        state.playerDirection = clockwiseDirection(state.playerDirection);
+        break;
+    case Action::CCW:
+        state.playerDirection = counterClockwiseDirection(state.playerDirection);
+        break;
+    case Action::WAIT:
+        break;
+    default:
+    {
+        Position target = movePosition(state.playerPosition, action);
+        Direction direction = offsetDirection(std::get<0>(target) - std::get<0>(state.playerPosition),
+                                                  std::get<1>(target) - std::get<1>(state.playerPosition));
+        if (this->playerCanMoveTo(state, target, direction))
+        {
+            state.playerPosition = target;
+        }
+    }
+    }
+    // Stab whatever the sword moved onto
+    Position newSwordPosition = this->swordPosition(state);
+    if (newSwordPosition != oldSwordPosition && isInRoom(newSwordPosition))
+    {
+        int stabbedMonster = this->monsterAt(state, newSwordPosition);
+        if (stabbedMonster != -1)
+        {
+            state.monsters.erase(state.monsters.begin() + stabbedMonster);
+        }
+        if (this->items[std::get<0>(newSwordPosition)][std::get<1>(newSwordPosition)] == ElementType::ORB)
+        {
+            this->strikeOrb(state, newSwordPosition);
+        }
+    }
+    if (this->roomPieceAt(state, state.playerPosition) == ElementType::STAIRS)
+    {
+        state.playerLeftRoom = true;
+        this->states.push_back(state);
+        return;
+    }
+    state.turn += 1;
+    this->processMonsters(state);
+    if (state.monsters.empty())
+    {
+        state.greenDoorsOpen = true;
+    }
+    this->states.push_back(state);
+}
+
+// Open, close or toggle the doors affected by an orb
+void FastRoomPlayer::strikeOrb(FastRoomState &state, Position position)
+{
+    std::vector<std::tuple<std::set<Position>, OrbEffect>> effects = this->orbs.at(position);
+    for (auto it = effects.begin(); it != effects.end(); ++it)
+    {
+        std::set<Position> doorTiles = std::get<0>(*it);
+        OrbEffect effect = std::get<1>(*it);
+        for (auto doorIt = doorTiles.begin(); doorIt != doorTiles.end(); ++doorIt)
+        {
+            ElementType baseType = this->roomPieces[std::get<0>(*doorIt)][std::get<1>(*doorIt)];
+            if (baseType != ElementType::YELLOW_DOOR && baseType != ElementType::YELLOW_DOOR_OPEN)
+            {
+                continue;
+            }
+            bool openInBase = baseType == ElementType::YELLOW_DOOR_OPEN;
+            bool open = openInBase != state.toggledDoors.contains(*doorIt);
+            switch (effect)
+            {
+            case OrbEffect::OPEN:
+                open = true;
+                break;
+            case OrbEffect::CLOSE:
+                open = false;
+                break;
+            case OrbEffect::TOGGLE:
+                open = !open;
+                break;
+            default:
+                break;
+            }
+            if (open == openInBase)
+            {
+                state.toggledDoors.erase(*doorIt);
+            }
+            else
+            {
+                state.toggledDoors.insert(*doorIt);
+            }
+        }
+    }
+}
+
+// Let each monster act. Monsters added during the turn don't act until the
+// next turn.
+void FastRoomPlayer::processMonsters(FastRoomState &state)
+{
+    unsigned int monstersToProcess = state.monsters.size();
+    unsigned int i = 0;
+    while (i < monstersToProcess && !state.deadPlayer)
+    {
+        FastMonster &monster = state.monsters[i];
+        int dxToPlayer = signOf(std::get<0>(state.playerPosition) - std::get<0>(monster.position));
+        int dyToPlayer = signOf(std::get<1>(state.playerPosition) - std::get<1>(monster.position));
+        switch (monster.type)
+        {
+        case ElementType::ROACH:
+        case ElementType::EVIL_EYE_AWAKE:
+            this->moveMonster(state, monster, dxToPlayer, dyToPlayer);
+            break;
+        case ElementType::EVIL_EYE:
+            if (this->evilEyeSeesPlayer(state, monster))
+            {
+                monster.type = ElementType::EVIL_EYE_AWAKE;
+            }
+            break;
+        case ElementType::ROACH_QUEEN:
+        {
+            if (state.turn % EGG_INTERVAL == 0)
+            {
+                Position queenPosition = monster.position;
+                for (int dy = -1; dy <= 1; dy += 1)
+                {
+                    for (int dx = -1; dx <= 1; dx += 1)
+                    {
+                        Position eggPosition = {std::get<0>(queenPosition) + dx, std::get<1>(queenPosition) + dy};
+                        if (isInRoom(eggPosition) &&
+                            this->roomPieceAt(state, eggPosition) == ElementType::FLOOR &&
+                            this->items[std::get<0>(eggPosition)][std::get<1>(eggPosition)] == ElementType::NOTHING &&
+                            this->monsterAt(state, eggPosition) == -1 &&
+                            eggPosition != state.playerPosition &&
+                            eggPosition != this->swordPosition(state))
+                        {
+                            state.monsters.push_back({ElementType::ROACH_EGG, eggPosition, Direction::NONE, EGG_HATCH_TURNS});
+                        }
+                    }
+                }
+            }
+            // Pushing eggs may have moved the monsters
+            FastMonster &queen = state.monsters[i];
+            this->moveMonster(state, queen, -dxToPlayer, -dyToPlayer);
+            break;
+        }
+        case ElementType::ROACH_EGG:
+            monster.hatchCounter -= 1;
+            if (monster.hatchCounter <= 0)
+            {
+                // The hatched roach is added last, and doesn't act this turn
+                Position eggPosition = monster.position;
+                state.monsters.erase(state.monsters.begin() + i);
+                state.monsters.push_back({ElementType::ROACH, eggPosition, Direction::S, 0});
+                monstersToProcess -= 1;
+                continue;
+            }
+            break;
+        default:
+            throw std::invalid_argument("Unsupported monster type");
+        }
+        i += 1;
+    }
+}
+
+// Move a monster toward (dxFirst, dyFirst), or horizontally or vertically if
+// that's blocked. The monster turns toward (dxFirst, dyFirst) regardless, and
+// kills the player if it moves onto them.
+void FastRoomPlayer::moveMonster(FastRoomState &state, FastMonster &monster, int dxFirst, int dyFirst)
+{
+    if (dxFirst == 0 && dyFirst == 0)
+    {
+        return;
+    }
+    int x = std::get<0>(monster.position);
+    int y = std::get<1>(monster.position);
+    std::vector<std::tuple<int, int>> candidates = {{dxFirst, dyFirst}};
+    if (dxFirst != 0 && dyFirst != 0)
+    {
+        candidates.push_back({dxFirst, 0});
+        candidates.push_back({0, dyFirst});
+    }
+    for (auto it = candidates.begin(); it != candidates.end(); ++it)
+    {
+        Position target = {x + std::get<0>(*it), y + std::get<1>(*it)};
+        if (!this->isMonsterObstacle(state, monster.position, target))
+        {
+            monster.position = target;
+            if (target == state.playerPosition)
+            {
+                state.deadPlayer = true;
+            }
+            break;
+        }
+    }
+    monster.direction = offsetDirection(dxFirst, dyFirst);
+}
+
+// Check whether a monster can't move from one tile to an adjacent one. The
+// player is not an obstacle, since moving there kills them.
+bool FastRoomPlayer::isMonsterObstacle(FastRoomState &state, Position from, Position to)
+{
+    if (!isInRoom(to))
+    {
+        return true;
+    }
+    if (to == state.playerPosition)
+    {
+        return false;
+    }
+    int x = std::get<0>(to);
+    int y = std::get<1>(to);
+    if (this->isWall(state, to) ||
+        this->roomPieceAt(state, to) == ElementType::STAIRS ||
+        this->items[x][y] == ElementType::ORB ||
+        this->items[x][y] == ElementType::OBSTACLE ||
+        this->monsterAt(state, to) != -1 ||
+        to == this->swordPosition(state))
+    {
+        return true;
+    }
+    Direction moveDirection = offsetDirection(x - std::get<0>(from), y - std::get<1>(from));
+    return !forceArrowAllows(this->forceArrows[x][y], moveDirection) ||
+           !forceArrowAllows(this->forceArrows[std::get<0>(from)][std::get<1>(from)], moveDirection);
+}
+
+// Check whether a sleeping evil eye sees the player, looking straight ahead
+// until something blocks the view
+bool FastRoomPlayer::evilEyeSeesPlayer(FastRoomState &state, FastMonster &monster)
+{
+    Position position = positionInDirection(monster.position, monster.direction);
+    while (isInRoom(position))
+    {
+        if (position == state.playerPosition)
+        {
+            return true;
+        }
+        int x = std::get<0>(position);
+        int y = std::get<1>(position);
+        if ((this->isWall(state, position) && this->roomPieceAt(state, position) != ElementType::PIT) ||
+            this->items[x][y] == ElementType::ORB ||
+            this->items[x][y] == ElementType::OBSTACLE ||
+            this->monsterAt(state, position) != -1)
+        {
+            return false;
+        }
+        position = positionInDirection(position, monster.direction);
+    }
+    return false;
+}
+
+// Whether the room piece at a position blocks movement
+bool FastRoomPlayer::isWall(FastRoomState &state, Position position)
+{
+    switch (this->roomPieceAt(state, position))
+    {
+    case ElementType::WALL:
+    case ElementType::MASTER_WALL:
+    case ElementType::PIT:
+    case ElementType::YELLOW_DOOR:
+    case ElementType::GREEN_DOOR:
+    case ElementType::BLUE_DOOR:
+        return true;
+    default:
+        return false;
+    }
+}
+
+// The room piece at a position, with doors opened and closed
+ElementType FastRoomPlayer::roomPieceAt(FastRoomState &state, Position position)
+{
+    ElementType roomPiece = this->roomPieces[std::get<0>(position)][std::get<1>(position)];
+    if (state.toggledDoors.contains(position))
+    {
+        return roomPiece == ElementType::YELLOW_DOOR ? ElementType::YELLOW_DOOR_OPEN : ElementType::YELLOW_DOOR;
+    }
+    if (roomPiece == ElementType::GREEN_DOOR && state.greenDoorsOpen)
+    {
+        return ElementType::GREEN_DOOR_OPEN;
+    }
+    return roomPiece;
+}
+
+// The index of the monster at a position, or -1 if there is none
+int FastRoomPlayer::monsterAt(FastRoomState &state, Position position)
+{
+    for (unsigned int i = 0; i < state.monsters.size(); i += 1)
+    {
+        if (state.monsters[i].position == position)
+        {
+            return i;
+        }
+    }
+    return -1;
+}
+
+Position FastRoomPlayer::swordPosition(FastRoomState &state)
+{
+    return positionInDirection(state.playerPosition, state.playerDirection);
+}
\ No newline at end of file
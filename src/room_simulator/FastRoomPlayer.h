@@ -0,0 +1,86 @@
+#ifndef DRODBOT_FASTROOMPLAYER_H
+#define DRODBOT_FASTROOMPLAYER_H
+
+#include <array>
+#include <vector>
+#include <set>
+#include <map>
+#include <tuple>
+#include <cstdint>
+#include "typedefs.h"
+#include "Room.h"
+#include "DerivedRoom.h"
+#include "ActionHistory.h"
+#include "AbstractRoomPlayer.h"
+
+// A monster in FastRoomPlayer. For roach eggs, direction is NONE and
+// hatchCounter is the number of turns left until it hatches.
+struct FastMonster
+{
+    ElementType type;
+    Position position;
+    Direction direction;
+    int hatchCounter;
+};
+
+// Everything that can change when playing a room in FastRoomPlayer
+struct FastRoomState
+{
+    Position playerPosition;
+    Direction playerDirection;
+    bool deadPlayer;
+    bool playerLeftRoom;
+    int turn;
+    std::set<Position> toggledDoors;
+    bool greenDoorsOpen;
+    // In turn order
+    std::vector<FastMonster> monsters;
+};
+
+// This plays a room without DRODLib, for rooms that only have roaches, roach
+// queens and evil eyes, and a limited set of other elements. It should give
+// the same results as RoomPlayer, but that hasn't been checked yet. Run
+// compare_simulators() in the room tester before relying on it, which is why
+// it's only used when fast simulation is asked for.
+class FastRoomPlayer final : public AbstractRoomPlayer
+{
+public:
+    FastRoomPlayer(Room room);
+    static bool supportsRoom(Room room);
+    std::vector<Action> getPossibleActions();
+    void setActions(std::vector<Action> newActions);
+    void setActions(ActionHistory newActions);
+    bool isPassableInDirection(Position position, Direction moveDirection);
+    Room getRoom();
+    Room getBaseRoom();
+    DerivedRoom getDerivedRoom();
+    void setStats(SolveStats *stats);
+
+private:
+    void performAction(Action action);
+    bool playerCanMoveTo(FastRoomState &state, Position position, Direction moveDirection);
+    void strikeOrb(FastRoomState &state, Position position);
+    void processMonsters(FastRoomState &state);
+    void moveMonster(FastRoomState &state, FastMonster &monster, int dxFirst, int dyFirst);
+    bool isMonsterObstacle(FastRoomState &state, Position from, Position to);
+    bool evilEyeSeesPlayer(FastRoomState &state, FastMonster &monster);
+    bool isWall(FastRoomState &state, Position position);
+    ElementType roomPieceAt(FastRoomState &state, Position position);
+    int monsterAt(FastRoomState &state, Position position);
+    Position swordPosition(FastRoomState &state);
+
+    Room baseRoom;
+    // The static layers of the room, packed for quick lookups
+    std::array<std::array<ElementType, 32>, 38> roomPieces;
+    std::array<std::array<ElementType, 32>, 38> items;
+    std::array<std::array<Direction, 32>, 38> forceArrows;
+    std::map<Position, std::vector<std::tuple<std::set<Position>, OrbEffect>>> orbs;
+    // The states after each action in the current history, starting with
+    // the base room
+    std::vector<FastRoomState> states;
+    ActionHistory emptyActions;
+    ActionHistory actions;
+    SolveStats *stats;
+};
+
+#endif // DRODBOT_FASTROOMPLAYER_H
\ No newline at end of file
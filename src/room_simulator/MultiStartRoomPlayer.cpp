@@ -0,0 +1,96 @@
+#include "MultiStartRoomPlayer.h"
+
+MultiStartRoomPlayer::MultiStartRoomPlayer(Room room,
+                                           std::vector<std::tuple<Position, Direction>> starts,
+                                           bool fastSimulation) : roomPlayers({}),
+                                                                  startsByRoot({}),
+                                                                  currentStart(0)
+{
+    // Remove the player from the room, if it's there
+    std::vector<Position> playerPositions = room.findCoordinates(ElementType::BEETHRO);
+    for (auto it = playerPositions.begin(); it != playerPositions.end(); ++it)
+    {
+        Tile tile = room.getTile(*it);
+        tile.monster = Element();
+        room.setTile(*it, tile);
+    }
+    for (auto it = starts.begin(); it != starts.end(); ++it)
+    {
+        auto [position, direction] = *it;
+        Room startRoom = room.copy();
+        Tile tile = startRoom.getTile(position);
+        tile.monster = Element(ElementType::BEETHRO, direction);
+        startRoom.setTile(position, tile);
+        AbstractRoomPlayer *roomPlayer = createRoomPlayer(startRoom, fastSimulation);
+        this->startsByRoot[roomPlayer->getDerivedRoom().getActionHistory().root()] = this->roomPlayers.size();
+        this->roomPlayers.push_back(roomPlayer);
+    }
+}
+
+MultiStartRoomPlayer::~MultiStartRoomPlayer()
+{
+    for (auto it = this->roomPlayers.begin(); it != this->roomPlayers.end(); ++it)
+    {
+        delete *it;
+    }
+}
+
+std::vector<Action> MultiStartRoomPlayer::getPossibleActions()
+{
+    return this->roomPlayers[this->currentStart]->getPossibleActions();
+}
+
+void MultiStartRoomPlayer::setActions(std::vector<Action> newActions)
+{
+    this->roomPlayers[this->currentStart]->setActions(newActions);
+}
+
+void MultiStartRoomPlayer::setActions(ActionHistory newActions)
+{
+    // Switch to the start the history belongs to. Histories from other tries
+    // are played from the current start.
+    auto startIterator = this->startsByRoot.find(newActions.root());
+    if (startIterator != this->startsByRoot.end())
+    {
+        this->currentStart = startIterator->second;
+    }
+    this->roomPlayers[this->currentStart]->setActions(newActions);
+}
+
+bool MultiStartRoomPlayer::isPassableInDirection(Position position, Direction fromDirection)
+{
+    return this->roomPlayers[this->currentStart]->isPassableInDirection(position, fromDirection);
+}
+
+Room MultiStartRoomPlayer::getRoom()
+{
+    return this->roomPlayers[this->currentStart]->getRoom();
+}
+
+Room MultiStartRoomPlayer::getBaseRoom()
+{
+    return this->roomPlayers[this->currentStart]->getBaseRoom();
+}
+
+DerivedRoom MultiStartRoomPlayer::getDerivedRoom()
+{
+    return this->roomPlayers[this->currentStart]->getDerivedRoom();
+}
+
+int MultiStartRoomPlayer::getStartCount()
+{
+    return this->roomPlayers.size();
+}
+
+void MultiStartRoomPlayer::setStart(int start)
+{
+    this->currentStart = start;
+}
+
+void MultiStartRoomPlayer::setStats(SolveStats *stats)
+{
+    for (auto it = this->roomPlayers.begin(); it != this->roomPlayers.end(); ++it)
+    {
+        (*it)->setStats(stats);
+    }
+}
\ No newline at end of file
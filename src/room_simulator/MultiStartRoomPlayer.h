@@ -0,0 +1,43 @@
+#ifndef DRODBOT_MULTISTARTROOMPLAYER_H
+#define DRODBOT_MULTISTARTROOMPLAYER_H
+
+#include <vector>
+#include <map>
+#include "typedefs.h"
+#include "Room.h"
+#include "DerivedRoom.h"
+#include "ActionHistory.h"
+#include "AbstractRoomPlayer.h"
+
+// This plays a room from one of several starting positions. It has one room
+// player per start, and each start has its own action trie, so derived
+// rooms from all starts can be used at once and setting their actions picks
+// the right room player.
+// Derived rooms from different starts can be compared, since the room is
+// otherwise the same.
+class MultiStartRoomPlayer final : public AbstractRoomPlayer
+{
+public:
+    MultiStartRoomPlayer(Room room,
+                         std::vector<std::tuple<Position, Direction>> starts,
+                         bool fastSimulation = false);
+    ~MultiStartRoomPlayer();
+    std::vector<Action> getPossibleActions();
+    void setActions(std::vector<Action> newActions);
+    void setActions(ActionHistory newActions);
+    bool isPassableInDirection(Position position, Direction fromDirection);
+    Room getRoom();
+    Room getBaseRoom();
+    DerivedRoom getDerivedRoom();
+    void setStats(SolveStats *stats);
+    int getStartCount();
+    void setStart(int start);
+
+private:
+    std::vector<AbstractRoomPlayer *> roomPlayers;
+    // The root of each room player's action trie
+    std::map<ActionHistory, int> startsByRoot;
+    int currentStart;
+};
+
+#endif // DRODBOT_MULTISTARTROOMPLAYER_H
\ No newline at end of file
@@ -3,7 +3,9 @@
 #include <tuple>
 #include <optional>
 #include <set>
-#include "RoomPlayer.h"
+#include <algorithm>
+#include <iterator>
+#include "AbstractRoomPlayer.h"
 #include "ObjectiveReacher.h"
 #include "objectives/Objective.h"
 #include "typedefs.h"
@@ -11,17 +13,34 @@
 #include "problems/DerivedRoomProblem.h"
 #include "utils.h"
 
-ObjectiveReacher::ObjectiveReacher(Room room) : cachedSolutions({}),
-                                                roomPlayer(new RoomPlayer(room)),
-                                                phase(ObjectiveReacherPhase::NOTHING),
-                                                currentRoom(std::nullopt),
-                                                currentObjective(std::nullopt),
-                                                pathfindingSolution(std::nullopt),
-                                                solution(std::nullopt),
-                                                pathfindingProblem(std::nullopt),
-                                                pathfindingSearcher(std::nullopt),
-                                                roomProblem(std::nullopt),
-                                                simulationSearcher(std::nullopt){};
+ObjectiveReacher::ObjectiveReacher(Room room,
+                                   std::optional<int> idlePruningRadius,
+                                   std::optional<int> macroActionRadius,
+                                   bool fastSimulation,
+                                   SearchSettings simulationSearchSettings,
+                                   std::vector<std::tuple<Position, Direction>> starts,
+                                   std::optional<int> cacheEntryLimit,
+                                   std::optional<long> cacheByteLimit) : cachedSolutions({}),
+                                                                                          cachedSolutionsByKey({}),
+                                                                                          cacheEntryLimit(cacheEntryLimit),
+                                                                                          cacheByteLimit(cacheByteLimit),
+                                                                                          cacheStats(ObjectiveReacherCacheStats()),
+                                                                                          roomPlayer(createRoomPlayer(room, fastSimulation, starts)),
+                                                                                          connectivity(RoomConnectivity(room)),
+                                                                                          idlePruningRadius(idlePruningRadius),
+                                                                                          macroActionRadius(macroActionRadius),
+                                                                                          simulationSearchSettings(simulationSearchSettings),
+                                                                                          budget(nullptr),
+                                                                                          stats(nullptr),
+                                                                                          phase(ObjectiveReacherPhase::NOTHING),
+                                                                                          currentRoom(std::nullopt),
+                                                                                          currentObjective(std::nullopt),
+                                                                                          pathfindingSolution(std::nullopt),
+                                                                                          solution(std::nullopt),
+                                                                                          pathfindingProblem(std::nullopt),
+                                                                                          pathfindingSearcher(std::nullopt),
+                                                                                          roomProblem(std::nullopt),
+                                                                                          simulationSearcher(std::nullopt){};
 
 ObjectiveReacher::~ObjectiveReacher()
 {
@@ -44,11 +63,16 @@ ObjectiveReacher::~ObjectiveReacher()
     }
 };
 
-RoomPlayer *ObjectiveReacher::getRoomPlayer()
+AbstractRoomPlayer *ObjectiveReacher::getRoomPlayer()
 {
     return this->roomPlayer;
 }
 
+RoomConnectivity *ObjectiveReacher::getRoomConnectivity()
+{
+    return &this->connectivity;
+}
+
 Solution<DerivedRoom, Action> ObjectiveReacher::findSolution(DerivedRoom room, Objective objective)
 {
     this->start(room, objective);
@@ -98,10 +122,34 @@ void ObjectiveReacher::nextPhase()
     case ObjectiveReacherPhase::CHECK_CACHE:
     {
         Objective objective = this->currentObjective.value();
-        auto foundSolutionPtr = this->cachedSolutions.find({this->currentRoom.value(), this->currentObjective.value()});
-        if (foundSolutionPtr != this->cachedSolutions.end())
+        std::optional<Solution<DerivedRoom, Action>> cachedSolution = this->findCachedSolution(this->currentRoom.value(), objective);
+        if (this->stats)
+        {
+            if (cachedSolution)
+            {
+                this->stats->objectiveCacheHits += 1;
+            }
+            else
+            {
+                this->stats->objectiveCacheMisses += 1;
+            }
+        }
+        if (cachedSolution)
         {
-            this->solution = std::get<1>(*foundSolutionPtr);
+            this->solution = cachedSolution.value();
+            this->phase = ObjectiveReacherPhase::FINISHED;
+        }
+        else if (this->budget && this->budget->isExhausted())
+        {
+            // Don't start new searches, and don't cache this since it could
+            // be solvable with a bigger budget
+            this->solution = Solution<DerivedRoom, Action>(false, std::nullopt, std::nullopt, this->budget->exhaustedReason().value());
+            this->phase = ObjectiveReacherPhase::FINISHED;
+        }
+        else if (this->monstersUnreachable(this->currentRoom.value(), objective))
+        {
+            this->solution = Solution<DerivedRoom, Action>(false, std::nullopt, std::nullopt, FailureReason::MONSTERS_UNREACHABLE);
+            this->cacheSolution(this->currentRoom.value(), objective, this->solution.value());
             this->phase = ObjectiveReacherPhase::FINISHED;
         }
         else if (std::holds_alternative<ReachObjective>(objective) ||
@@ -145,13 +193,26 @@ void ObjectiveReacher::nextPhase()
         this->pathfindingSolution = this->finishPathfindingPhase();
         if (this->pathfindingSolution.value().exists)
         {
+            std::optional<Solution<DerivedRoom, Action>> monsterFreeSolution = this->monsterFreeSolution();
+            if (monsterFreeSolution)
+            {
+                this->solution = monsterFreeSolution.value();
+                this->cacheSolution(this->currentRoom.value(), this->currentObjective.value(), this->solution.value());
+                this->phase = ObjectiveReacherPhase::FINISHED;
+                break;
+            }
             this->prepareSimulationPhase();
 
             this->phase = ObjectiveReacherPhase::SIMULATE_ROOM;
         }
         else
         {
-            this->solution = Solution<DerivedRoom, Action>(false, std::nullopt, std::nullopt, FailureReason::FAILED_PRECHECK);
+            FailureReason failureReason = FailureReason::FAILED_PRECHECK;
+            if (this->budget && this->budget->isExhausted())
+            {
+                failureReason = this->budget->exhaustedReason().value();
+            }
+            this->solution = Solution<DerivedRoom, Action>(false, std::nullopt, std::nullopt, failureReason);
             this->phase = ObjectiveReacherPhase::FINISHED;
         }
         break;
@@ -159,7 +220,10 @@ void ObjectiveReacher::nextPhase()
     case ObjectiveReacherPhase::SIMULATE_ROOM:
     {
         this->solution = this->finishSimulationPhase();
-        this->cachedSolutions.insert({{this->currentRoom.value(), this->currentObjective.value()}, this->solution.value()});
+        if (this->solution.value().exists || !(this->budget && this->budget->isExhausted()))
+        {
+            this->cacheSolution(this->currentRoom.value(), this->currentObjective.value(), this->solution.value());
+        }
         this->phase = ObjectiveReacherPhase::FINISHED;
         break;
     }
@@ -190,8 +254,173 @@ Searcher<DerivedRoom, Action> *ObjectiveReacher::getRoomSimulationSearcher()
     return this->simulationSearcher.value();
 }
 
+void ObjectiveReacher::setBudget(SearchBudget *budget)
+{
+    this->budget = budget;
+}
+
+void ObjectiveReacher::setStats(SolveStats *stats)
+{
+    this->stats = stats;
+    this->roomPlayer->setStats(stats);
+}
+
+ObjectiveReacherCacheStats ObjectiveReacher::getCacheStats()
+{
+    return this->cacheStats;
+}
+
+// Set the cache limits, evicting solutions if the cache is already too big.
+void ObjectiveReacher::setCacheLimits(std::optional<int> entryLimit, std::optional<long> byteLimit)
+{
+    this->cacheEntryLimit = entryLimit;
+    this->cacheByteLimit = byteLimit;
+    this->evictCachedSolutions();
+}
+
+size_t ObjectiveReacherCacheKeyHash::operator()(const ObjectiveReacherCacheKey &key) const
+{
+    return std::get<0>(key).getHash() ^ objectiveHash(std::get<1>(key));
+}
+
+bool ObjectiveReacherCacheKeyEqual::operator()(const ObjectiveReacherCacheKey &first, const ObjectiveReacherCacheKey &second) const
+{
+    return std::get<0>(first) == std::get<0>(second) && objectivesEqual(std::get<1>(first), std::get<1>(second));
+}
+
 // Private methods
 
+// Helper function to estimate the memory used by an objective
+long approximateObjectiveSize(Objective objective)
+{
+    // Each tile is a node in a std::set, with three pointers and a color
+    long tileSize = sizeof(Position) + 4 * sizeof(void *);
+    long size = sizeof(Objective);
+    if (ReachObjective *obj = std::get_if<ReachObjective>(&objective))
+    {
+        size += obj->tiles.size() * tileSize;
+    }
+    else if (StabObjective *obj = std::get_if<StabObjective>(&objective))
+    {
+        size += obj->tiles.size() * tileSize;
+    }
+    else if (MonsterCountObjective *obj = std::get_if<MonsterCountObjective>(&objective))
+    {
+        size += obj->area ? obj->area.value().size() * tileSize : 0;
+    }
+    else if (OrObjective *obj = std::get_if<OrObjective>(&objective))
+    {
+        for (auto it = obj->objectives.begin(); it != obj->objectives.end(); ++it)
+        {
+            size += approximateObjectiveSize(*it);
+        }
+    }
+    return size;
+}
+
+// Helper function to estimate the memory used by a cached solution. The
+// action histories are shared with the room player's trie, so they are
+// not counted.
+long approximateCacheEntrySize(DerivedRoom room, Objective objective, Solution<DerivedRoom, Action> solution)
+{
+    // The key is stored both in the list and in the hash map
+    long size = 2 * approximateObjectiveSize(objective) + sizeof(Solution<DerivedRoom, Action>);
+    size += 2 * (sizeof(DerivedRoom) + room.monsterCount() * sizeof(PackedMonster));
+    if (solution.actions)
+    {
+        size += solution.actions.value().size() * sizeof(Action);
+    }
+    if (solution.finalState)
+    {
+        size += solution.finalState.value().monsterCount() * sizeof(PackedMonster);
+    }
+    return size;
+}
+
+std::optional<Solution<DerivedRoom, Action>> ObjectiveReacher::findCachedSolution(DerivedRoom room, Objective objective)
+{
+    auto entryIterator = this->cachedSolutionsByKey.find({room, objective});
+    if (entryIterator == this->cachedSolutionsByKey.end())
+    {
+        this->cacheStats.misses += 1;
+        return std::nullopt;
+    }
+    this->cacheStats.hits += 1;
+    // Mark it as the most recently used
+    this->cachedSolutions.splice(this->cachedSolutions.begin(), this->cachedSolutions, entryIterator->second);
+    return std::get<1>(*entryIterator->second);
+}
+
+void ObjectiveReacher::cacheSolution(DerivedRoom room, Objective objective, Solution<DerivedRoom, Action> solution)
+{
+    auto entryIterator = this->cachedSolutionsByKey.find({room, objective});
+    if (entryIterator != this->cachedSolutionsByKey.end())
+    {
+        this->cacheStats.bytes -= std::get<2>(*entryIterator->second);
+        this->cachedSolutions.erase(entryIterator->second);
+        this->cachedSolutionsByKey.erase(entryIterator);
+    }
+    long size = approximateCacheEntrySize(room, objective, solution);
+    this->cachedSolutions.push_front({{room, objective}, solution, size});
+    this->cachedSolutionsByKey[{room, objective}] = this->cachedSolutions.begin();
+    this->cacheStats.bytes += size;
+    this->evictCachedSolutions();
+}
+
+// Remove the least recently used solutions until the cache is within its
+// limits. The most recently used solution is always kept.
+void ObjectiveReacher::evictCachedSolutions()
+{
+    while (this->cachedSolutions.size() > 1 &&
+           ((this->cacheEntryLimit && (int)this->cachedSolutions.size() > this->cacheEntryLimit.value()) ||
+            (this->cacheByteLimit && this->cacheStats.bytes > this->cacheByteLimit.value())))
+    {
+        auto &evicted = this->cachedSolutions.back();
+        this->cachedSolutionsByKey.erase(std::get<0>(evicted));
+        this->cacheStats.bytes -= std::get<2>(evicted);
+        this->cacheStats.evictions += 1;
+        this->cachedSolutions.pop_back();
+    }
+    this->cacheStats.entries = this->cachedSolutions.size();
+}
+
+// Check whether an objective requires killing monsters we can never reach.
+// Only monster count objectives, possibly in or objectives, are checked.
+bool ObjectiveReacher::monstersUnreachable(DerivedRoom room, Objective objective)
+{
+    if (MonsterCountObjective *obj = std::get_if<MonsterCountObjective>(&objective))
+    {
+        // Monsters may leave the area by themselves, so we can't tell
+        if (obj->area)
+        {
+            return false;
+        }
+        Position playerPosition = std::get<0>(room.findPlayer());
+        std::vector<Position> monsters = room.findMonsterCoordinates(obj->monsterType);
+        int unreachableMonsters = 0;
+        for (auto it = monsters.begin(); it != monsters.end(); ++it)
+        {
+            if (!this->connectivity.canStab(playerPosition, *it))
+            {
+                unreachableMonsters += 1;
+            }
+        }
+        return unreachableMonsters > obj->monsters;
+    }
+    else if (OrObjective *obj = std::get_if<OrObjective>(&objective))
+    {
+        for (auto subObjective : obj->objectives)
+        {
+            if (!this->monstersUnreachable(room, subObjective))
+            {
+                return false;
+            }
+        }
+        return !obj->objectives.empty();
+    }
+    return false;
+}
+
 void ObjectiveReacher::preparePathfindingPhase()
 {
     Position start = std::get<0>(this->currentRoom.value().findPlayer());
@@ -208,7 +437,7 @@ void ObjectiveReacher::preparePathfindingPhase()
             }
         }
     }
-    this->roomPlayer->setActions(this->currentRoom.value().getActions());
+    this->roomPlayer->setActions(this->currentRoom.value().getActionHistory());
     Room pathfindingRoom = this->roomPlayer->getRoom();
     if (ReachObjective *obj = std::get_if<ReachObjective>(&objective))
     {
@@ -237,40 +466,188 @@ void ObjectiveReacher::preparePathfindingPhase()
         throw std::invalid_argument("Unknown objective type");
     }
     this->pathfindingSearcher = new Searcher<Position, Action>(this->pathfindingProblem.value());
+    this->pathfindingSearcher.value()->setBudget(this->budget);
+    this->pathfindingSearcher.value()->setStats(this->stats);
 }
 
 Solution<Position, Action> ObjectiveReacher::finishPathfindingPhase()
 {
-    return this->pathfindingSearcher.value()->findSolution();
+    std::chrono::steady_clock::time_point start = std::chrono::steady_clock::now();
+    Solution<Position, Action> solution = this->pathfindingSearcher.value()->findSolution();
+    if (this->stats)
+    {
+        this->stats->pathfindingExpansions += this->pathfindingSearcher.value()->getIterations();
+        this->stats->pathfindingTime += secondsSince(start);
+    }
+    return solution;
 }
 
-void ObjectiveReacher::prepareSimulationPhase()
+// In a room without monsters, nothing happens unless the player does
+// something. If the path found in the pathfinding phase only walks over
+// plain tiles, we can work out the resulting room without simulating it.
+// The sword may strike an orb with the last action, which is handled by
+// toggling the doors. Anything else that may change the room (potions,
+// stairs, orb strikes in the middle of the path) makes this return
+// std::nullopt, so the room is simulated as usual.
+std::optional<Solution<DerivedRoom, Action>> ObjectiveReacher::monsterFreeSolution()
 {
-    std::map<Position, int> heuristicTiles = {};
-    // If a pathfinding solution exists, prioritize tiles on the found path.
-    if (this->pathfindingSolution.has_value())
-    {
-        std::vector<Action> actions = this->pathfindingSolution.value().actions.value();
-        int currentHeuristicValue = actions.size();
-        Position currentPosition = std::get<0>(this->currentRoom.value().findPlayer());
-        heuristicTiles[currentPosition] = currentHeuristicValue;
-        for (auto it = actions.begin(); it != actions.end(); ++it)
+    DerivedRoom room = this->currentRoom.value();
+    if (!room.findMonsterCoordinates().empty())
+    {
+        return std::nullopt;
+    }
+    Objective objective = this->currentObjective.value();
+    std::vector<Action> actions = this->pathfindingSolution.value().actions.value();
+    Position position = std::get<0>(room.findPlayer());
+    Direction direction = std::get<1>(room.findPlayer());
+    Position finalPosition = position;
+    for (auto it = actions.begin(); it != actions.end(); ++it)
+    {
+        finalPosition = movePosition(finalPosition, *it);
+    }
+    // Turn the sword toward the tile to stab, if there is one
+    std::optional<StabObjective> stabObjective = std::nullopt;
+    if (StabObjective *obj = std::get_if<StabObjective>(&objective))
+    {
+        stabObjective = *obj;
+    }
+    else if (OrObjective *obj = std::get_if<OrObjective>(&objective))
+    {
+        // Pathfinding was done for the first reach or stab objective
+        for (auto it = obj->objectives.begin(); it != obj->objectives.end(); ++it)
         {
-            currentPosition = movePosition(currentPosition, *it);
-            currentHeuristicValue = currentHeuristicValue - 1;
-            heuristicTiles.insert({currentPosition, currentHeuristicValue});
+            if (std::holds_alternative<ReachObjective>(*it))
+            {
+                break;
+            }
+            if (StabObjective *subObj = std::get_if<StabObjective>(&*it))
+            {
+                stabObjective = *subObj;
+                break;
+            }
         }
     }
+    if (stabObjective)
+    {
+        std::vector<Direction> directions = {Direction::N, Direction::NE, Direction::E, Direction::SE,
+                                             Direction::S, Direction::SW, Direction::W, Direction::NW};
+        auto targetDirection = std::find_if(directions.begin(), directions.end(),
+                                            [&](Direction candidate)
+                                            {
+                                                return stabObjective.value().tiles.contains(positionInDirection(finalPosition, candidate));
+                                            });
+        if (targetDirection == directions.end())
+        {
+            return std::nullopt;
+        }
+        int clockwiseTurns = 0;
+        for (Direction turned = direction; turned != *targetDirection; turned = clockwiseDirection(turned))
+        {
+            clockwiseTurns += 1;
+        }
+        if (clockwiseTurns <= 4)
+        {
+            actions.insert(actions.end(), clockwiseTurns, Action::CW);
+        }
+        else
+        {
+            actions.insert(actions.end(), 8 - clockwiseTurns, Action::CCW);
+        }
+    }
+    // Play the actions, keeping track of orb strikes
+    Room baseRoom = this->roomPlayer->getBaseRoom();
+    auto isOrb = [&](Position tile)
+    {
+        int x = std::get<0>(tile);
+        int y = std::get<1>(tile);
+        return x >= 0 && x < 38 && y >= 0 && y < 32 &&
+               baseRoom.getTile(tile).item.type == ElementType::ORB;
+    };
+    std::set<Position> toggledDoors = room.getToggledDoors();
+    ActionHistory history = room.getActionHistory();
+    Position swordPosition = positionInDirection(position, direction);
+    for (auto it = actions.begin(); it != actions.end(); ++it)
+    {
+        if (*it == Action::CW)
+        {
+            direction = clockwiseDirection(direction);
+        }
+        else if (*it == Action::CCW)
+        {
+            direction = counterClockwiseDirection(direction);
+        }
+        else
+        {
+            position = movePosition(position, *it);
+            Tile tile = baseRoom.getTile(position);
+            if (tile.roomPiece.type == ElementType::STAIRS || tile.item.type != ElementType::NOTHING)
+            {
+                return std::nullopt;
+            }
+        }
+        history = history.child(*it);
+        Position newSwordPosition = positionInDirection(position, direction);
+        if (newSwordPosition != swordPosition && isOrb(newSwordPosition))
+        {
+            if (std::next(it) != actions.end())
+            {
+                return std::nullopt;
+            }
+            toggledDoors = this->connectivity.toggledDoorsAfterStrike(newSwordPosition, toggledDoors);
+        }
+        swordPosition = newSwordPosition;
+    }
+    if (toggledDoors.contains(position) != room.doorIsToggled(position))
+    {
+        // A door may have closed on the player, which we don't handle
+        return std::nullopt;
+    }
+    DerivedRoom finalRoom = DerivedRoom(history, {position, direction}, toggledDoors, false, false, {});
+    if (!objectiveFulfilled(objective, finalRoom))
+    {
+        return std::nullopt;
+    }
+    return Solution<DerivedRoom, Action>(true, actions, finalRoom);
+}
+
+void ObjectiveReacher::prepareSimulationPhase()
+{
     this->roomProblem = new DerivedRoomProblem(this->roomPlayer,
                                                this->currentRoom.value(),
                                                this->currentObjective.value(),
-                                               heuristicTiles);
+                                               this->idlePruningRadius,
+                                               this->macroActionRadius);
     // Low iteration limit for now, to avoid finding the solution indirectly by accident
-    // Set pathCostInPriority=false, to use greedy best-first search for performance
-    this->simulationSearcher = new Searcher<DerivedRoom, Action>(this->roomProblem.value(), true, true, false, 100);
+    // Set pathCostInPriority=false, to use greedy best-first search for performance.
+    // The other strategies always use the path cost.
+    SearchSettings settings = this->simulationSearchSettings;
+    bool pathCostInPriority = settings.strategy != SearchStrategy::BEST_FIRST;
+    this->simulationSearcher = new Searcher<DerivedRoom, Action>(this->roomProblem.value(), true, true, pathCostInPriority, 100,
+                                                                 settings.strategy,
+                                                                 settings.weight,
+                                                                 settings.beamWidth,
+                                                                 settings.exploredLimit,
+                                                                 settings.frontierLimit);
+    this->simulationSearcher.value()->setBudget(this->budget);
+    this->simulationSearcher.value()->setStats(this->stats);
 }
 
 Solution<DerivedRoom, Action> ObjectiveReacher::finishSimulationPhase()
 {
-    return this->simulationSearcher.value()->findSolution();
+    std::chrono::steady_clock::time_point start = std::chrono::steady_clock::now();
+    Solution<DerivedRoom, Action> solution = this->simulationSearcher.value()->findSolution();
+    if (this->stats)
+    {
+        this->stats->simulationExpansions += this->simulationSearcher.value()->getIterations();
+        this->stats->simulationTime += secondsSince(start);
+    }
+    if (solution.exists && this->macroActionRadius)
+    {
+        // A search action may have been several moves, so get the actual
+        // actions from the final state
+        std::vector<Action> allActions = solution.finalState.value().getActionHistory().getActions();
+        int startingSize = this->currentRoom.value().getActionHistory().size();
+        solution.actions = std::vector<Action>(allActions.begin() + startingSize, allActions.end());
+    }
+    return solution;
 }
\ No newline at end of file
@@ -4,13 +4,19 @@
 #include <tuple>
 #include <vector>
 #include <map>
+#include <list>
+#include <unordered_map>
 #include <optional>
 #include "typedefs.h"
 #include "Room.h"
 #include "objectives/Objective.h"
+#include "AbstractRoomPlayer.h"
+#include "RoomConnectivity.h"
 #include "problems/PathfindingProblem.h"
 #include "problems/DerivedRoomProblem.h"
 #include "search/Searcher.h"
+#include "search/SearchBudget.h"
+#include "SolveStats.h"
 
 enum class ObjectiveReacherPhase
 {
@@ -21,12 +27,44 @@ enum class ObjectiveReacherPhase
     FINISHED,
 };
 
+// Statistics about the solutions cached by an ObjectiveReacher
+struct ObjectiveReacherCacheStats
+{
+    int entries = 0;
+    // Approximately how much memory the cached solutions use
+    long bytes = 0;
+    int hits = 0;
+    int misses = 0;
+    // Solutions removed to keep the cache within its limits
+    int evictions = 0;
+};
+
+typedef std::tuple<DerivedRoom, Objective> ObjectiveReacherCacheKey;
+
+struct ObjectiveReacherCacheKeyHash
+{
+    size_t operator()(const ObjectiveReacherCacheKey &key) const;
+};
+
+struct ObjectiveReacherCacheKeyEqual
+{
+    bool operator()(const ObjectiveReacherCacheKey &first, const ObjectiveReacherCacheKey &second) const;
+};
+
 class ObjectiveReacher
 {
 public:
-    ObjectiveReacher(Room room);
+    ObjectiveReacher(Room room,
+                     std::optional<int> idlePruningRadius = std::nullopt,
+                     std::optional<int> macroActionRadius = std::nullopt,
+                     bool fastSimulation = false,
+                     SearchSettings simulationSearchSettings = SearchSettings(),
+                     std::vector<std::tuple<Position, Direction>> starts = {},
+                     std::optional<int> cacheEntryLimit = std::nullopt,
+                     std::optional<long> cacheByteLimit = std::nullopt);
     ~ObjectiveReacher();
-    RoomPlayer *getRoomPlayer();
+    AbstractRoomPlayer *getRoomPlayer();
+    RoomConnectivity *getRoomConnectivity();
     Solution<DerivedRoom, Action> findSolution(DerivedRoom room, Objective objective);
     void start(DerivedRoom room, Objective objective);
     void nextPhase();
@@ -34,15 +72,42 @@ public:
     Solution<DerivedRoom, Action> getSolution();
     Searcher<Position, Action> *getPathfindingSearcher();
     Searcher<DerivedRoom, Action> *getRoomSimulationSearcher();
+    void setBudget(SearchBudget *budget);
+    void setStats(SolveStats *stats);
+    bool monstersUnreachable(DerivedRoom room, Objective objective);
+    ObjectiveReacherCacheStats getCacheStats();
+    void setCacheLimits(std::optional<int> entryLimit, std::optional<long> byteLimit);
 
 private:
+    std::optional<Solution<DerivedRoom, Action>> findCachedSolution(DerivedRoom room, Objective objective);
+    void cacheSolution(DerivedRoom room, Objective objective, Solution<DerivedRoom, Action> solution);
+    void evictCachedSolutions();
     void preparePathfindingPhase();
     Solution<Position, Action> finishPathfindingPhase();
+    std::optional<Solution<DerivedRoom, Action>> monsterFreeSolution();
     void prepareSimulationPhase();
     Solution<DerivedRoom, Action> finishSimulationPhase();
 
-    std::map<std::tuple<DerivedRoom, Objective>, Solution<DerivedRoom, Action>> cachedSolutions;
-    RoomPlayer *roomPlayer;
+    // The cached solutions with their approximate sizes in bytes. The list
+    // has the most recently used solution first.
+    std::list<std::tuple<ObjectiveReacherCacheKey, Solution<DerivedRoom, Action>, long>> cachedSolutions;
+    std::unordered_map<ObjectiveReacherCacheKey,
+                       std::list<std::tuple<ObjectiveReacherCacheKey, Solution<DerivedRoom, Action>, long>>::iterator,
+                       ObjectiveReacherCacheKeyHash,
+                       ObjectiveReacherCacheKeyEqual>
+        cachedSolutionsByKey;
+    // Remove the least recently used solutions when there are more than this
+    // many, or they use more than this many bytes
+    std::optional<int> cacheEntryLimit;
+    std::optional<long> cacheByteLimit;
+    ObjectiveReacherCacheStats cacheStats;
+    AbstractRoomPlayer *roomPlayer;
+    RoomConnectivity connectivity;
+    std::optional<int> idlePruningRadius;
+    std::optional<int> macroActionRadius;
+    SearchSettings simulationSearchSettings;
+    SearchBudget *budget;
+    SolveStats *stats;
     ObjectiveReacherPhase phase;
     std::optional<DerivedRoom> currentRoom;
     std::optional<Objective> currentObjective;
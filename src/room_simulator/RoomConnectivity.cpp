@@ -0,0 +1,296 @@
+#include <array>
+#include <map>
+#include <set>
+#include <tuple>
+#include <vector>
+#include "typedefs.h"
+#include "Room.h"
+#include "RoomConnectivity.h"
+#include "utils.h"
+
+RoomConnectivity::RoomConnectivity(Room room) : hasMimics(false),
+                                                doors({}),
+                                                orbs({}),
+                                                doorComponents({}),
+                                                regionChanges({})
+{
+    // Find the doors that orbs can change, and the monsters
+    std::set<Position> orbDoors = {};
+    bool flyingMonsters = false;
+    for (int x = 0; x < 38; x += 1)
+    {
+        for (int y = 0; y < 32; y += 1)
+        {
+            Tile tile = room.getTile({x, y});
+            if (tile.item.type == ElementType::ORB)
+            {
+                OrbEffects effects = tile.item.orbEffects;
+                this->orbs[{x, y}] = {};
+                for (auto it = effects.begin(); it != effects.end(); ++it)
+                {
+                    std::set<Position> doorTiles = floodFill({std::get<0>(*it), std::get<1>(*it)}, room);
+                    orbDoors.insert(doorTiles.begin(), doorTiles.end());
+                    this->orbs[{x, y}].push_back({doorTiles, std::get<2>(*it)});
+                }
+            }
+            if (tile.item.type == ElementType::MIMIC_POTION || tile.monster.type == ElementType::MIMIC)
+            {
+                this->hasMimics = true;
+            }
+            if (tile.monster.type == ElementType::WRAITHWING)
+            {
+                flyingMonsters = true;
+            }
+            if (tile.roomPiece.type == ElementType::YELLOW_DOOR)
+            {
+                this->doors[{x, y}] = false;
+            }
+            else if (tile.roomPiece.type == ElementType::YELLOW_DOOR_OPEN)
+            {
+                this->doors[{x, y}] = true;
+            }
+            this->floor[x][y] = !this->doors.contains({x, y}) && room.isPassable(x, y);
+        }
+    }
+    // Find the tiles anything could ever stand on
+    std::array<std::array<bool, 32>, 38> passable;
+    for (int x = 0; x < 38; x += 1)
+    {
+        for (int y = 0; y < 32; y += 1)
+        {
+            Tile tile = room.getTile({x, y});
+            if (tile.item.type == ElementType::OBSTACLE || tile.item.type == ElementType::ORB)
+            {
+                passable[x][y] = false;
+            }
+            else if (tile.roomPiece.type == ElementType::YELLOW_DOOR)
+            {
+                passable[x][y] = orbDoors.contains({x, y});
+            }
+            else if (tile.roomPiece.type == ElementType::PIT)
+            {
+                passable[x][y] = flyingMonsters;
+            }
+            else
+            {
+                passable[x][y] = room.isPassable(x, y);
+            }
+        }
+    }
+    // Flood fill each component
+    for (auto column = this->components.begin(); column != this->components.end(); ++column)
+    {
+        column->fill(-1);
+    }
+    int componentCount = 0;
+    for (int startX = 0; startX < 38; startX += 1)
+    {
+        for (int startY = 0; startY < 32; startY += 1)
+        {
+            if (this->components[startX][startY] != -1 || !passable[startX][startY])
+            {
+                continue;
+            }
+            int component = componentCount;
+            componentCount += 1;
+            this->components[startX][startY] = component;
+            std::vector<Position> toCheck = {{startX, startY}};
+            while (!toCheck.empty())
+            {
+                Position checking = toCheck.back();
+                toCheck.pop_back();
+                int x = std::get<0>(checking);
+                int y = std::get<1>(checking);
+                for (int dx = -1; dx <= 1; dx += 1)
+                {
+                    for (int dy = -1; dy <= 1; dy += 1)
+                    {
+                        int newX = x + dx;
+                        int newY = y + dy;
+                        if (newX < 0 || newX >= 38 || newY < 0 || newY >= 32 ||
+                            this->components[newX][newY] != -1 || !passable[newX][newY])
+                        {
+                            continue;
+                        }
+                        this->components[newX][newY] = component;
+                        toCheck.push_back({newX, newY});
+                    }
+                }
+            }
+        }
+    }
+}
+
+// Check whether a player at some position could ever stab something at
+// another position, if that something can only walk around. Returns true
+// if we can't tell. The sword is always next to the player, so the player
+// has to stand next to the monster to stab it. Both of those tiles can be
+// stood on, so they are in the same component.
+bool RoomConnectivity::canStab(Position playerPosition, Position position)
+{
+    if (this->hasMimics)
+    {
+        return true;
+    }
+    int playerComponent = this->components[std::get<0>(playerPosition)][std::get<1>(playerPosition)];
+    int component = this->components[std::get<0>(position)][std::get<1>(position)];
+    if (playerComponent == -1 || component == -1)
+    {
+        return true;
+    }
+    return playerComponent == component;
+}
+
+// Get the doors that are toggled compared to the base room, after striking
+// an orb.
+std::set<Position> RoomConnectivity::toggledDoorsAfterStrike(Position orb, std::set<Position> toggledDoors)
+{
+    auto orbIterator = this->orbs.find(orb);
+    if (orbIterator == this->orbs.end())
+    {
+        return toggledDoors;
+    }
+    for (auto it = orbIterator->second.begin(); it != orbIterator->second.end(); ++it)
+    {
+        std::set<Position> doorTiles = std::get<0>(*it);
+        OrbEffect effect = std::get<1>(*it);
+        for (auto doorIt = doorTiles.begin(); doorIt != doorTiles.end(); ++doorIt)
+        {
+            auto doorIterator = this->doors.find(*doorIt);
+            if (doorIterator == this->doors.end())
+            {
+                continue;
+            }
+            bool openInBase = doorIterator->second;
+            bool open = openInBase != toggledDoors.contains(*doorIt);
+            switch (effect)
+            {
+            case OrbEffect::OPEN:
+                open = true;
+                break;
+            case OrbEffect::CLOSE:
+                open = false;
+                break;
+            case OrbEffect::TOGGLE:
+                open = !open;
+                break;
+            default:
+                break;
+            }
+            if (open == openInBase)
+            {
+                toggledDoors.erase(*doorIt);
+            }
+            else
+            {
+                toggledDoors.insert(*doorIt);
+            }
+        }
+    }
+    return toggledDoors;
+}
+
+// Check whether striking an orb changes the region the player can walk in.
+// If it doesn't, it only changes doors that don't matter for now.
+bool RoomConnectivity::strikeChangesRegion(Position playerPosition, Position orb, std::set<Position> toggledDoors)
+{
+    std::set<Position> newToggledDoors = this->toggledDoorsAfterStrike(orb, toggledDoors);
+    if (newToggledDoors == toggledDoors)
+    {
+        return false;
+    }
+    const std::array<std::array<int, 32>, 38> &before = this->getDoorComponents(toggledDoors);
+    int x = std::get<0>(playerPosition);
+    int y = std::get<1>(playerPosition);
+    int componentBefore = before[x][y];
+    if (componentBefore == -1)
+    {
+        // Standing on a closed door, or something else weird
+        return true;
+    }
+    // Any tile in the same component gives the same answer, since the
+    // component either stays the same or changes for all of them
+    std::tuple<Position, std::set<Position>, int> key = {orb, toggledDoors, componentBefore};
+    auto cachedIterator = this->regionChanges.find(key);
+    if (cachedIterator != this->regionChanges.end())
+    {
+        return cachedIterator->second;
+    }
+    const std::array<std::array<int, 32>, 38> &after = this->getDoorComponents(newToggledDoors);
+    int componentAfter = after[x][y];
+    bool changes = componentAfter == -1;
+    for (int x = 0; x < 38 && !changes; x += 1)
+    {
+        for (int y = 0; y < 32; y += 1)
+        {
+            if ((before[x][y] == componentBefore) != (after[x][y] == componentAfter))
+            {
+                changes = true;
+                break;
+            }
+        }
+    }
+    this->regionChanges[key] = changes;
+    return changes;
+}
+
+// Get the components the player can walk in with some doors toggled.
+// Force arrows are ignored.
+const std::array<std::array<int, 32>, 38> &RoomConnectivity::getDoorComponents(std::set<Position> toggledDoors)
+{
+    auto cachedIterator = this->doorComponents.find(toggledDoors);
+    if (cachedIterator != this->doorComponents.end())
+    {
+        return cachedIterator->second;
+    }
+    std::array<std::array<bool, 32>, 38> passable = this->floor;
+    for (auto it = this->doors.begin(); it != this->doors.end(); ++it)
+    {
+        Position position = it->first;
+        passable[std::get<0>(position)][std::get<1>(position)] = it->second != toggledDoors.contains(position);
+    }
+    std::array<std::array<int, 32>, 38> components;
+    for (auto column = components.begin(); column != components.end(); ++column)
+    {
+        column->fill(-1);
+    }
+    int componentCount = 0;
+    for (int startX = 0; startX < 38; startX += 1)
+    {
+        for (int startY = 0; startY < 32; startY += 1)
+        {
+            if (components[startX][startY] != -1 || !passable[startX][startY])
+            {
+                continue;
+            }
+            int component = componentCount;
+            componentCount += 1;
+            components[startX][startY] = component;
+            std::vector<Position> toCheck = {{startX, startY}};
+            while (!toCheck.empty())
+            {
+                Position checking = toCheck.back();
+                toCheck.pop_back();
+                int x = std::get<0>(checking);
+                int y = std::get<1>(checking);
+                for (int dx = -1; dx <= 1; dx += 1)
+                {
+                    for (int dy = -1; dy <= 1; dy += 1)
+                    {
+                        int newX = x + dx;
+                        int newY = y + dy;
+                        if (newX < 0 || newX >= 38 || newY < 0 || newY >= 32 ||
+                            components[newX][newY] != -1 || !passable[newX][newY])
+                        {
+                            continue;
+                        }
+                        components[newX][newY] = component;
+                        toCheck.push_back({newX, newY});
+                    }
+                }
+            }
+        }
+    }
+    // References to map elements stay valid when more are inserted
+    return this->doorComponents.emplace(toggledDoors, components).first->second;
+}
\ No newline at end of file
@@ -0,0 +1,50 @@
+#ifndef DRODBOT_ROOMCONNECTIVITY_H
+#define DRODBOT_ROOMCONNECTIVITY_H
+
+#include <array>
+#include <map>
+#include <set>
+#include <tuple>
+#include <vector>
+#include "typedefs.h"
+#include "Room.h"
+
+// Which parts of a room are connected, regardless of how the room is played.
+// This is generous in what it considers passable: all doors that orbs can
+// open count as open, force arrows are ignored, and pits are passable if
+// there are flying monsters. If two tiles are not connected here, nothing
+// can ever walk between them.
+//
+// It also keeps track of the regions the player can walk in with each
+// configuration of yellow doors, to see whether striking an orb matters.
+class RoomConnectivity
+{
+public:
+    RoomConnectivity(Room room);
+    bool canStab(Position playerPosition, Position position);
+    std::set<Position> toggledDoorsAfterStrike(Position orb, std::set<Position> toggledDoors);
+    bool strikeChangesRegion(Position playerPosition, Position orb, std::set<Position> toggledDoors);
+
+private:
+    const std::array<std::array<int, 32>, 38> &getDoorComponents(std::set<Position> toggledDoors);
+
+    // The component of each tile, or -1 for tiles nothing can stand on
+    std::array<std::array<int, 32>, 38> components;
+    // Mimics have swords too, so we can't say anything about what can be
+    // stabbed if there are mimics
+    bool hasMimics;
+    // Tiles the player can stand on, not counting yellow doors
+    std::array<std::array<bool, 32>, 38> floor;
+    // The yellow doors, and whether they are open in the base room
+    std::map<Position, bool> doors;
+    // The door tiles each orb affects, and how
+    std::map<Position, std::vector<std::tuple<std::set<Position>, OrbEffect>>> orbs;
+    // The components the player can walk in, for each set of doors that are
+    // toggled compared to the base room. These are found when needed.
+    std::map<std::set<Position>, std::array<std::array<int, 32>, 38>> doorComponents;
+    // Whether striking an orb changes the region, for each orb, set of
+    // toggled doors and component the player is in before the strike
+    std::map<std::tuple<Position, std::set<Position>, int>, bool> regionChanges;
+};
+
+#endif // DRODBOT_ROOMCONNECTIVITY_H
\ No newline at end of file
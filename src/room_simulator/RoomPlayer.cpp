@@ -187,8 +187,10 @@ void initRoomPlayerRequirements()
 RoomPlayer::RoomPlayer(Room room, bool firstEntrance) : drodRoom(globalDb.value()->Rooms.GetNew()),
                                                         currentGame(NULL),
                                                         baseRoom(room),
-                                                        actions({}),
-                                                        doors({})
+                                                        emptyActions(ActionHistory()),
+                                                        actions(emptyActions),
+                                                        doors({}),
+                                                        stats(nullptr)
 {
     // Map from turnorder to monster
     std::map<int, std::tuple<ElementType, Position, Direction>> monsters = {};
@@ -584,7 +586,11 @@ void RoomPlayer::performAction(Action action)
         throw std::invalid_argument("Unknown action");
     }
     this->currentGame->ProcessCommand(drodAction, cueEvents);
-    this->actions.push_back(action);
+    if (this->stats)
+    {
+        this->stats->performedActions += 1;
+    }
+    this->actions = this->actions.child(action);
 }
 
 // Rewind an action
@@ -596,40 +602,65 @@ void RoomPlayer::undo(unsigned long int turns)
     }
     CCueEvents cueEvents;
     this->currentGame->UndoCommands(turns, cueEvents);
-    auto end = this->actions.end();
-    auto firstToErase = end - turns;
-    this->actions.erase(firstToErase, end);
+    if (this->stats)
+    {
+        this->stats->undoCalls += 1;
+        this->stats->undoneActions += turns;
+    }
+    for (unsigned long int i = 0; i < turns; i++)
+    {
+        this->actions = this->actions.parent();
+    }
 }
 
 // Set the actions performed from the base room, undoing if necessary
 void RoomPlayer::setActions(std::vector<Action> newActions)
 {
-    long unsigned int divergingIndex = this->actions.size();
-    for (long unsigned int i = 0; i < this->actions.size(); i++)
+    ActionHistory history = this->emptyActions;
+    for (auto it = newActions.begin(); it != newActions.end(); ++it)
     {
-        if (
-            // If this is true, all the new actions are part of the old actions since
-            // we haven't stopped yet. But the rest of the old actions
-            // (including this) should be undone.
-            i == newActions.size() ||
-            // If this is true, we have reached the first diverging action. Undo this
-            // and everything after.
-            this->actions[i] != newActions[i])
-        {
-            divergingIndex = i;
-            break;
-        }
+        history = history.child(*it);
+    }
+    this->setActions(history);
+}
+
+// Set the actions performed from the base room, undoing if necessary.
+// Histories from this room player's trie share nodes with the current
+// actions, so the point of divergence is found without comparing actions.
+void RoomPlayer::setActions(ActionHistory newActions)
+{
+    std::optional<ActionHistory> commonPrefix = ActionHistory::commonPrefix(this->actions, newActions);
+    if (!commonPrefix)
+    {
+        // The history is from another trie, so look it up in ours instead
+        this->setActions(newActions.getActions());
+        return;
     }
     // Undo all old actions that are not part of the new actions
-    unsigned long int timesToUndo = this->actions.size() - divergingIndex;
+    unsigned long int timesToUndo = this->actions.size() - commonPrefix.value().size();
     this->undo(timesToUndo);
     // Perform the new actions after the point of divergence
-    for (long unsigned int i = divergingIndex; i < newActions.size(); i++)
+    std::vector<Action> actionsToPerform = {};
+    for (ActionHistory history = newActions; !(history == commonPrefix.value()); history = history.parent())
+    {
+        actionsToPerform.push_back(history.lastAction());
+    }
+    if (this->stats && actionsToPerform.size() > 1)
     {
-        this->performAction(newActions[i]);
+        this->stats->replayedActions += actionsToPerform.size() - 1;
+    }
+    for (auto it = actionsToPerform.rbegin(); it != actionsToPerform.rend(); ++it)
+    {
+        this->performAction(*it);
     }
 }
 
+// Get the room as it was before any actions were performed.
+Room RoomPlayer::getBaseRoom()
+{
+    return this->baseRoom;
+}
+
 // Get a representation of the current room state.
 Room RoomPlayer::getRoom()
 {
@@ -809,12 +840,24 @@ Room RoomPlayer::getRoom()
 
 DerivedRoom RoomPlayer::getDerivedRoom()
 {
-    return DerivedRoom(this->actions,
-                       this->findPlayer(),
-                       this->getToggledDoors(),
-                       this->playerIsDead(),
-                       this->playerHasLeft(),
-                       this->getMonsters());
+    std::chrono::steady_clock::time_point start = std::chrono::steady_clock::now();
+    DerivedRoom room = DerivedRoom(this->actions,
+                                   this->findPlayer(),
+                                   this->getToggledDoors(),
+                                   this->playerIsDead(),
+                                   this->playerHasLeft(),
+                                   this->getMonsters());
+    if (this->stats)
+    {
+        this->stats->derivedRoomCalls += 1;
+        this->stats->derivedRoomTime += secondsSince(start);
+    }
+    return room;
+}
+
+void RoomPlayer::setStats(SolveStats *stats)
+{
+    this->stats = stats;
 }
 
 std::tuple<Position, Direction> RoomPlayer::findPlayer()
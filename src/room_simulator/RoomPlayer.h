@@ -6,17 +6,22 @@
 #include "typedefs.h"
 #include "Room.h"
 #include "DerivedRoom.h"
+#include "ActionHistory.h"
+#include "AbstractRoomPlayer.h"
 
-class RoomPlayer
+class RoomPlayer final : public AbstractRoomPlayer
 {
 public:
     RoomPlayer(Room room, bool firstEntrance = false);
     ~RoomPlayer();
     std::vector<Action> getPossibleActions();
     void setActions(std::vector<Action> newActions);
+    void setActions(ActionHistory newActions);
     bool isPassableInDirection(Position position, Direction fromDirection);
     Room getRoom();
+    Room getBaseRoom();
     DerivedRoom getDerivedRoom();
+    void setStats(SolveStats *stats);
 
 private:
     void performAction(Action action);
@@ -30,8 +35,10 @@ private:
     CCurrentGame *currentGame;
     // Keeping track of things for interacting with DerivedRoom
     Room baseRoom;
-    std::vector<Action> actions;
+    ActionHistory emptyActions;
+    ActionHistory actions;
     std::set<Position> doors;
+    SolveStats *stats;
 };
 
 void initRoomPlayerRequirements();
@@ -0,0 +1,51 @@
+#ifndef DRODBOT_SOLVESTATS_H
+#define DRODBOT_SOLVESTATS_H
+
+#include <algorithm>
+#include <chrono>
+
+// Counters for finding out where the time goes when solving a room. The
+// ObjectiveReacher, its room player and its searchers add to the same
+// stats, through a pointer like SearchBudget.
+struct SolveStats
+{
+    // Expansions in the planning search, over sub-objectives
+    int plannerExpansions = 0;
+    // Expansions in the searches for reaching sub-objectives
+    int pathfindingExpansions = 0;
+    int simulationExpansions = 0;
+    // Sub-objective solutions found in, or missing from, the cache
+    int objectiveCacheHits = 0;
+    int objectiveCacheMisses = 0;
+    // Seconds spent in each phase of reaching sub-objectives
+    double pathfindingTime = 0;
+    double simulationTime = 0;
+    // Actions played in the room player, and how many of those were only
+    // played to get back to a state that had been reached before
+    int performedActions = 0;
+    int replayedActions = 0;
+    // Times the room player undid actions, and the actions undone
+    int undoCalls = 0;
+    int undoneActions = 0;
+    // Calls to getDerivedRoom() in the room player, and seconds spent there
+    int derivedRoomCalls = 0;
+    double derivedRoomTime = 0;
+    // The largest frontier and explored set in any searcher
+    int peakFrontierSize = 0;
+    int peakExploredSize = 0;
+};
+
+// Helper function to record the frontier and explored sizes of a searcher
+inline void recordPeakSizes(SolveStats *stats, int frontierSize, int exploredSize)
+{
+    stats->peakFrontierSize = std::max(stats->peakFrontierSize, frontierSize);
+    stats->peakExploredSize = std::max(stats->peakExploredSize, exploredSize);
+}
+
+// Helper function to get the seconds since a time point
+inline double secondsSince(std::chrono::steady_clock::time_point start)
+{
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+}
+
+#endif // DRODBOT_SOLVESTATS_H
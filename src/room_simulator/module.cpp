@@ -1,15 +1,21 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/functional.h>
+#include <pybind11/operators.h>
 
 #include "typedefs.h"
 #include "RoomPlayer.h"
+#include "FastRoomPlayer.h"
+#include "MultiStartRoomPlayer.h"
 #include "Room.h"
 #include "DerivedRoom.h"
 #include "ObjectiveReacher.h"
+#include "SolveStats.h"
 #include "search/Searcher.h"
 #include "problems/PathfindingProblem.h"
 #include "problems/PlanningProblem.h"
 #include "problems/DerivedRoomProblem.h"
+#include "problems/LevelPathfindingProblem.h"
 #include "utils.h"
 
 void initialize()
@@ -59,23 +65,81 @@ path_cost_in_priority
 iteration_limit
     If searching for more than this number of iteration produces no result, throw
     an exception.
+strategy
+    How to choose the next node to expand. WEIGHTED_A_STAR and IDA_STAR
+    need both heuristic_in_priority and path_cost_in_priority, and BEAM
+    needs path_cost_in_priority. IDA_STAR can't search from several starts
+    or defer evaluation. Other combinations raise a ValueError.
+weight
+    The heuristic weight for WEIGHTED_A_STAR and IDA_STAR.
+beam_width
+    The number of nodes to keep at each depth for BEAM.
+explored_limit
+    If set, give up when more than this many states have been explored.
+frontier_limit
+    If set, drop the worst nodes from the frontier when it grows larger
+    than this.
+defer_evaluation
+    Whether to put children in the frontier with the parent's priority, and
+    only take their actions when they are about to be expanded. This saves
+    time when checking actions is expensive, and most children are never
+    expanded. Not supported by IDA_STAR.
 )docstr")
-        .def(pybind11::init<Problem<State, SearchAction> *, bool, bool, bool, int>(),
+        .def(pybind11::init<Problem<State, SearchAction> *, bool, bool, bool, int,
+                            SearchStrategy, double, int, std::optional<int>, std::optional<int>, bool>(),
              pybind11::arg("problem"),
              pybind11::arg("avoid_duplicates") = true,
              pybind11::arg("heuristic_in_priority") = true,
              pybind11::arg("path_cost_in_priority") = true,
-             pybind11::arg("iteration_limit") = 10000)
-        .def("find_solution", &Searcher<State, SearchAction>::findSolution, R"docstr(
+             pybind11::arg("iteration_limit") = 10000,
+             pybind11::arg("strategy") = SearchStrategy::BEST_FIRST,
+             pybind11::arg("weight") = 1,
+             pybind11::arg("beam_width") = 100,
+             pybind11::arg("explored_limit") = std::nullopt,
+             pybind11::arg("frontier_limit") = std::nullopt,
+             pybind11::arg("defer_evaluation") = false)
+        .def("find_solution", &Searcher<State, SearchAction>::findSolution, pybind11::call_guard<pybind11::gil_scoped_release>(), R"docstr(
 Find a solution to the problem.
 
 This is all you need when using this for real.
 
 Returns
 -------
-A Solution object.
+A Solution object. If it failed because the budget ran out, it has the
+actions and final state of the expanded node closest to the goal.
 )docstr")
-        .def("expand_next_node", &Searcher<State, SearchAction>::expandNextNode, R"docstr(
+        .def("find_reachable_starts", &Searcher<State, SearchAction>::findReachableStarts, pybind11::call_guard<pybind11::gil_scoped_release>(), R"docstr(
+Find which initial states of the problem can reach a goal.
+
+This does one search from all initial states at once, sharing states
+between them. Not supported with IDA*.
+
+If the budget runs out, only the starts found so far are returned, so
+check the budget afterwards to tell that apart from unreachable starts.
+
+Returns
+-------
+The indices of the initial states that can reach a goal.
+)docstr")
+        .def("set_budget", &Searcher<State, SearchAction>::setBudget, pybind11::arg("budget"),
+             pybind11::keep_alive<1, 2>(), R"docstr(
+Set a budget to spend from while searching.
+
+Parameters
+----------
+budget
+    The budget, or None for no budget. The iteration limit still applies.
+)docstr")
+        .def("set_stats", &Searcher<State, SearchAction>::setStats, pybind11::arg("stats"),
+             pybind11::keep_alive<1, 2>(), R"docstr(
+Set stats to record the peak frontier and explored sizes in.
+
+Parameters
+----------
+stats
+    The stats, or None to not record stats.
+)docstr")
+        .def("expand_next_node", &Searcher<State, SearchAction>::expandNextNode, pybind11::call_guard<pybind11::gil_scoped_release>(), R"docstr(
 Expand the next node in the search.
 )docstr")
         .def("reset", &Searcher<State, SearchAction>::reset, R"docstr(
@@ -145,6 +209,16 @@ Get the explored size.
 Returns
 -------
 The explored size.
+)docstr")
+        .def("get_node_count", &Searcher<State, SearchAction>::getNodeCount, R"docstr(
+Get the number of search nodes kept in memory.
+
+This includes the explored nodes and the frontier. With IDA*, it is only
+the current path.
+
+Returns
+-------
+The number of nodes.
 )docstr")
         .def("found_solution", &Searcher<State, SearchAction>::foundSolution, R"docstr(
 Whether we have found the solution.
@@ -158,12 +232,15 @@ Whether we have found the solution.
 PYBIND11_MODULE(room_simulator, m)
 {
     m.doc() = "This module uses the DROD code to simulate actions in rooms.";
+    // The long-running functions release the GIL, so other Python threads
+    // can run while they do. DRODLib's state is global, so they should
+    // still only be called from one thread at a time.
     m.def("initialize", &initialize, R"docstr(
 Initialize the room simulator.
 
 This has side effects on the file system and should only be done once.
 )docstr");
-    m.def("simulate_actions", &simulateActions, R"docstr(
+    m.def("simulate_actions", &simulateActions, pybind11::call_guard<pybind11::gil_scoped_release>(), R"docstr(
 Simulate a actions in a room.
 
 Parameters
@@ -394,6 +471,8 @@ This is only valid in the context of one RoomPlayer. Comparing instances
 originating from RoomPlayers playing different rooms will produce nonsensical
 results.
 
+Derived rooms are hashable, and equal if the player, the toggled doors and the
+monsters are the same, regardless of the actions leading there.
 )docstr")
         .def("get_actions", &DerivedRoom::getActions, R"docstr(
 Get the actions resulting in this derived room.
@@ -401,7 +480,11 @@ Get the actions resulting in this derived room.
 Returns
 -------
 The actions.
-)docstr");
+)docstr")
+        .def("__hash__", &DerivedRoom::getHash)
+        // Comparing with other types returns NotImplemented instead of
+        // raising a TypeError
+        .def(pybind11::self == pybind11::self);
 
     m.def("get_full_room", &getFullRoom, pybind11::arg("base_room"), pybind11::arg("derived_room"), R"docstr(
 Get a new base room from a base room and a derived room.
@@ -418,19 +501,10 @@ Returns
 The new base room.
 )docstr");
 
-    pybind11::class_<RoomPlayer>(m, "RoomPlayer", R"docstr(
-This simulates taking actions in a room.
-
-Parameters
-----------
-room
-    The room to play.
-first_entrance
-    Whether this is the first time entering the room. If not, apply some
-    workarounds since DROD will e.g. strike orbs before the first turn.
+    pybind11::class_<AbstractRoomPlayer>(m, "AbstractRoomPlayer", R"docstr(
+Something that simulates taking actions in a room.
 )docstr")
-        .def(pybind11::init<Room, bool>(), pybind11::arg("room"), pybind11::arg("first_entrance") = false)
-        .def("set_actions", &RoomPlayer::setActions, pybind11::arg("actions"), R"docstr(
+        .def("set_actions", pybind11::overload_cast<std::vector<Action>>(&AbstractRoomPlayer::setActions), pybind11::arg("actions"), R"docstr(
 Set the actions played in the room.
 
 Parameters
@@ -438,21 +512,104 @@ Parameters
 actions
     The actions.
 )docstr")
-        .def("get_derived_room", &RoomPlayer::getDerivedRoom, R"docstr(
+        .def("get_possible_actions", &AbstractRoomPlayer::getPossibleActions, R"docstr(
+Get the actions that can be taken, not counting moves that bump into things.
+
+Returns
+-------
+The possible actions.
+)docstr")
+        .def("get_derived_room", &AbstractRoomPlayer::getDerivedRoom, R"docstr(
 Get the full played room.
 
 Returns
 ----------
 The derived room.
 )docstr")
-        .def("get_room", &RoomPlayer::getRoom, R"docstr(
+        .def("get_room", &AbstractRoomPlayer::getRoom, R"docstr(
 Get the full played room.
 
 Returns
 ----------
 The room.
+)docstr")
+        .def("get_start_count", &AbstractRoomPlayer::getStartCount, R"docstr(
+Get the number of starting positions.
+
+Returns
+-------
+The number of starts. Only MultiStartRoomPlayer has more than one.
+)docstr")
+        .def("set_start", &AbstractRoomPlayer::setStart, pybind11::arg("start"), R"docstr(
+Choose the starting position used by set_actions().
+
+Parameters
+----------
+start
+    The index of the start.
+)docstr");
+
+    pybind11::class_<RoomPlayer, AbstractRoomPlayer>(m, "RoomPlayer", R"docstr(
+This simulates taking actions in a room, using DRODLib.
+
+Parameters
+----------
+room
+    The room to play.
+first_entrance
+    Whether this is the first time entering the room. If not, apply some
+    workarounds since DROD will e.g. strike orbs before the first turn.
+)docstr")
+        .def(pybind11::init<Room, bool>(), pybind11::arg("room"), pybind11::arg("first_entrance") = false);
+
+    pybind11::class_<FastRoomPlayer, AbstractRoomPlayer>(m, "FastRoomPlayer", R"docstr(
+This simulates taking actions in a room, without DRODLib.
+
+It only supports roaches, roach queens and evil eyes, and a limited set
+of other elements. It should give the same results as RoomPlayer, but
+that hasn't been checked yet. Run room_tester.compare_simulators() before
+relying on it.
+
+Parameters
+----------
+room
+    The room to play. Must be supported, see supports_room().
+)docstr")
+        .def(pybind11::init<Room>(), pybind11::arg("room"))
+        .def_static("supports_room", &FastRoomPlayer::supportsRoom, pybind11::arg("room"), R"docstr(
+Check whether a room only has elements FastRoomPlayer supports.
+
+Parameters
+----------
+room
+    The room.
+
+Returns
+-------
+Whether the room is supported.
 )docstr");
 
+    pybind11::class_<MultiStartRoomPlayer, AbstractRoomPlayer>(m, "MultiStartRoomPlayer", R"docstr(
+This simulates taking actions in a room, from one of several starts.
+
+Derived rooms from different starts can be compared, so a search can
+explore from all starts at once.
+
+Parameters
+----------
+room
+    The room to play. Any player in it is removed.
+starts
+    The starting positions and directions of the player.
+fast_simulation
+    Whether to use FastRoomPlayer instead of DRODLib, if it supports the room.
+    See FastRoomPlayer for why this is off by default.
+)docstr")
+        .def(pybind11::init<Room, std::vector<std::tuple<Position, Direction>>, bool>(),
+             pybind11::arg("room"),
+             pybind11::arg("starts"),
+             pybind11::arg("fast_simulation") = false);
+
     pybind11::class_<ReachObjective>(m, "ReachObjective")
         .def(pybind11::init<std::set<Position>>(), pybind11::arg("tiles"))
         .def_readwrite("tiles", &ReachObjective::tiles);
@@ -471,11 +628,186 @@ The room.
         .value("NO_FAILURE", FailureReason::NO_FAILURE)
         .value("FAILED_PRECHECK", FailureReason::FAILED_PRECHECK)
         .value("ITERATION_LIMIT_REACHED", FailureReason::ITERATION_LIMIT_REACHED)
-        .value("EXHAUSTED_FRONTIER", FailureReason::EXHAUSTED_FRONTIER);
+        .value("EXHAUSTED_FRONTIER", FailureReason::EXHAUSTED_FRONTIER)
+        .value("MONSTERS_UNREACHABLE", FailureReason::MONSTERS_UNREACHABLE)
+        .value("MEMORY_LIMIT_REACHED", FailureReason::MEMORY_LIMIT_REACHED)
+        .value("DEADLINE_REACHED", FailureReason::DEADLINE_REACHED)
+        .value("CANCELLED", FailureReason::CANCELLED);
+
+    pybind11::class_<SearchProgress>(m, "SearchProgress", R"docstr(
+How a solve is going, as reported to a progress callback.
+
+Attributes
+----------
+expansions
+    The number of expansions so far, in all searchers using the budget.
+frontier_size
+    The frontier size of the searcher that reported the progress.
+best_heuristic
+    The lowest heuristic expanded by the searcher that reported the progress.
+)docstr")
+        .def_readonly("expansions", &SearchProgress::expansions)
+        .def_readonly("frontier_size", &SearchProgress::frontierSize)
+        .def_readonly("best_heuristic", &SearchProgress::bestHeuristic);
+
+    pybind11::class_<SearchBudget>(m, "SearchBudget", R"docstr(
+A time and expansion budget, shared by the searchers in one solve.
+
+It can be cancelled from another thread, which makes the searches using
+it stop soon after.
+
+Parameters
+----------
+time_limit
+    If set, the number of seconds from now until the budget runs out.
+max_expansions
+    If set, the budget runs out after this many node expansions in total.
+)docstr")
+        .def(pybind11::init<std::optional<double>, std::optional<int>>(),
+             pybind11::arg("time_limit") = std::nullopt,
+             pybind11::arg("max_expansions") = std::nullopt)
+        .def("get_expansions", &SearchBudget::getExpansions, R"docstr(
+Get the number of expansions spent so far.
+
+Returns
+-------
+The number of expansions.
+)docstr")
+        .def("is_exhausted", &SearchBudget::isExhausted, R"docstr(
+Check whether the budget has run out.
+
+Returns
+-------
+Whether the budget has run out.
+)docstr")
+        .def("exhausted_reason", &SearchBudget::exhaustedReason, R"docstr(
+Get why the budget has run out.
+
+Returns
+-------
+The FailureReason that searches using the budget fail with, or None if
+it hasn't run out.
+)docstr")
+        .def("cancel", &SearchBudget::cancel, R"docstr(
+Make the budget run out, so the searches using it stop.
+
+This can be called from another thread while searching. The searches
+will fail with FailureReason.CANCELLED.
+)docstr")
+        .def("is_cancelled", &SearchBudget::isCancelled, R"docstr(
+Check whether the budget has been cancelled.
+
+Returns
+-------
+Whether cancel() has been called.
+)docstr")
+        .def("set_progress_callback", &SearchBudget::setProgressCallback,
+             pybind11::arg("callback"), pybind11::arg("interval") = 0.5, R"docstr(
+Set a function to call with the progress of the searches.
+
+The callback is called from the searching thread, with the GIL held, so
+it should return quickly. An exception in it aborts the search.
+
+Parameters
+----------
+callback
+    A function taking a SearchProgress, or None to stop reporting progress.
+interval
+    The minimum number of seconds between calls to the callback.
+)docstr");
+
+    pybind11::class_<SolveStats>(m, "SolveStats", R"docstr(
+Counters for finding out where the time goes when solving a room.
+
+Attributes
+----------
+planner_expansions
+    Expansions in the planning search, over sub-objectives. Not
+    recorded by the searchers themselves.
+pathfinding_expansions
+    Expansions when pathfinding to sub-objectives.
+simulation_expansions
+    Expansions when simulating the room to reach sub-objectives.
+objective_cache_hits
+    Sub-objective solutions found in the ObjectiveReacher cache.
+objective_cache_misses
+    Sub-objective solutions missing from the ObjectiveReacher cache.
+pathfinding_time
+    Seconds spent pathfinding to sub-objectives.
+simulation_time
+    Seconds spent simulating the room to reach sub-objectives.
+performed_actions
+    Actions played in the room player.
+replayed_actions
+    Played actions that only led back to a state reached before.
+undo_calls
+    Times the room player undid actions.
+undone_actions
+    Actions undone by the room player.
+derived_room_calls
+    Derived rooms created by the room player.
+derived_room_time
+    Seconds spent creating derived rooms.
+peak_frontier_size
+    The largest frontier in any searcher.
+peak_explored_size
+    The largest explored set in any searcher.
+)docstr")
+        .def(pybind11::init<>())
+        .def_readwrite("planner_expansions", &SolveStats::plannerExpansions)
+        .def_readwrite("pathfinding_expansions", &SolveStats::pathfindingExpansions)
+        .def_readwrite("simulation_expansions", &SolveStats::simulationExpansions)
+        .def_readwrite("objective_cache_hits", &SolveStats::objectiveCacheHits)
+        .def_readwrite("objective_cache_misses", &SolveStats::objectiveCacheMisses)
+        .def_readwrite("pathfinding_time", &SolveStats::pathfindingTime)
+        .def_readwrite("simulation_time", &SolveStats::simulationTime)
+        .def_readwrite("performed_actions", &SolveStats::performedActions)
+        .def_readwrite("replayed_actions", &SolveStats::replayedActions)
+        .def_readwrite("undo_calls", &SolveStats::undoCalls)
+        .def_readwrite("undone_actions", &SolveStats::undoneActions)
+        .def_readwrite("derived_room_calls", &SolveStats::derivedRoomCalls)
+        .def_readwrite("derived_room_time", &SolveStats::derivedRoomTime)
+        .def_readwrite("peak_frontier_size", &SolveStats::peakFrontierSize)
+        .def_readwrite("peak_explored_size", &SolveStats::peakExploredSize);
+
+    pybind11::enum_<SearchStrategy>(m, "SearchStrategy")
+        .value("BEST_FIRST", SearchStrategy::BEST_FIRST)
+        .value("WEIGHTED_A_STAR", SearchStrategy::WEIGHTED_A_STAR)
+        .value("BEAM", SearchStrategy::BEAM)
+        .value("IDA_STAR", SearchStrategy::IDA_STAR);
+    pybind11::class_<SearchSettings>(m, "SearchSettings", R"docstr(
+Settings for how a searcher searches. See the searchers for details.
+
+Parameters
+----------
+strategy
+    How to choose the next node to expand.
+weight
+    The heuristic weight for WEIGHTED_A_STAR and IDA_STAR.
+beam_width
+    The number of nodes to keep at each depth for BEAM.
+explored_limit
+    If set, give up when more than this many states have been explored.
+frontier_limit
+    If set, drop the worst nodes from the frontier when it grows larger
+    than this.
+)docstr")
+        .def(pybind11::init<SearchStrategy, double, int, std::optional<int>, std::optional<int>>(),
+             pybind11::arg("strategy") = SearchStrategy::BEST_FIRST,
+             pybind11::arg("weight") = 1,
+             pybind11::arg("beam_width") = 100,
+             pybind11::arg("explored_limit") = std::nullopt,
+             pybind11::arg("frontier_limit") = std::nullopt)
+        .def_readwrite("strategy", &SearchSettings::strategy)
+        .def_readwrite("weight", &SearchSettings::weight)
+        .def_readwrite("beam_width", &SearchSettings::beamWidth)
+        .def_readwrite("explored_limit", &SearchSettings::exploredLimit)
+        .def_readwrite("frontier_limit", &SearchSettings::frontierLimit);
 
     addSearcher<Position, Action>(m, "SearcherPositionAction", "ProblemPositionAction", "SolutionPositionAction");
     addSearcher<DerivedRoom, Objective>(m, "SearcherDerivedRoomObjective", "ProblemDerivedRoomObjective", "SolutionDerivedRoomObjective");
     addSearcher<DerivedRoom, Action>(m, "SearcherDerivedRoomAction", "ProblemDerivedRoomAction", "SolutionDerivedRoomAction");
+    addSearcher<LevelPosition, RoomExit>(m, "SearcherLevelPositionRoomExit", "ProblemLevelPositionRoomExit", "SolutionLevelPositionRoomExit");
 
     pybind11::class_<PathfindingProblem, Problem<Position, Action>>(m, "PathfindingProblem", R"docstr(
 A problem for finding a path in a room.
@@ -504,10 +836,15 @@ objective_reacher
     An objective reacher to keep track of the direct solutions.
     Can be used to put together a complete solution from the
     high-level steps.
+prune_orb_strikes
+    Whether to skip striking orbs that don't change the region the player
+    can walk in. This makes the search smaller, but can miss solutions
+    where a door only matters after walking through another one.
 )docstr")
-        .def(pybind11::init<Objective, ObjectiveReacher *>(),
+        .def(pybind11::init<Objective, ObjectiveReacher *, bool>(),
              pybind11::arg("objective"),
-             pybind11::arg("objective_reacher"));
+             pybind11::arg("objective_reacher"),
+             pybind11::arg("prune_orb_strikes") = false);
     pybind11::class_<DerivedRoomProblem, Problem<DerivedRoom, Action>>(m, "DerivedRoomProblem", R"docstr(
 A problem for reaching an objective in a room.
 
@@ -519,11 +856,103 @@ starting_room
     The room to start searching from.
 objective
     The objective.
+idle_pruning_radius
+    If set, don't wait when there are no monsters within this distance
+    of the player, and don't turn if there are also no orbs within it and
+    the objective is only to reach tiles.
+macro_action_radius
+    If set and the objective is only to reach tiles, moves toward the
+    objective continue along the shortest path over plain floor, as long
+    as no monsters are within this distance of the player. The resulting
+    states then have more than one action more than the previous ones.
 )docstr")
-        .def(pybind11::init<RoomPlayer *, DerivedRoom, Objective>(),
+        .def(pybind11::init<AbstractRoomPlayer *, DerivedRoom, Objective, std::optional<int>, std::optional<int>>(),
              pybind11::arg("room_player"),
              pybind11::arg("starting_room"),
-             pybind11::arg("objective"));
+             pybind11::arg("objective"),
+             pybind11::arg("idle_pruning_radius") = std::nullopt,
+             pybind11::arg("macro_action_radius") = std::nullopt);
+    pybind11::class_<LevelPathfindingProblem, Problem<LevelPosition, RoomExit>>(m, "LevelPathfindingProblem", R"docstr(
+A problem for finding a path through a level, to a room where a goal tile can be reached.
+
+The states are positions in the level, as ((room_x, room_y), (tile_x, tile_y)),
+and the actions are room exits, as (tile_from, movement_action, resulting_position).
+Rooms are solved as needed, and the solutions are cached.
+
+Parameters
+----------
+current_room_position
+    The position of the current room in the level.
+current_room
+    The current room, as it looks now.
+rooms
+    All rooms in the level, indexed by position.
+goals
+    The goal tiles, as ((room_x, room_y), (tile_x, tile_y)).
+transits
+    Whether rooms can be crossed, from earlier searches in the same level.
+    A dict from (room_position, entrance_tile, exit_tile) to a bool.
+)docstr")
+        .def(pybind11::init<RoomPosition, Room, std::map<RoomPosition, Room>, std::set<LevelPosition>, std::map<Transit, bool>>(),
+             pybind11::arg("current_room_position"),
+             pybind11::arg("current_room"),
+             pybind11::arg("rooms"),
+             pybind11::arg("goals"),
+             pybind11::arg("transits") = std::map<Transit, bool>())
+        .def("solve_current_room", &LevelPathfindingProblem::solveCurrentRoom, R"docstr(
+Find the actions to reach a goal tile without leaving the current room.
+
+This is often all that is needed. Call it before creating a searcher,
+since that already solves the way to every exit of the current room.
+
+Returns
+-------
+A list of actions that result in reaching a goal tile, or None if
+there are no reachable goal tiles in the current room.
+)docstr")
+        .def("expand_solution", &LevelPathfindingProblem::expandSolution, pybind11::arg("solution"), R"docstr(
+Get the detailed actions for a solution.
+
+Parameters
+----------
+solution
+    The room exits in a solution found by a searcher.
+
+Returns
+-------
+A list of actions that result in reaching a goal tile, or None if
+a room cannot be crossed with the direction we actually face.
+)docstr")
+        .def("get_solved_rooms", &LevelPathfindingProblem::getSolvedRooms, R"docstr(
+Get the rooms that were solved while searching.
+
+Returns
+-------
+A list of (room, objective) tuples.
+)docstr")
+        .def("get_transits", &LevelPathfindingProblem::getTransits, R"docstr(
+Get whether rooms can be crossed, including what was found while searching.
+
+Rooms that could not be crossed are not included, since that may be
+because of the iteration limit, the budget or the made-up direction.
+
+Returns
+-------
+A dict from (room_position, entrance_tile, exit_tile) to a bool.
+)docstr")
+        .def("set_budget", &LevelPathfindingProblem::setBudget, pybind11::arg("budget"),
+             pybind11::keep_alive<1, 2>(), R"docstr(
+Set a budget for the searches when solving rooms.
+
+When it runs out, no more rooms are solved, and rooms that failed
+because of it are not cached. Set it before creating the searcher, since
+that already solves rooms.
+
+Parameters
+----------
+budget
+    The budget, or None for no budget.
+)docstr");
 
     pybind11::enum_<ObjectiveReacherPhase>(m, "ObjectiveReacherPhase")
         .value("NOTHING", ObjectiveReacherPhase::NOTHING)
@@ -533,18 +962,72 @@ objective
         .value("FINISHED", ObjectiveReacherPhase::FINISHED)
         .export_values();
 
+    pybind11::class_<ObjectiveReacherCacheStats>(m, "ObjectiveReacherCacheStats", R"docstr(
+Statistics about the solutions cached by an ObjectiveReacher.
+
+Attributes
+----------
+entries
+    The number of cached solutions.
+bytes
+    Approximately how much memory the cached solutions use.
+hits
+    The number of lookups that found a solution.
+misses
+    The number of lookups that didn't find a solution.
+evictions
+    The number of solutions removed to keep the cache within its limits.
+)docstr")
+        .def_readonly("entries", &ObjectiveReacherCacheStats::entries)
+        .def_readonly("bytes", &ObjectiveReacherCacheStats::bytes)
+        .def_readonly("hits", &ObjectiveReacherCacheStats::hits)
+        .def_readonly("misses", &ObjectiveReacherCacheStats::misses)
+        .def_readonly("evictions", &ObjectiveReacherCacheStats::evictions);
+
     pybind11::class_<ObjectiveReacher>(m, "ObjectiveReacher", R"docstr(
 Find solutions to directly reach objectives in a room.
 
 Finding a solution is done through several phases and sanity checks,
-for efficiency. Also caches found solutions.
+for efficiency. Also caches found solutions, removing the least recently
+used ones if the cache has limits. Solutions that are removed are
+searched for again if they are needed, which fails if the budget has
+run out.
 
 Parameters
 ----------
 room
     The room to find solutions in.
+idle_pruning_radius
+    If set, don't wait or turn when simulating the room if there is nothing
+    within this distance of the player that it could affect. See
+    DerivedRoomProblem.
+macro_action_radius
+    If set, walk along shortest paths as single search actions when
+    there are no monsters within this distance of the player. See
+    DerivedRoomProblem.
+fast_simulation
+    Whether to play the room with FastRoomPlayer instead of DRODLib, if
+    it supports the room. See FastRoomPlayer for why this is off by default.
+simulation_search_settings
+    How to search when simulating the room.
+starts
+    If given, play the room from these (position, direction) starts
+    instead of where the player is. See MultiStartRoomPlayer.
+cache_max_entries
+    If set, cache at most this many solutions.
+cache_max_bytes
+    If set, keep the cached solutions within approximately this many bytes.
 )docstr")
-        .def(pybind11::init<Room>(), pybind11::arg("room"))
+        .def(pybind11::init<Room, std::optional<int>, std::optional<int>, bool, SearchSettings,
+                            std::vector<std::tuple<Position, Direction>>, std::optional<int>, std::optional<long>>(),
+             pybind11::arg("room"),
+             pybind11::arg("idle_pruning_radius") = std::nullopt,
+             pybind11::arg("macro_action_radius") = std::nullopt,
+             pybind11::arg("fast_simulation") = false,
+             pybind11::arg("simulation_search_settings") = SearchSettings(),
+             pybind11::arg("starts") = std::vector<std::tuple<Position, Direction>>(),
+             pybind11::arg("cache_max_entries") = std::nullopt,
+             pybind11::arg("cache_max_bytes") = std::nullopt)
         .def("get_room_player",
              &ObjectiveReacher::getRoomPlayer,
              pybind11::return_value_policy::reference,
@@ -555,7 +1038,7 @@ Returns
 -------
 The room player.
 )docstr")
-        .def("find_solution", &ObjectiveReacher::findSolution, pybind11::arg("room"), pybind11::arg("objective"), R"docstr(
+        .def("find_solution", &ObjectiveReacher::findSolution, pybind11::arg("room"), pybind11::arg("objective"), pybind11::call_guard<pybind11::gil_scoped_release>(), R"docstr(
 Find a solution to reach the given objective in the given room.
 
 This is all you need when using this class normally. The other methods are for
@@ -578,7 +1061,7 @@ room
 objective
     The objective to reach. 
 )docstr")
-        .def("next_phase", &ObjectiveReacher::nextPhase, R"docstr(
+        .def("next_phase", &ObjectiveReacher::nextPhase, pybind11::call_guard<pybind11::gil_scoped_release>(), R"docstr(
 Go to the next phase.
 )docstr")
         .def("get_phase", &ObjectiveReacher::getPhase, R"docstr(
@@ -618,5 +1101,45 @@ This may not exist, depending on the phase. If not, throw an exception.
 Returns
 -------
 The room simulation searcher.
+)docstr")
+        .def("set_budget", &ObjectiveReacher::setBudget, pybind11::arg("budget"),
+             pybind11::keep_alive<1, 2>(), R"docstr(
+Set a budget for the searches when finding solutions.
+
+When it runs out, no new searches are started and failed solutions
+are not cached.
+
+Parameters
+----------
+budget
+    The budget, or None for no budget.
+)docstr")
+        .def("set_stats", &ObjectiveReacher::setStats, pybind11::arg("stats"),
+             pybind11::keep_alive<1, 2>(), R"docstr(
+Set stats to record what the searches and the room player do in.
+
+Parameters
+----------
+stats
+    The stats, or None to not record stats.
+)docstr")
+        .def("get_cache_stats", &ObjectiveReacher::getCacheStats, R"docstr(
+Get statistics about the cached solutions.
+
+Returns
+-------
+An ObjectiveReacherCacheStats.
+)docstr")
+        .def("set_cache_limits", &ObjectiveReacher::setCacheLimits,
+             pybind11::arg("max_entries") = std::nullopt,
+             pybind11::arg("max_bytes") = std::nullopt, R"docstr(
+Limit the size of the cache, removing solutions if it's already too big.
+
+Parameters
+----------
+max_entries
+    If set, cache at most this many solutions.
+max_bytes
+    If set, keep the cached solutions within approximately this many bytes.
 )docstr");
 }
\ No newline at end of file
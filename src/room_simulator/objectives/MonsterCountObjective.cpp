@@ -24,7 +24,7 @@ bool MonsterCountObjective::operator<(const MonsterCountObjective other) const
     }
     if (this->monsterType != other.monsterType)
     {
-        return this->area < other.area;
+        return this->monsterType < other.monsterType;
     }
     if (this->area != other.area)
     {
@@ -1,4 +1,6 @@
 #include <stdexcept>
+#include <cstdint>
+#include <set>
 
 #include "Objective.h"
 #include "../Room.h"
@@ -47,4 +49,63 @@ int objectiveHeuristic(Objective objective, DerivedRoom room)
         return obj->heuristic(room);
     }
     throw std::invalid_argument("Unknown objective type");
+}
+
+// Helper function to mix a value into a hash
+uint64_t hashCombine(uint64_t hash, uint64_t value)
+{
+    return hash ^ (value + 0x9e3779b97f4a7c15 + (hash << 6) + (hash >> 2));
+}
+
+// Helper function to hash a set of tiles
+uint64_t tilesHash(uint64_t hash, const std::set<Position> &tiles)
+{
+    hash = hashCombine(hash, tiles.size());
+    for (auto it = tiles.begin(); it != tiles.end(); ++it)
+    {
+        hash = hashCombine(hash, std::get<0>(*it) << 8 | std::get<1>(*it));
+    }
+    return hash;
+}
+
+// Hash an objective, for looking it up in hash maps. Objectives that are
+// equal according to objectivesEqual() have the same hash.
+uint64_t objectiveHash(const Objective &objective)
+{
+    uint64_t hash = hashCombine(0, objective.index());
+    if (const ReachObjective *obj = std::get_if<ReachObjective>(&objective))
+    {
+        return tilesHash(hash, obj->tiles);
+    }
+    else if (const StabObjective *obj = std::get_if<StabObjective>(&objective))
+    {
+        return tilesHash(hash, obj->tiles);
+    }
+    else if (const MonsterCountObjective *obj = std::get_if<MonsterCountObjective>(&objective))
+    {
+        hash = hashCombine(hash, obj->monsters);
+        hash = hashCombine(hash, obj->allowLess);
+        hash = hashCombine(hash, obj->monsterType ? (uint64_t)obj->monsterType.value() + 1 : 0);
+        if (obj->area)
+        {
+            hash = tilesHash(hash, obj->area.value());
+        }
+        return hash;
+    }
+    else if (const OrObjective *obj = std::get_if<OrObjective>(&objective))
+    {
+        for (auto it = obj->objectives.begin(); it != obj->objectives.end(); ++it)
+        {
+            hash = hashCombine(hash, objectiveHash(*it));
+        }
+        return hash;
+    }
+    throw std::invalid_argument("Unknown objective type");
+}
+
+// The objectives only define operator<, so they are equal if neither is
+// less than the other
+bool objectivesEqual(const Objective &first, const Objective &second)
+{
+    return !(first < second) && !(second < first);
 }
\ No newline at end of file
@@ -16,4 +16,8 @@ bool objectiveFulfilled(Objective objective, DerivedRoom room);
 
 int objectiveHeuristic(Objective objective, DerivedRoom room);
 
+uint64_t objectiveHash(const Objective &objective);
+
+bool objectivesEqual(const Objective &first, const Objective &second);
+
 #endif // DRODBOT_OBJECTIVE_H
\ No newline at end of file
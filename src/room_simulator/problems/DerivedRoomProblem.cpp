@@ -1,20 +1,63 @@
 #include <tuple>
+#include <bitset>
 #include <map>
+#include <set>
+#include <unordered_map>
+#include <vector>
+#include <algorithm>
+#include <optional>
+#include <stdlib.h>
 #include "../Room.h"
+#include "../DistanceField.h"
 #include "../objectives/Objective.h"
 #include "../typedefs.h"
 #include "../search/Problem.h"
-#include "../RoomPlayer.h"
+#include "../AbstractRoomPlayer.h"
 #include "DerivedRoomProblem.h"
 #include "../utils.h"
 
-DerivedRoomProblem::DerivedRoomProblem(RoomPlayer *roomPlayer,
+DerivedRoomProblem::DerivedRoomProblem(AbstractRoomPlayer *roomPlayer,
                                        DerivedRoom startingRoom,
                                        Objective objective,
-                                       std::map<Position, int> heuristicTiles) : roomPlayer(roomPlayer),
-                                                                                 startingRoom(startingRoom),
-                                                                                 objective(objective),
-                                                                                 heuristicTiles(heuristicTiles){};
+                                       std::optional<int> idlePruningRadius,
+                                       std::optional<int> macroActionRadius) : roomPlayer(roomPlayer),
+                                                                               startingRoom(startingRoom),
+                                                                               objective(objective),
+                                                                               baseRoom(roomPlayer->getBaseRoom()),
+                                                                               tileSets({}),
+                                                                               objectiveTileSets({}),
+                                                                               monsterTileSets({}),
+                                                                               distanceFields({}),
+                                                                               idlePruningRadius(idlePruningRadius),
+                                                                               macroActionRadius(macroActionRadius),
+                                                                               reachTiles(std::nullopt),
+                                                                               reachTileSet(0),
+                                                                               orbs(this->baseRoom.findCoordinates(ElementType::ORB))
+{
+    this->addObjectiveTiles(objective);
+    if (ReachObjective *obj = std::get_if<ReachObjective>(&objective))
+    {
+        this->reachTiles = obj->tiles;
+    }
+    else if (OrObjective *obj = std::get_if<OrObjective>(&objective))
+    {
+        std::set<Position> tiles = {};
+        for (auto it = obj->objectives.begin(); it != obj->objectives.end(); ++it)
+        {
+            ReachObjective *subObjective = std::get_if<ReachObjective>(&*it);
+            if (!subObjective)
+            {
+                return;
+            }
+            tiles.insert(subObjective->tiles.begin(), subObjective->tiles.end());
+        }
+        this->reachTiles = tiles;
+    }
+    if (this->reachTiles)
+    {
+        this->reachTileSet = this->addTileSet(this->reachTiles.value());
+    }
+};
 
 DerivedRoom DerivedRoomProblem::initialState()
 {
@@ -23,16 +66,46 @@ DerivedRoom DerivedRoomProblem::initialState()
 
 std::vector<Action> DerivedRoomProblem::actions(DerivedRoom state)
 {
-    std::vector<Action> actions = state.getActions();
-    this->roomPlayer->setActions(actions);
-    return this->roomPlayer->getPossibleActions();
+    this->roomPlayer->setActions(state.getActionHistory());
+    std::vector<Action> actions = this->roomPlayer->getPossibleActions();
+    if (!this->idlePruningRadius)
+    {
+        return actions;
+    }
+    // Monsters are the only things that change over time, so if there are
+    // none nearby waiting just gives us another state that only differs in
+    // turn count. Turning only matters if the sword can hit something, which
+    // we can do later when we get close to it.
+    Position playerPosition = std::get<0>(state.findPlayer());
+    int radius = this->idlePruningRadius.value();
+    if (this->anyWithinRadius(state.findMonsterCoordinates(), playerPosition, radius))
+    {
+        return actions;
+    }
+    bool pruneTurning = this->reachTiles && !this->anyWithinRadius(this->orbs, playerPosition, radius);
+    std::vector<Action> prunedActions = {};
+    for (auto it = actions.begin(); it != actions.end(); ++it)
+    {
+        if (*it == Action::WAIT || (pruneTurning && (*it == Action::CW || *it == Action::CCW)))
+        {
+            continue;
+        }
+        prunedActions.push_back(*it);
+    }
+    return prunedActions;
 };
 
 DerivedRoom DerivedRoomProblem::result(DerivedRoom state, Action action)
 {
-    std::vector<Action> actions = state.getActions();
-    actions.push_back(action);
-    this->roomPlayer->setActions(actions);
+    if (this->macroActionRadius)
+    {
+        std::optional<DerivedRoom> macroRoom = this->macroResult(state, action);
+        if (macroRoom)
+        {
+            return macroRoom.value();
+        }
+    }
+    this->roomPlayer->setActions(state.getActionHistory().child(action));
     return this->roomPlayer->getDerivedRoom();
 }
 
@@ -46,15 +119,250 @@ int DerivedRoomProblem::stepCost(DerivedRoom state, Action action, DerivedRoom r
     return 1;
 }
 
+// Helper function to get the tiles next to some tiles
+static std::set<Position> tilesAround(std::set<Position> tiles)
+{
+    std::set<Position> around = {};
+    for (auto it = tiles.begin(); it != tiles.end(); ++it)
+    {
+        int x = std::get<0>(*it);
+        int y = std::get<1>(*it);
+        around.insert({{x + 1, y},
+                       {x + 1, y + 1},
+                       {x, y + 1},
+                       {x - 1, y + 1},
+                       {x - 1, y},
+                       {x - 1, y - 1},
+                       {x, y - 1},
+                       {x + 1, y - 1}});
+    }
+    return around;
+}
+
 int DerivedRoomProblem::heuristic(DerivedRoom state)
 {
-    Position playerPosition = std::get<0>(state.findPlayer());
-    auto iterator = this->heuristicTiles.find(playerPosition);
-    if (iterator != this->heuristicTiles.end())
+    int objectiveIndex = 0;
+    return this->objectiveDistance(this->objective, state, objectiveIndex);
+}
+
+// Find the tiles to walk to for the reach and stab objectives, in the same
+// order as objectiveDistance() visits them.
+void DerivedRoomProblem::addObjectiveTiles(Objective objective)
+{
+    if (ReachObjective *obj = std::get_if<ReachObjective>(&objective))
+    {
+        this->objectiveTileSets.push_back(this->addTileSet(obj->tiles));
+    }
+    else if (StabObjective *obj = std::get_if<StabObjective>(&objective))
+    {
+        // Stand next to the tiles
+        this->objectiveTileSets.push_back(this->addTileSet(tilesAround(obj->tiles)));
+    }
+    else if (OrObjective *obj = std::get_if<OrObjective>(&objective))
+    {
+        for (auto it = obj->objectives.begin(); it != obj->objectives.end(); ++it)
+        {
+            this->addObjectiveTiles(*it);
+        }
+    }
+}
+
+// Get the index of some tiles in tileSets, adding them if they aren't there.
+int DerivedRoomProblem::addTileSet(std::set<Position> tiles)
+{
+    auto iterator = std::find(this->tileSets.begin(), this->tileSets.end(), tiles);
+    if (iterator != this->tileSets.end())
+    {
+        return iterator - this->tileSets.begin();
+    }
+    this->tileSets.push_back(tiles);
+    this->distanceFields.push_back({});
+    return this->tileSets.size() - 1;
+}
+
+// The distance to walk to reach or stab the objective tiles, or to get next
+// to a monster for monster count objectives. Other objectives use their own
+// heuristic. objectiveIndex counts the reach and stab objectives visited so
+// far.
+int DerivedRoomProblem::objectiveDistance(Objective objective, DerivedRoom state, int &objectiveIndex)
+{
+    if (std::holds_alternative<ReachObjective>(objective) || std::holds_alternative<StabObjective>(objective))
     {
-        return std::get<1>(*iterator);
+        int tileSetIndex = this->objectiveTileSets[objectiveIndex];
+        objectiveIndex += 1;
+        return this->distanceToTileSet(tileSetIndex, state);
     }
-    // If we're not in a heuristicTile, use the objective's heuristic.
-    // Add a penalty to make it prefer the heuristicTiles.
-    return objectiveHeuristic(this->objective, state) + 100;
-}
\ No newline at end of file
+    else if (OrObjective *obj = std::get_if<OrObjective>(&objective))
+    {
+        int closestDistance = DistanceField::UNREACHABLE;
+        for (auto it = obj->objectives.begin(); it != obj->objectives.end(); ++it)
+        {
+            closestDistance = std::min(closestDistance, this->objectiveDistance(*it, state, objectiveIndex));
+        }
+        return closestDistance;
+    }
+    else if (MonsterCountObjective *obj = std::get_if<MonsterCountObjective>(&objective))
+    {
+        return this->monsterDistance(*obj, state);
+    }
+    return objectiveHeuristic(objective, state);
+}
+
+// Like MonsterCountObjective::heuristic(), but with the distance to walk to
+// stand next to the closest monster instead of the distance from the sword.
+// Monsters move, so there is a tile set for each tile a monster has been seen
+// on. If no monster can be reached, fall back to the objective's heuristic.
+int DerivedRoomProblem::monsterDistance(MonsterCountObjective objective, DerivedRoom state)
+{
+    std::vector<Position> monsters = state.findMonsterCoordinates(objective.monsterType, objective.area);
+    if (monsters.empty())
+    {
+        return objective.heuristic(state);
+    }
+    int closestDistance = DistanceField::UNREACHABLE;
+    for (auto it = monsters.begin(); it != monsters.end(); ++it)
+    {
+        auto iterator = this->monsterTileSets.find(*it);
+        if (iterator == this->monsterTileSets.end())
+        {
+            iterator = this->monsterTileSets.insert({*it, this->addTileSet(tilesAround({*it}))}).first;
+        }
+        closestDistance = std::min(closestDistance, this->distanceToTileSet(iterator->second, state));
+    }
+    if (closestDistance == DistanceField::UNREACHABLE)
+    {
+        return objective.heuristic(state);
+    }
+    int monsterCount = monsters.size();
+    return closestDistance + 10 * (monsterCount - objective.monsters);
+}
+
+// Look up the distance from the player to the nearest tile in a tile set.
+int DerivedRoomProblem::distanceToTileSet(int tileSetIndex, DerivedRoom state)
+{
+    return this->getDistanceField(tileSetIndex, state)->getDistance(std::get<0>(state.findPlayer()));
+}
+
+// Get the distance field for a tile set, with the doors in the given state.
+// The distance field is computed the first time the tiles and door states
+// are seen.
+DistanceField *DerivedRoomProblem::getDistanceField(int tileSetIndex, DerivedRoom state)
+{
+    std::unordered_map<std::bitset<38 * 32>, DistanceField> &fields = this->distanceFields[tileSetIndex];
+    std::bitset<38 * 32> key = state.getToggledDoorBits();
+    auto iterator = fields.find(key);
+    if (iterator == fields.end())
+    {
+        std::set<Position> toggledDoors = state.getToggledDoors();
+        Room room = this->baseRoom.copy();
+        for (auto it = toggledDoors.begin(); it != toggledDoors.end(); ++it)
+        {
+            Tile tile = room.getTile(*it);
+            tile.roomPiece = Element(tile.roomPiece.type == ElementType::YELLOW_DOOR
+                                         ? ElementType::YELLOW_DOOR_OPEN
+                                         : ElementType::YELLOW_DOOR);
+            room.setTile(*it, tile);
+        }
+        iterator = fields.insert({key, DistanceField(room, this->tileSets[tileSetIndex])}).first;
+    }
+    return &iterator->second;
+}
+
+// If the action is a move toward the objective and there are no monsters
+// nearby, keep walking along the shortest path until reaching the objective
+// or something that isn't plain floor. All the moves are played in one go,
+// and if the result isn't what we expected (the player is somewhere else,
+// died, or monsters came close), this returns std::nullopt so the action is
+// done as a single step instead. The sword may also hit an orb on the way,
+// so the doors must not have changed either.
+std::optional<DerivedRoom> DerivedRoomProblem::macroResult(DerivedRoom state, Action action)
+{
+    if (!this->reachTiles || action == Action::WAIT || action == Action::CW || action == Action::CCW)
+    {
+        return std::nullopt;
+    }
+    int radius = this->macroActionRadius.value();
+    Position position = std::get<0>(state.findPlayer());
+    if (this->anyWithinRadius(state.findMonsterCoordinates(), position, radius))
+    {
+        return std::nullopt;
+    }
+    DistanceField *distanceField = this->getDistanceField(this->reachTileSet, state);
+    std::vector<Action> moves = {action};
+    Position nextPosition = movePosition(position, action);
+    if (!this->isPlainFloor(nextPosition) ||
+        distanceField->getDistance(nextPosition) >= distanceField->getDistance(position))
+    {
+        return std::nullopt;
+    }
+    position = nextPosition;
+    std::vector<Action> directions = {Action::N, Action::NE, Action::E, Action::SE,
+                                      Action::S, Action::SW, Action::W, Action::NW};
+    while (distanceField->getDistance(position) > 0)
+    {
+        int distance = distanceField->getDistance(position);
+        auto nextMove = std::find_if(directions.begin(), directions.end(),
+                                     [&](Action move)
+                                     {
+                                         Position candidate = movePosition(position, move);
+                                         return this->isPlainFloor(candidate) &&
+                                                distanceField->getDistance(candidate) == distance - 1;
+                                     });
+        if (nextMove == directions.end())
+        {
+            break;
+        }
+        moves.push_back(*nextMove);
+        position = movePosition(position, *nextMove);
+    }
+    if (moves.size() == 1)
+    {
+        // Nothing to gain over a single step
+        return std::nullopt;
+    }
+    ActionHistory history = state.getActionHistory();
+    for (auto it = moves.begin(); it != moves.end(); ++it)
+    {
+        history = history.child(*it);
+    }
+    this->roomPlayer->setActions(history);
+    DerivedRoom result = this->roomPlayer->getDerivedRoom();
+    if (result.playerIsDead() ||
+        std::get<0>(result.findPlayer()) != position ||
+        result.getToggledDoors() != state.getToggledDoors() ||
+        this->anyWithinRadius(result.findMonsterCoordinates(), position, radius))
+    {
+        return std::nullopt;
+    }
+    return result;
+}
+
+// Whether a tile is floor with nothing on it, so walking over it doesn't
+// change anything
+bool DerivedRoomProblem::isPlainFloor(Position position)
+{
+    int x = std::get<0>(position);
+    int y = std::get<1>(position);
+    if (x < 0 || x >= 38 || y < 0 || y >= 32)
+    {
+        return false;
+    }
+    Tile tile = this->baseRoom.getTile(position);
+    return tile.roomPiece.type == ElementType::FLOOR &&
+           tile.floorControl.type == ElementType::NOTHING &&
+           tile.checkpoint.type == ElementType::NOTHING &&
+           tile.item.type == ElementType::NOTHING;
+}
+
+bool DerivedRoomProblem::anyWithinRadius(std::vector<Position> positions, Position center, int radius)
+{
+    for (auto it = positions.begin(); it != positions.end(); ++it)
+    {
+        if (std::abs(std::get<0>(*it) - std::get<0>(center)) <= radius &&
+            std::abs(std::get<1>(*it) - std::get<1>(center)) <= radius)
+        {
+            return true;
+        }
+    }
+    return false;
+}
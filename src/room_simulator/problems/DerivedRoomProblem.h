@@ -1,21 +1,28 @@
 #ifndef DRODBOT_DERIVEDROOMPROBLEM_H
 #define DRODBOT_DERIVEDROOMPROBLEM_H
 
+#include <bitset>
 #include <map>
+#include <set>
+#include <unordered_map>
+#include <vector>
+#include <optional>
 #include "../Room.h"
 #include "../DerivedRoom.h"
+#include "../DistanceField.h"
 #include "../objectives/Objective.h"
 #include "../typedefs.h"
 #include "../search/Problem.h"
-#include "../RoomPlayer.h"
+#include "../AbstractRoomPlayer.h"
 
 class DerivedRoomProblem final : public Problem<DerivedRoom, Action>
 {
 public:
-    DerivedRoomProblem(RoomPlayer *roomPlayer,
+    DerivedRoomProblem(AbstractRoomPlayer *roomPlayer,
                        DerivedRoom startingRoom,
                        Objective objective,
-                       std::map<Position, int> heuristicTiles = {});
+                       std::optional<int> idlePruningRadius = std::nullopt,
+                       std::optional<int> macroActionRadius = std::nullopt);
     DerivedRoom initialState();
     std::vector<Action> actions(DerivedRoom state);
     DerivedRoom result(DerivedRoom state, Action action);
@@ -24,10 +31,44 @@ public:
     int heuristic(DerivedRoom state);
 
 private:
-    RoomPlayer *roomPlayer;
+    void addObjectiveTiles(Objective objective);
+    int addTileSet(std::set<Position> tiles);
+    int objectiveDistance(Objective objective, DerivedRoom state, int &objectiveIndex);
+    int monsterDistance(MonsterCountObjective objective, DerivedRoom state);
+    int distanceToTileSet(int tileSetIndex, DerivedRoom state);
+    DistanceField *getDistanceField(int tileSetIndex, DerivedRoom state);
+    std::optional<DerivedRoom> macroResult(DerivedRoom state, Action action);
+    bool isPlainFloor(Position position);
+    bool anyWithinRadius(std::vector<Position> positions, Position center, int radius);
+
+    AbstractRoomPlayer *roomPlayer;
     DerivedRoom startingRoom;
     Objective objective;
-    std::map<Position, int> heuristicTiles;
+    Room baseRoom;
+    // The different sets of tiles we need distances to
+    std::vector<std::set<Position>> tileSets;
+    // The index in tileSets for each reach and stab objective in the
+    // objective, in the order objectiveDistance() visits them. Stab
+    // objectives use the tiles next to the ones to stab.
+    std::vector<int> objectiveTileSets;
+    // The index in tileSets for the tiles next to each tile a monster has
+    // been on, for monster count objectives
+    std::map<Position, int> monsterTileSets;
+    // Distance fields for each tile set by toggled doors, since the doors are
+    // the only obstacles that change when playing a room
+    std::vector<std::unordered_map<std::bitset<38 * 32>, DistanceField>> distanceFields;
+    // If set, don't wait or turn when there is nothing within this distance
+    // that waiting or turning could affect
+    std::optional<int> idlePruningRadius;
+    // If set, moves toward the objective are continued along the shortest
+    // path while there are no monsters within this distance
+    std::optional<int> macroActionRadius;
+    // The tiles to reach, if the objective is only about reaching tiles.
+    // Otherwise the sword direction may matter for the objective itself.
+    std::optional<std::set<Position>> reachTiles;
+    // The index of reachTiles in tileSets
+    int reachTileSet;
+    std::vector<Position> orbs;
 };
 
 #endif // DRODBOT_DERIVEDROOMPROBLEM_H
\ No newline at end of file
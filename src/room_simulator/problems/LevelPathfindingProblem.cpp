@@ -0,0 +1,361 @@
+#include <vector>
+#include <map>
+#include <set>
+#include <optional>
+#include <stdlib.h>
+#include "../Room.h"
+#include "../DerivedRoom.h"
+#include "../typedefs.h"
+#include "../objectives/Objective.h"
+#include "../objectives/ReachObjective.h"
+#include "../search/Problem.h"
+#include "../search/Searcher.h"
+#include "../ObjectiveReacher.h"
+#include "PlanningProblem.h"
+#include "LevelPathfindingProblem.h"
+
+// A problem to find a path through a level.
+//
+// This optimizes for the lowest number of room crossings, not the lowest
+// number of total moves. It also does not handle the cases where the ability
+// to cross a room depends on the initial direction, since we make up the
+// direction we're facing when entering a room.
+LevelPathfindingProblem::LevelPathfindingProblem(
+    RoomPosition currentRoomPosition,
+    Room currentRoom,
+    std::map<RoomPosition, Room> rooms,
+    std::set<LevelPosition> goals,
+    std::map<Transit, bool> transits) : currentRoomPosition(currentRoomPosition),
+                                        currentRoom(currentRoom),
+                                        rooms(rooms),
+                                        goals({}),
+                                        cachedExits({}),
+                                        transits(transits),
+                                        objectiveReachers({}),
+                                        cachedSolutions({}),
+                                        solvedRooms({}),
+                                        budget(nullptr)
+{
+    for (auto it = goals.begin(); it != goals.end(); ++it)
+    {
+        this->goals[std::get<0>(*it)].insert(std::get<1>(*it));
+    }
+}
+
+LevelPathfindingProblem::~LevelPathfindingProblem()
+{
+    for (auto it = this->objectiveReachers.begin(); it != this->objectiveReachers.end(); ++it)
+    {
+        delete it->second;
+    }
+}
+
+LevelPosition LevelPathfindingProblem::initialState()
+{
+    return {this->currentRoomPosition, std::get<0>(this->currentRoom.findPlayer())};
+}
+
+std::vector<RoomExit> LevelPathfindingProblem::actions(LevelPosition state)
+{
+    Direction direction = this->searchDirection(state);
+    std::vector<RoomExit> exits = this->getRoomExits(std::get<0>(state));
+    std::vector<RoomExit> possibleExits = {};
+    for (auto it = exits.begin(); it != exits.end(); ++it)
+    {
+        Position exitTile = std::get<0>(*it);
+        // The current room doesn't look like the room in the level, so
+        // transits through it can't be reused
+        if (state == this->initialState())
+        {
+            if (this->solveRoom(state, direction, {exitTile}))
+            {
+                possibleExits.push_back(*it);
+            }
+            continue;
+        }
+        // Only remember rooms that can be crossed. Failing to cross a room
+        // with the made-up direction, within the iteration limit or before the
+        // budget ran out doesn't mean it can't be crossed. The failure is still
+        // cached in cachedSolutions for the rest of this search.
+        Transit transit = {std::get<0>(state), std::get<1>(state), exitTile};
+        auto transitIterator = this->transits.find(transit);
+        if (transitIterator != this->transits.end() && transitIterator->second)
+        {
+            possibleExits.push_back(*it);
+        }
+        else if (this->solveRoom(state, direction, {exitTile}))
+        {
+            this->transits[transit] = true;
+            possibleExits.push_back(*it);
+        }
+    }
+    return possibleExits;
+}
+
+LevelPosition LevelPathfindingProblem::result(LevelPosition state, RoomExit action)
+{
+    return std::get<2>(action);
+}
+
+bool LevelPathfindingProblem::goalTest(LevelPosition state)
+{
+    auto goalIterator = this->goals.find(std::get<0>(state));
+    if (goalIterator == this->goals.end())
+    {
+        return false;
+    }
+    return this->solveRoom(state, this->searchDirection(state), goalIterator->second).has_value();
+}
+
+int LevelPathfindingProblem::stepCost(LevelPosition state, RoomExit action, LevelPosition result)
+{
+    return 1;
+}
+
+int LevelPathfindingProblem::heuristic(LevelPosition state)
+{
+    // Number of rooms to the nearest room with a goal, disregarding whether
+    // the rooms in between exist
+    int x = std::get<0>(std::get<0>(state));
+    int y = std::get<1>(std::get<0>(state));
+    std::optional<int> closestDistance = std::nullopt;
+    for (auto it = this->goals.begin(); it != this->goals.end(); ++it)
+    {
+        int goalX = std::get<0>(it->first);
+        int goalY = std::get<1>(it->first);
+        int distance = std::abs(goalX - x) + std::abs(goalY - y);
+        if (!closestDistance || distance < closestDistance.value())
+        {
+            closestDistance = distance;
+        }
+    }
+    return closestDistance.value_or(0);
+}
+
+// Find the actions to reach a goal in the current room, if there is one that
+// can be reached without leaving it. This is the goal test for the initial
+// state, so the searcher will reuse the cached result.
+std::optional<std::vector<Action>> LevelPathfindingProblem::solveCurrentRoom()
+{
+    if (!this->goalTest(this->initialState()))
+    {
+        return std::nullopt;
+    }
+    return this->expandSolution({});
+}
+
+// Get the detailed actions for a solution found by the searcher. Since we
+// know which direction we are facing when entering each room, the rooms
+// are solved again with the correct direction if it differs from the one
+// we made up.
+std::optional<std::vector<Action>> LevelPathfindingProblem::expandSolution(std::vector<RoomExit> solution)
+{
+    std::vector<Action> detailedActions = {};
+    LevelPosition position = this->initialState();
+    Direction direction = std::get<1>(this->currentRoom.findPlayer());
+    for (auto it = solution.begin(); it != solution.end(); ++it)
+    {
+        auto roomSolution = this->solveRoom(position, direction, {std::get<0>(*it)});
+        if (!roomSolution)
+        {
+            return std::nullopt;
+        }
+        std::vector<Action> actions = std::get<0>(roomSolution.value());
+        detailedActions.insert(detailedActions.end(), actions.begin(), actions.end());
+        detailedActions.push_back(std::get<1>(*it));
+        direction = std::get<1>(roomSolution.value());
+        position = std::get<2>(*it);
+    }
+    // Find the path to the goal in the last room
+    auto goalIterator = this->goals.find(std::get<0>(position));
+    if (goalIterator == this->goals.end())
+    {
+        return std::nullopt;
+    }
+    auto roomSolution = this->solveRoom(position, direction, goalIterator->second);
+    if (!roomSolution)
+    {
+        return std::nullopt;
+    }
+    std::vector<Action> actions = std::get<0>(roomSolution.value());
+    detailedActions.insert(detailedActions.end(), actions.begin(), actions.end());
+    return detailedActions;
+}
+
+std::vector<std::tuple<Room, Objective>> LevelPathfindingProblem::getSolvedRooms()
+{
+    return this->solvedRooms;
+}
+
+std::map<Transit, bool> LevelPathfindingProblem::getTransits()
+{
+    return this->transits;
+}
+
+void LevelPathfindingProblem::setBudget(SearchBudget *budget)
+{
+    this->budget = budget;
+}
+
+// The direction to assume when searching. We know it in the current room,
+// but let's just make it up for other rooms for now.
+Direction LevelPathfindingProblem::searchDirection(LevelPosition position)
+{
+    if (position == this->initialState())
+    {
+        return std::get<1>(this->currentRoom.findPlayer());
+    }
+    return Direction::SE;
+}
+
+// Get a room with the player at the given position
+Room LevelPathfindingProblem::getRoom(LevelPosition position, Direction direction)
+{
+    if (position == this->initialState())
+    {
+        return this->currentRoom;
+    }
+    Room room = this->rooms.at(std::get<0>(position)).copy();
+    Position tilePosition = std::get<1>(position);
+    Tile tile = room.getTile(tilePosition);
+    tile.monster = Element(ElementType::BEETHRO, direction);
+    room.setTile(tilePosition, tile);
+    return room;
+}
+
+// Get all exits from a room to other known rooms. If an exit is wider than
+// one tile, only return the middle tile of it. This should match
+// Level.get_room_exits() in the Python code.
+std::vector<RoomExit> LevelPathfindingProblem::getRoomExits(RoomPosition roomPosition)
+{
+    auto cachedIterator = this->cachedExits.find(roomPosition);
+    if (cachedIterator != this->cachedExits.end())
+    {
+        return cachedIterator->second;
+    }
+    int roomX = std::get<0>(roomPosition);
+    int roomY = std::get<1>(roomPosition);
+    Room room = this->rooms.at(roomPosition);
+    // (target room, action, edge length, x or y in this room, x or y in the
+    // next room). -1 means the coordinate varies along the edge.
+    std::vector<std::tuple<RoomPosition, Action, int, Position, Position>> edges = {
+        {{roomX, roomY - 1}, Action::N, 38, {-1, 0}, {-1, 31}},
+        {{roomX + 1, roomY}, Action::E, 32, {37, -1}, {0, -1}},
+        {{roomX, roomY + 1}, Action::S, 38, {-1, 31}, {-1, 0}},
+        {{roomX - 1, roomY}, Action::W, 32, {0, -1}, {37, -1}},
+    };
+    std::vector<RoomExit> exits = {};
+    for (auto it = edges.begin(); it != edges.end(); ++it)
+    {
+        RoomPosition targetRoomPosition = std::get<0>(*it);
+        auto targetIterator = this->rooms.find(targetRoomPosition);
+        if (targetIterator == this->rooms.end())
+        {
+            continue;
+        }
+        Room targetRoom = targetIterator->second;
+        Action action = std::get<1>(*it);
+        int edgeLength = std::get<2>(*it);
+        Position current = std::get<3>(*it);
+        Position next = std::get<4>(*it);
+        auto alongEdge = [](Position edge, int n) -> Position
+        {
+            return {std::get<0>(edge) == -1 ? n : std::get<0>(edge),
+                    std::get<1>(edge) == -1 ? n : std::get<1>(edge)};
+        };
+        // Find continuous free regions, and use the middle of each
+        std::vector<int> region = {};
+        for (int n = 0; n <= edgeLength; n += 1)
+        {
+            Position currentTile = alongEdge(current, n);
+            Position nextTile = alongEdge(next, n);
+            if (n < edgeLength &&
+                room.isPassable(std::get<0>(currentTile), std::get<1>(currentTile)) &&
+                targetRoom.isPassable(std::get<0>(nextTile), std::get<1>(nextTile)))
+            {
+                region.push_back(n);
+            }
+            else if (region.size() > 0)
+            {
+                int middle = region[region.size() / 2];
+                exits.push_back({alongEdge(current, middle),
+                                 action,
+                                 {targetRoomPosition, alongEdge(next, middle)}});
+                region = {};
+            }
+        }
+    }
+    this->cachedExits[roomPosition] = exits;
+    return exits;
+}
+
+// Find the actions to reach some tiles in a room, and the direction we end up
+// facing. The player starts at the given position and direction.
+std::optional<std::tuple<std::vector<Action>, Direction>> LevelPathfindingProblem::solveRoom(
+    LevelPosition position,
+    Direction direction,
+    std::set<Position> tiles)
+{
+    std::tuple<LevelPosition, Direction, std::set<Position>> key = {position, direction, tiles};
+    auto cachedIterator = this->cachedSolutions.find(key);
+    if (cachedIterator != this->cachedSolutions.end())
+    {
+        return cachedIterator->second;
+    }
+    if (this->budget && this->budget->isExhausted())
+    {
+        return std::nullopt;
+    }
+    ObjectiveReacher *objectiveReacher;
+    auto reacherIterator = this->objectiveReachers.find({position, direction});
+    if (reacherIterator != this->objectiveReachers.end())
+    {
+        objectiveReacher = reacherIterator->second;
+    }
+    else
+    {
+        objectiveReacher = new ObjectiveReacher(this->getRoom(position, direction));
+        this->objectiveReachers[{position, direction}] = objectiveReacher;
+    }
+    Objective objective = ReachObjective(tiles);
+    PlanningProblem problem = PlanningProblem(objective, objectiveReacher);
+    // Set the budget before creating the searcher, since that already looks
+    // for solutions to sub-objectives
+    objectiveReacher->setBudget(this->budget);
+    Searcher<DerivedRoom, Objective> searcher = Searcher<DerivedRoom, Objective>(&problem);
+    searcher.setBudget(this->budget);
+    Solution<DerivedRoom, Objective> solution = searcher.findSolution();
+    // The solutions to the sub-objectives are cached, but make sure they
+    // can be put together even if the budget is gone
+    objectiveReacher->setBudget(nullptr);
+    if (!solution.exists && this->budget && this->budget->isExhausted())
+    {
+        return std::nullopt;
+    }
+    std::optional<std::tuple<std::vector<Action>, Direction>> result = std::nullopt;
+    if (solution.exists)
+    {
+        // Put together the solutions to the sub-objectives
+        objectiveReacher->getRoomPlayer()->setActions(std::vector<Action>());
+        DerivedRoom latestRoom = objectiveReacher->getRoomPlayer()->getDerivedRoom();
+        std::vector<Action> actions = {};
+        std::vector<Objective> subObjectives = solution.actions.value();
+        for (auto it = subObjectives.begin(); it != subObjectives.end(); ++it)
+        {
+            Solution<DerivedRoom, Action> subSolution = objectiveReacher->findSolution(latestRoom, *it);
+            if (!subSolution.exists)
+            {
+                // The solution was evicted and couldn't be found again. Don't
+                // cache this, since the room may still be solvable.
+                return std::nullopt;
+            }
+            std::vector<Action> subActions = subSolution.actions.value();
+            actions.insert(actions.end(), subActions.begin(), subActions.end());
+            latestRoom = subSolution.finalState.value();
+        }
+        result = {actions, std::get<1>(latestRoom.findPlayer())};
+        this->solvedRooms.push_back({this->getRoom(position, direction), objective});
+    }
+    this->cachedSolutions[key] = result;
+    return result;
+}
@@ -0,0 +1,74 @@
+#ifndef DRODBOT_LEVELPATHFINDINGPROBLEM_H
+#define DRODBOT_LEVELPATHFINDINGPROBLEM_H
+
+#include <vector>
+#include <map>
+#include <set>
+#include <optional>
+#include "../Room.h"
+#include "../typedefs.h"
+#include "../objectives/Objective.h"
+#include "../search/Problem.h"
+#include "../search/SearchBudget.h"
+#include "../ObjectiveReacher.h"
+
+// A way to cross a room, as (room position, entrance tile, exit tile)
+typedef std::tuple<RoomPosition, Position, Position> Transit;
+
+class LevelPathfindingProblem final : public Problem<LevelPosition, RoomExit>
+{
+public:
+    LevelPathfindingProblem(RoomPosition currentRoomPosition,
+                            Room currentRoom,
+                            std::map<RoomPosition, Room> rooms,
+                            std::set<LevelPosition> goals,
+                            std::map<Transit, bool> transits = {});
+    ~LevelPathfindingProblem();
+    LevelPosition initialState();
+    std::vector<RoomExit> actions(LevelPosition state);
+    LevelPosition result(LevelPosition state, RoomExit action);
+    bool goalTest(LevelPosition state);
+    int stepCost(LevelPosition state, RoomExit action, LevelPosition result);
+    int heuristic(LevelPosition state);
+    std::optional<std::vector<Action>> solveCurrentRoom();
+    std::optional<std::vector<Action>> expandSolution(std::vector<RoomExit> solution);
+    std::vector<std::tuple<Room, Objective>> getSolvedRooms();
+    std::map<Transit, bool> getTransits();
+    void setBudget(SearchBudget *budget);
+
+private:
+    Direction searchDirection(LevelPosition position);
+    Room getRoom(LevelPosition position, Direction direction);
+    std::vector<RoomExit> getRoomExits(RoomPosition roomPosition);
+    std::optional<std::tuple<std::vector<Action>, Direction>> solveRoom(LevelPosition position,
+                                                                        Direction direction,
+                                                                        std::set<Position> tiles);
+
+    RoomPosition currentRoomPosition;
+    Room currentRoom;
+    std::map<RoomPosition, Room> rooms;
+    // The goal tiles, grouped by room
+    std::map<RoomPosition, std::set<Position>> goals;
+    std::map<RoomPosition, std::vector<RoomExit>> cachedExits;
+    // Rooms that can be crossed, with the made-up direction. These may be
+    // known from earlier searches, so we don't need to solve the rooms again.
+    // Only crossings that were found are stored, since a failure may not be
+    // definitive.
+    std::map<Transit, bool> transits;
+    // One objective reacher per room entrance, so solutions to intermediate
+    // objectives are shared between everything we try to reach in that room
+    std::map<std::tuple<LevelPosition, Direction>, ObjectiveReacher *> objectiveReachers;
+    // The actions to reach some tiles from a room entrance, and the direction
+    // we end up facing. Unreachable tiles are cached as std::nullopt.
+    std::map<std::tuple<LevelPosition, Direction, std::set<Position>>,
+             std::optional<std::tuple<std::vector<Action>, Direction>>>
+        cachedSolutions;
+    // The rooms and objectives we have found solutions for, so they can be
+    // saved as test rooms
+    std::vector<std::tuple<Room, Objective>> solvedRooms;
+    // A budget for solving rooms, or nullptr for no budget. Rooms that fail
+    // because it ran out aren't cached, since they may be solvable.
+    SearchBudget *budget;
+};
+
+#endif // DRODBOT_LEVELPATHFINDINGPROBLEM_H
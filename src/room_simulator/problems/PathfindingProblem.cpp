@@ -7,13 +7,15 @@
 #include "../Room.h"
 #include "../typedefs.h"
 #include "../search/Problem.h"
+#include "../DistanceField.h"
 #include "PathfindingProblem.h"
 
 PathfindingProblem::PathfindingProblem(Position startPosition,
                                        Room room,
                                        std::set<Position> goals) : startPosition(startPosition),
                                                                    room(room),
-                                                                   goals(goals)
+                                                                   goals(goals),
+                                                                   distanceField(DistanceField(room, goals))
 {
 }
 
@@ -29,6 +31,11 @@ std::vector<Action> PathfindingProblem::actions(Position state)
     {
         return {};
     }
+    // No need to go anywhere if we can't reach a goal from here
+    if (!this->distanceField.isReachable(state))
+    {
+        return {};
+    }
     std::vector<Action> actions = {};
     int x = std::get<0>(state);
     int y = std::get<1>(state);
@@ -106,20 +113,6 @@ int PathfindingProblem::stepCost(Position state, Action action, Position result)
 
 int PathfindingProblem::heuristic(Position state)
 {
-    // Distance to nearest goal, disregarding obstacles
-    int x = std::get<0>(state);
-    int y = std::get<1>(state);
-    int closestDistance = 37; // Largest possible distance
-    typename std::set<Position>::iterator iterator;
-    for (iterator = this->goals.begin(); iterator != this->goals.end(); ++iterator)
-    {
-        int goalX = std::get<0>(*iterator);
-        int goalY = std::get<1>(*iterator);
-        int distance = std::max<int>(std::abs(goalX - x), std::abs(goalY - y));
-        if (distance < closestDistance)
-        {
-            closestDistance = distance;
-        }
-    }
-    return closestDistance;
+    // Distance to nearest goal, taking obstacles into account
+    return this->distanceField.getDistance(state);
 }
\ No newline at end of file
@@ -7,6 +7,7 @@
 #include "../Room.h"
 #include "../typedefs.h"
 #include "../search/Problem.h"
+#include "../DistanceField.h"
 
 class PathfindingProblem final : public Problem<Position, Action>
 {
@@ -23,6 +24,7 @@ private:
     Position startPosition;
     Room room;
     std::set<Position> goals;
+    DistanceField distanceField;
 };
 
 #endif // DRODBOT_PATHFINDINGPROBLEM_H
\ No newline at end of file
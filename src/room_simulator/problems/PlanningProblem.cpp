@@ -1,4 +1,5 @@
 #include <set>
+#include <stdexcept>
 #include <stdlib.h>
 #include "../Room.h"
 #include "../objectives/Objective.h"
@@ -11,25 +12,78 @@
 
 PlanningProblem::PlanningProblem(
     Objective objective,
-    ObjectiveReacher *objectiveReacher) : objective(objective),
-                                          objectiveReacher(objectiveReacher),
-                                          orbs(objectiveReacher->getRoomPlayer()->getRoom().findCoordinates(ElementType::ORB)){};
+    ObjectiveReacher *objectiveReacher,
+    bool pruneOrbStrikes) : objective(objective),
+                            objectiveReacher(objectiveReacher),
+                            pruneOrbStrikes(pruneOrbStrikes),
+                            orbs(objectiveReacher->getRoomPlayer()->getRoom().findCoordinates(ElementType::ORB)){};
 
 DerivedRoom PlanningProblem::initialState()
 {
-    this->objectiveReacher->getRoomPlayer()->setActions({});
+    this->objectiveReacher->getRoomPlayer()->setActions(std::vector<Action>());
     return this->objectiveReacher->getRoomPlayer()->getDerivedRoom();
 }
 
+std::vector<DerivedRoom> PlanningProblem::initialStates()
+{
+    // One for each start of the room player
+    AbstractRoomPlayer *roomPlayer = this->objectiveReacher->getRoomPlayer();
+    std::vector<DerivedRoom> states = {};
+    for (int start = 0; start < roomPlayer->getStartCount(); ++start)
+    {
+        roomPlayer->setStart(start);
+        roomPlayer->setActions(std::vector<Action>());
+        states.push_back(roomPlayer->getDerivedRoom());
+    }
+    return states;
+}
+
 std::vector<Objective> PlanningProblem::actions(DerivedRoom state)
 {
+    // Only return objectives we can actually reach
+    std::vector<Objective> candidates = this->candidateActions(state);
+    std::vector<Objective> reachableObjectives = {};
+    for (auto it = candidates.begin(); it != candidates.end(); ++it)
+    {
+        Solution<DerivedRoom, Action> solution = this->objectiveReacher->findSolution(state, *it);
+        if (solution.exists)
+        {
+            reachableObjectives.push_back(*it);
+        }
+    }
+    return reachableObjectives;
+}
+
+std::vector<Objective> PlanningProblem::candidateActions(DerivedRoom state)
+{
+    // The objectives that may be worth reaching, without checking whether
+    // they can be reached
+    if (this->objectiveReacher->monstersUnreachable(state, this->objective))
+    {
+        // Nothing we can do will make those monsters reachable
+        return {};
+    }
     // Always try reaching the final objective
     // TODO: May not make sense if it's something like clearing the room
     std::vector<Objective> objectives = {this->objective};
-    // Try to strike each orb
+    // Try to strike each orb. If pruning, skip orbs that only change doors
+    // that don't affect where we can walk right now. Any door that lets
+    // monsters into our region would border it, so that would count as a
+    // change. This can make rooms unsolvable, since a door elsewhere may
+    // matter after walking through another one.
+    RoomConnectivity *connectivity = this->objectiveReacher->getRoomConnectivity();
+    Position playerPosition = std::get<0>(state.findPlayer());
+    std::set<Position> toggledDoors = {};
+    if (this->pruneOrbStrikes)
+    {
+        toggledDoors = state.getToggledDoors();
+    }
     for (auto it = this->orbs.begin(); it != this->orbs.end(); ++it)
     {
-        objectives.push_back(StabObjective({*it}));
+        if (!this->pruneOrbStrikes || connectivity->strikeChangesRegion(playerPosition, *it, toggledDoors))
+        {
+            objectives.push_back(StabObjective({*it}));
+        }
     }
     // If there are roach queens, ignore other monsters
     std::vector<Position> monsterPositions = state.findMonsterCoordinates(ElementType::ROACH_QUEEN);
@@ -50,25 +104,39 @@ std::vector<Objective> PlanningProblem::actions(DerivedRoom state)
                                           MonsterCountObjective(monsterPositions.size() - 1, true, monsterType)}));
     }
 
-    // Only return objectives we can actually reach, but haven't reached already
-    std::vector<Objective> reachableObjectives = {};
+    // Skip objectives we've reached already
+    std::vector<Objective> candidates = {};
     for (auto it = objectives.begin(); it != objectives.end(); ++it)
     {
         if (!objectiveFulfilled(*it, state))
         {
-            Solution<DerivedRoom, Action> solution = this->objectiveReacher->findSolution(state, *it);
-            if (solution.exists)
-            {
-                reachableObjectives.push_back(*it);
-            }
+            candidates.push_back(*it);
         }
     }
-    return reachableObjectives;
+    return candidates;
 }
 
 DerivedRoom PlanningProblem::result(DerivedRoom state, Objective action)
 {
+    std::optional<DerivedRoom> result = this->tryResult(state, action);
+    if (!result)
+    {
+        throw std::runtime_error("Objective can no longer be reached");
+    }
+    return result.value();
+}
+
+std::optional<DerivedRoom> PlanningProblem::tryResult(DerivedRoom state, Objective action)
+{
+    // Deferred nodes only come from candidateActions(), so the objective
+    // may not be reachable. Even if actions() found a solution, it may have
+    // been evicted from the cache since, and finding it again fails if the
+    // budget has run out.
     Solution<DerivedRoom, Action> solution = this->objectiveReacher->findSolution(state, action);
+    if (!solution.exists)
+    {
+        return std::nullopt;
+    }
     return solution.finalState.value();
 }
 
@@ -79,7 +147,13 @@ bool PlanningProblem::goalTest(DerivedRoom state)
 
 int PlanningProblem::stepCost(DerivedRoom state, Objective action, DerivedRoom result)
 {
+    // The solution may have been evicted from the cache since it was found,
+    // and finding it again fails if the budget has run out
     Solution<DerivedRoom, Action> solution = this->objectiveReacher->findSolution(state, action);
+    if (!solution.exists)
+    {
+        throw std::runtime_error("Objective can no longer be reached");
+    }
     return solution.actions.value().size();
 }
 
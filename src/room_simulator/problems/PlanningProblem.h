@@ -4,6 +4,7 @@
 #include <array>
 #include <vector>
 #include <set>
+#include <optional>
 #include "../Room.h"
 #include "../objectives/Objective.h"
 #include "../typedefs.h"
@@ -13,10 +14,13 @@
 class PlanningProblem final : public Problem<DerivedRoom, Objective>
 {
 public:
-    PlanningProblem(Objective objective, ObjectiveReacher *objectiveReacher);
+    PlanningProblem(Objective objective, ObjectiveReacher *objectiveReacher, bool pruneOrbStrikes = false);
     DerivedRoom initialState();
+    std::vector<DerivedRoom> initialStates();
     std::vector<Objective> actions(DerivedRoom state);
+    std::vector<Objective> candidateActions(DerivedRoom state);
     DerivedRoom result(DerivedRoom state, Objective action);
+    std::optional<DerivedRoom> tryResult(DerivedRoom state, Objective action);
     bool goalTest(DerivedRoom state);
     int stepCost(DerivedRoom state, Objective action, DerivedRoom result);
     int heuristic(DerivedRoom state);
@@ -24,6 +28,8 @@ public:
 private:
     Objective objective;
     ObjectiveReacher *objectiveReacher;
+    // Whether to skip striking orbs that don't change where we can walk
+    bool pruneOrbStrikes;
     std::vector<Position> orbs;
 };
 
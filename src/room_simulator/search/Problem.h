@@ -1,15 +1,27 @@
 #ifndef DRODBOT_SEARCH_PROBLEM_H
 #define DRODBOT_SEARCH_PROBLEM_H
 
+#include <optional>
 #include <set>
+#include <vector>
 
 template <class State, class SearchAction>
 class Problem
 {
 public:
     virtual State initialState();
+    // Problems with several starts can override this
+    virtual std::vector<State> initialStates() { return {this->initialState()}; };
     virtual std::vector<SearchAction> actions(State);
     virtual State result(State, SearchAction);
+    // With deferred evaluation, the searcher only gets the candidate actions
+    // when expanding a node, and takes them when the children are about to be
+    // expanded. Problems where checking an action is expensive can override
+    // these to skip the check. The searcher always takes actions with
+    // tryResult(), which returns std::nullopt if the action can't be taken
+    // after all.
+    virtual std::vector<SearchAction> candidateActions(State state) { return this->actions(state); };
+    virtual std::optional<State> tryResult(State state, SearchAction action) { return this->result(state, action); };
     virtual bool goalTest(State);
     virtual int stepCost(State, SearchAction, State);
     virtual int heuristic(State);
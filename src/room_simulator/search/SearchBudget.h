@@ -0,0 +1,137 @@
+#ifndef DRODBOT_SEARCH_SEARCHBUDGET_H
+#define DRODBOT_SEARCH_SEARCHBUDGET_H
+
+#include <atomic>
+#include <chrono>
+#include <functional>
+#include <optional>
+#include "../typedefs.h"
+
+// How a solve is going, for showing to the user
+struct SearchProgress
+{
+    // Expansions so far, in all searchers spending from the budget
+    int expansions;
+    // The frontier size of the searcher that reported the progress
+    int frontierSize;
+    // The lowest heuristic expanded by the searcher that reported the progress
+    int bestHeuristic;
+};
+
+// A time and expansion budget, shared by all searchers taking part in one
+// solve. Nested searches (e.g. in ObjectiveReacher) spend from the same
+// budget as the search that started them, so the whole solve stops when it
+// runs out. It can also be cancelled from another thread, and report
+// progress while searching.
+class SearchBudget
+{
+public:
+    SearchBudget(std::optional<double> timeLimit = std::nullopt,
+                 std::optional<int> maxExpansions = std::nullopt);
+    void addExpansion();
+    int getExpansions();
+    std::optional<FailureReason> exhaustedReason();
+    bool isExhausted();
+    void cancel();
+    bool isCancelled();
+    void setProgressCallback(std::optional<std::function<void(SearchProgress)>> callback,
+                             double interval = 0.5);
+    void reportProgress(int frontierSize, int bestHeuristic);
+
+private:
+    std::optional<std::chrono::steady_clock::time_point> deadline;
+    std::optional<int> maxExpansions;
+    int expansions;
+    // Set from another thread, and checked by the searchers
+    std::atomic<bool> cancelled;
+    std::optional<std::function<void(SearchProgress)>> progressCallback;
+    // The minimum time between calls to the progress callback
+    std::chrono::steady_clock::duration progressInterval;
+    std::optional<std::chrono::steady_clock::time_point> lastProgress;
+};
+
+inline SearchBudget::SearchBudget(std::optional<double> timeLimit,
+                                  std::optional<int> maxExpansions) : deadline(std::nullopt),
+                                                                      maxExpansions(maxExpansions),
+                                                                      expansions(0),
+                                                                      cancelled(false),
+                                                                      progressCallback(std::nullopt),
+                                                                      progressInterval(std::chrono::steady_clock::duration::zero()),
+                                                                      lastProgress(std::nullopt)
+{
+    if (timeLimit)
+    {
+        std::chrono::duration<double> duration(timeLimit.value());
+        this->deadline = std::chrono::steady_clock::now() +
+                         std::chrono::duration_cast<std::chrono::steady_clock::duration>(duration);
+    }
+}
+
+inline void SearchBudget::addExpansion()
+{
+    this->expansions += 1;
+}
+
+inline int SearchBudget::getExpansions()
+{
+    return this->expansions;
+}
+
+inline std::optional<FailureReason> SearchBudget::exhaustedReason()
+{
+    if (this->cancelled.load(std::memory_order_relaxed))
+    {
+        return FailureReason::CANCELLED;
+    }
+    if (this->maxExpansions && this->expansions >= this->maxExpansions.value())
+    {
+        return FailureReason::ITERATION_LIMIT_REACHED;
+    }
+    if (this->deadline && std::chrono::steady_clock::now() >= this->deadline.value())
+    {
+        return FailureReason::DEADLINE_REACHED;
+    }
+    return std::nullopt;
+}
+
+inline bool SearchBudget::isExhausted()
+{
+    return this->exhaustedReason().has_value();
+}
+
+inline void SearchBudget::cancel()
+{
+    this->cancelled.store(true, std::memory_order_relaxed);
+}
+
+inline bool SearchBudget::isCancelled()
+{
+    return this->cancelled.load(std::memory_order_relaxed);
+}
+
+inline void SearchBudget::setProgressCallback(std::optional<std::function<void(SearchProgress)>> callback,
+                                              double interval)
+{
+    this->progressCallback = callback;
+    std::chrono::duration<double> duration(interval);
+    this->progressInterval = std::chrono::duration_cast<std::chrono::steady_clock::duration>(duration);
+    this->lastProgress = std::nullopt;
+}
+
+inline void SearchBudget::reportProgress(int frontierSize, int bestHeuristic)
+{
+    // Call the progress callback, unless it was called recently
+    if (!this->progressCallback)
+    {
+        return;
+    }
+    std::chrono::steady_clock::time_point now = std::chrono::steady_clock::now();
+    if (this->lastProgress && now - this->lastProgress.value() < this->progressInterval)
+    {
+        return;
+    }
+    this->lastProgress = now;
+    this->progressCallback.value()({this->expansions, frontierSize, bestHeuristic});
+}
+
+#endif // DRODBOT_SEARCH_SEARCHBUDGET_H
\ No newline at end of file
@@ -2,28 +2,73 @@
 #define DRODBOT_SEARCH_Searcher_H
 
 #include <iostream>
+#include <algorithm>
+#include <climits>
+#include <cmath>
+#include <iterator>
+#include <optional>
 #include <vector>
 #include <map>
 #include <set>
 #include "Problem.h"
+#include "SearchBudget.h"
+#include "../SolveStats.h"
 #include "../typedefs.h"
 
+// How a Searcher decides which node to expand next
+enum class SearchStrategy
+{
+    // Expand the node with the lowest priority, which is the path cost and/or
+    // heuristic depending on the searcher's settings
+    BEST_FIRST,
+    // Best-first with the heuristic multiplied by a weight. Weights above 1
+    // find solutions faster, but they may be up to that factor too long.
+    WEIGHTED_A_STAR,
+    // Expand one depth at a time, only keeping the best nodes at each depth
+    BEAM,
+    // Depth-first search with an increasing bound on path cost + weighted
+    // heuristic. Only the current path is kept in memory.
+    IDA_STAR,
+};
+
+// Settings for a Searcher beyond the basic flags, so they can be passed
+// through e.g. ObjectiveReacher to the searchers it creates
+struct SearchSettings
+{
+    SearchStrategy strategy = SearchStrategy::BEST_FIRST;
+    // The heuristic weight for WEIGHTED_A_STAR and IDA_STAR
+    double weight = 1;
+    // The number of nodes kept at each depth for BEAM
+    int beamWidth = 100;
+    // Stop searching when more than this many states have been explored
+    std::optional<int> exploredLimit = std::nullopt;
+    // Drop the worst nodes from the frontier when it grows larger than this
+    std::optional<int> frontierLimit = std::nullopt;
+};
+
+// A node in the search tree. Nodes are kept in an arena in the Searcher,
+// and only know their parent's index and the action leading to them. The
+// full path is rebuilt by following the parents when it is needed.
 template <class State, class SearchAction>
 struct Node
 {
 public:
     Node(State state,
          int pathCost,
-         std::vector<SearchAction> actions,
-         int priority) : state(state),
-                         pathCost(pathCost),
-                         actions(actions),
-                         priority(priority){};
-    bool operator<(const Node &otherNode) const { return this->priority < otherNode.priority; }
+         int parent,
+         std::optional<SearchAction> action,
+         bool deferred = false) : state(state),
+                                  pathCost(pathCost),
+                                  parent(parent),
+                                  action(action),
+                                  deferred(deferred){};
     State state;
     int pathCost;
-    std::vector<SearchAction> actions;
-    int priority;
+    int parent; // Index of the parent node in the arena, or -1 for the root
+    std::optional<SearchAction> action;
+    // Whether the action hasn't been taken yet. The state is then the
+    // parent's state.
+    bool deferred;
 };
 
 template <class State, class SearchAction>
@@ -34,8 +79,17 @@ public:
              bool avoidDuplicates = true,
              bool heuristicInPriority = true,
              bool pathCostInPriority = true,
-             int iterationLimit = 10000);
+             int iterationLimit = 10000,
+             SearchStrategy strategy = SearchStrategy::BEST_FIRST,
+             double weight = 1,
+             int beamWidth = 100,
+             std::optional<int> exploredLimit = std::nullopt,
+             std::optional<int> frontierLimit = std::nullopt,
+             bool deferEvaluation = false);
     Solution<State, SearchAction> findSolution();
+    std::set<int> findReachableStarts();
+    void setBudget(SearchBudget *budget);
+    void setStats(SolveStats *stats);
     // Below methods are intended for inspecting the algorithm.
     // findSolution() should be enough for real usage.
     void expandNextNode();
@@ -49,24 +103,56 @@ public:
     int getFrontierSize();
     std::set<State> getExplored();
     int getExploredSize();
+    int getNodeCount();
     bool foundSolution();
 
 private:
-    void popNextNode();
+    void initializeStarts();
+    bool popNextNode();
+    bool evaluateDeferredNode(int nodeIndex);
     void expandCurrentNode();
+    std::tuple<int, int> priority(State state, int pathCost);
+    int addChild(State state, int pathCost, int parent, std::optional<SearchAction> action);
+    std::set<int> startsReaching(std::vector<int> goalNodes);
+    int weightedHeuristic(State state);
+    void removeFromFrontier(std::set<std::tuple<int, int, int>>::iterator entry);
+    void pruneFrontier();
+    Solution<State, SearchAction> findSolutionIdaStar();
+    bool idaStarSearch(int nodeIndex, int bound);
+    bool outOfIterations();
+    std::optional<int> knownHeuristic(std::tuple<int, int, int> entry);
+    void recordProgress(int nodeIndex, std::optional<int> heuristic);
+    void keepBestProgressPath(int removedFrom);
+    Solution<State, SearchAction> partialSolution(FailureReason failureReason);
+    int addNode(Node<State, SearchAction> node);
+    std::vector<SearchAction> getPath(int nodeIndex);
     Problem<State, SearchAction> *problem;
-    // The frontier is the next nodes that will be executed. It's sorted so the
-    // lowest-cost node is first. Using a multiset as a sorted list here, which
-    // works because we overload < in Node.
-    std::multiset<Node<State, SearchAction>> frontier;
+    // All nodes created so far. Nodes refer to each other by their index here.
+    std::vector<Node<State, SearchAction>> nodes;
+    // The frontier is the next nodes that will be executed, as tuples of
+    // (priority, heuristic, node index). It's sorted so the lowest-cost node
+    // is first. If both the path cost and heuristic are in the priority, ties
+    // are broken by the heuristic, so nodes closer to the goal go first.
+    // Since node indices only increase, remaining ties are expanded in the
+    // order they were added.
+    std::set<std::tuple<int, int, int>> frontier;
     // This is so we can easily check whether a node with a certain state is in
     // the frontier. This is used to replace a node if a lower-cost node with the
-    // same state is found later.
-    std::map<State, Node<State, SearchAction>> frontierByState;
-    // The current node being expanded
-    Node<State, SearchAction> currentNode;
-    // This contains all explored nodes, to avoid exploring them again.
-    std::set<State> explored;
+    // same state is found later. The values are the entries in the frontier.
+    std::map<State, std::tuple<int, int, int>> frontierByState;
+    // The index of the current node being expanded
+    int currentNode;
+    // This contains all explored nodes, to avoid exploring them again. The
+    // values are the node indices.
+    std::map<State, int> explored;
+    // The node for each initial state of the problem. Several starts may
+    // share a node if they have the same state.
+    std::vector<int> startNodes;
+    // When searching from several starts, pairs of (from, to) node indices
+    // where a child of the first node had the same state as the second node
+    // and wasn't added. The first node can then reach anything the second
+    // can, which is how we know which starts reach a goal.
+    std::vector<std::tuple<int, int>> mergedNodes;
     // The number of iterations, so we can stop at some reasonable limit if it
     // turns out the problem is intractable.
     int iterations;
@@ -78,6 +164,28 @@ private:
     bool pathCostInPriority;
     // The iteration limit, after which we will throw an exception
     int iterationLimit;
+    SearchStrategy strategy;
+    double weight;
+    int beamWidth;
+    std::optional<int> exploredLimit;
+    std::optional<int> frontierLimit;
+    // Whether to put children in the frontier without taking their actions,
+    // and only take them when the children are popped
+    bool deferEvaluation;
+    // The lowest cost above the bound seen in the current IDA* iteration,
+    // which will be the next bound
+    std::optional<int> idaStarNextBound;
+    // A budget shared with other searchers, or nullptr for no budget
+    SearchBudget *budget;
+    // When there is a budget, the expanded node with the lowest heuristic, as
+    // (heuristic, node index). If we run out of budget, the path to it is
+    // returned as partial progress.
+    std::optional<std::tuple<int, int>> bestProgress;
+    // The path and state of the best progress node, if IDA* has removed it
+    // from the arena. Other strategies never remove nodes.
+    std::optional<std::tuple<std::vector<SearchAction>, State>> bestProgressPath;
+    // Stats shared with other searchers, or nullptr to not record stats
+    SolveStats *stats;
 };
 
 template <class State, class SearchAction>
@@ -86,133 +194,415 @@ inline Searcher<State, SearchAction>::Searcher(
     bool avoidDuplicates,
     bool heuristicInPriority,
     bool pathCostInPriority,
-    int iterationLimit) : problem(problem),
+    int iterationLimit,
+    SearchStrategy strategy,
+    double weight,
+    int beamWidth,
+    std::optional<int> exploredLimit,
+    std::optional<int> frontierLimit,
+    bool deferEvaluation) : problem(problem),
+                          nodes({}),
                           frontier({}),
                           frontierByState({}),
-                          currentNode(Node<State, SearchAction>(problem->initialState(), 0, {}, 0)),
+                          currentNode(0),
                           explored({}),
+                          startNodes({}),
+                          mergedNodes({}),
                           iterations(0),
                           avoidDuplicates(avoidDuplicates),
                           heuristicInPriority(heuristicInPriority),
                           pathCostInPriority(pathCostInPriority),
-                          iterationLimit(iterationLimit)
+                          iterationLimit(iterationLimit),
+                          strategy(strategy),
+                          weight(weight),
+                          beamWidth(beamWidth),
+                          exploredLimit(exploredLimit),
+                          frontierLimit(frontierLimit),
+                          deferEvaluation(deferEvaluation),
+                          idaStarNextBound(std::nullopt),
+                          budget(nullptr),
+                          bestProgress(std::nullopt),
+                          bestProgressPath(std::nullopt),
+                          stats(nullptr)
+{
+    // Weighted A* and IDA* always use both the path cost and the heuristic,
+    // and beam search always goes one depth at a time
+    bool usesAStarPriority = strategy == SearchStrategy::WEIGHTED_A_STAR || strategy == SearchStrategy::IDA_STAR;
+    if (usesAStarPriority && (!heuristicInPriority || !pathCostInPriority))
+    {
+        throw std::invalid_argument("Weighted A* and IDA* need both the heuristic and path cost in the priority");
+    }
+    if (strategy == SearchStrategy::BEAM && !pathCostInPriority)
+    {
+        throw std::invalid_argument("Beam search needs the path cost in the priority");
+    }
+    if (strategy == SearchStrategy::IDA_STAR && deferEvaluation)
+    {
+        throw std::invalid_argument("IDA* can't defer evaluating nodes");
+    }
+    this->initializeStarts();
+};
+
+template <class State, class SearchAction>
+inline void Searcher<State, SearchAction>::initializeStarts()
 {
+    std::vector<State> initialStates = this->problem->initialStates();
+    if (this->strategy == SearchStrategy::IDA_STAR && initialStates.size() > 1)
+    {
+        throw std::invalid_argument("IDA* can't search from several starts");
+    }
+    this->currentNode = this->addNode(Node<State, SearchAction>(initialStates[0], 0, -1, std::nullopt));
+    this->startNodes = {this->currentNode};
+    if (this->strategy == SearchStrategy::IDA_STAR)
+    {
+        // IDA* doesn't use the frontier, so there is nothing to prepare
+        return;
+    }
     if (this->avoidDuplicates)
     {
-        this->explored.insert(problem->initialState());
+        this->explored.insert({initialStates[0], this->currentNode});
+    }
+    // Any other starts go in the frontier
+    for (auto it = initialStates.begin() + 1; it != initialStates.end(); ++it)
+    {
+        this->startNodes.push_back(this->addChild(*it, 0, -1, std::nullopt));
     }
     // We've already initialized the member variables as if we've popped the
     // first node from the frontier.
     this->expandCurrentNode();
-};
+}
 
 template <class State, class SearchAction>
 inline void Searcher<State, SearchAction>::expandNextNode()
 {
-    this->popNextNode();
-    this->expandCurrentNode();
+    if (this->strategy == SearchStrategy::IDA_STAR)
+    {
+        throw std::logic_error("Can't expand single nodes with IDA*, use findSolution()");
+    }
+    if (this->popNextNode())
+    {
+        this->expandCurrentNode();
+    }
 };
 
 template <class State, class SearchAction>
-inline void Searcher<State, SearchAction>::popNextNode()
+inline bool Searcher<State, SearchAction>::popNextNode()
 {
     // If the frontier is empty, we've already tried all states we can reach
     if (this->frontier.size() == 0)
     {
         throw std::runtime_error("Tried to pop from empty frontier");
     }
-    // Pop the lowest-cost node from the frontier and make it the current node
-    typename std::multiset<Node<State, SearchAction>>::iterator nodeIterator = this->frontier.begin();
-    this->currentNode = *nodeIterator;
+    // Pop the lowest-cost node from the frontier and make it the current
+    // node. Returns false if it was a deferred node that was dropped or put
+    // back in the frontier instead.
+    auto nodeIterator = this->frontier.begin();
+    std::tuple<int, int, int> entry = *nodeIterator;
+    int nodeIndex = std::get<2>(entry);
     this->frontier.erase(nodeIterator);
+    if (this->nodes[nodeIndex].deferred)
+    {
+        if (!this->evaluateDeferredNode(nodeIndex))
+        {
+            return false;
+        }
+        // The node was queued with its parent's priority. Now that it has its
+        // own state, only expand it if it's still the lowest-cost node.
+        State state = this->nodes[nodeIndex].state;
+        auto [priority, tieBreaker] = this->priority(state, this->nodes[nodeIndex].pathCost);
+        entry = {priority, tieBreaker, nodeIndex};
+        if (this->frontier.size() > 0 && *this->frontier.begin() < entry)
+        {
+            this->frontier.insert(entry);
+            if (this->avoidDuplicates)
+            {
+                this->frontierByState.insert({state, entry});
+            }
+            return false;
+        }
+    }
+    this->currentNode = nodeIndex;
     if (this->avoidDuplicates)
     {
-        this->frontierByState.erase(this->currentNode.state);
-        this->explored.insert(this->currentNode.state);
+        State state = this->nodes[this->currentNode].state;
+        this->frontierByState.erase(state);
+        this->explored.insert({state, this->currentNode});
     }
     this->iterations += 1;
+    if (this->budget)
+    {
+        this->budget->addExpansion();
+        this->recordProgress(this->currentNode, this->knownHeuristic(entry));
+    }
+    if (this->stats)
+    {
+        recordPeakSizes(this->stats, this->frontier.size(), this->explored.size());
+    }
+    return true;
+}
+
+template <class State, class SearchAction>
+inline bool Searcher<State, SearchAction>::evaluateDeferredNode(int nodeIndex)
+{
+    // Take the action of a deferred node. Returns false if the action can't
+    // be taken or leads to an explored state or one already in the frontier,
+    // and the node should be dropped.
+    std::optional<State> result = this->problem->tryResult(this->nodes[nodeIndex].state,
+                                                           this->nodes[nodeIndex].action.value());
+    if (!result)
+    {
+        return false;
+    }
+    this->nodes[nodeIndex].state = result.value();
+    this->nodes[nodeIndex].deferred = false;
+    if (!this->avoidDuplicates)
+    {
+        return true;
+    }
+    int parent = this->nodes[nodeIndex].parent;
+    bool severalStarts = this->startNodes.size() > 1;
+    auto exploredIterator = this->explored.find(result.value());
+    if (exploredIterator != this->explored.end())
+    {
+        if (severalStarts)
+        {
+            this->mergedNodes.push_back({parent, exploredIterator->second});
+        }
+        return false;
+    }
+    // If the frontier has a node with the same state, keep the one with the
+    // lower path cost
+    auto frontierIterator = this->frontierByState.find(result.value());
+    if (frontierIterator != this->frontierByState.end())
+    {
+        int otherIndex = std::get<2>(frontierIterator->second);
+        if (this->nodes[otherIndex].pathCost <= this->nodes[nodeIndex].pathCost)
+        {
+            if (severalStarts)
+            {
+                this->mergedNodes.push_back({parent, otherIndex});
+            }
+            return false;
+        }
+        this->frontier.erase(frontierIterator->second);
+        this->frontierByState.erase(frontierIterator);
+        if (severalStarts)
+        {
+            this->mergedNodes.push_back({otherIndex, nodeIndex});
+        }
+    }
+    return true;
 }
 
 template <class State, class SearchAction>
 inline void Searcher<State, SearchAction>::expandCurrentNode()
 {
     // Expand the current node and add its children to the frontier where appropriate
-    std::vector<SearchAction> actions = this->problem->actions(this->currentNode.state);
+    State currentState = this->nodes[this->currentNode].state;
+    int currentPathCost = this->nodes[this->currentNode].pathCost;
+    if (this->deferEvaluation)
+    {
+        // The children get the parent's state and priority until they are
+        // popped. They can't be checked for duplicates until then.
+        std::vector<SearchAction> actions = this->problem->candidateActions(currentState);
+        auto [priority, tieBreaker] = this->priority(currentState, currentPathCost + 1);
+        for (auto actionIterator = actions.begin(); actionIterator != actions.end(); ++actionIterator)
+        {
+            int childIndex = this->addNode(Node<State, SearchAction>(currentState, currentPathCost + 1, this->currentNode, *actionIterator, true));
+            this->frontier.insert({priority, tieBreaker, childIndex});
+        }
+        this->pruneFrontier();
+        return;
+    }
+    std::vector<SearchAction> actions = this->problem->actions(currentState);
     for (auto actionIterator = actions.begin(); actionIterator != actions.end(); ++actionIterator)
     {
         SearchAction action = *actionIterator;
-        // Find the child node
-        State result = this->problem->result(this->currentNode.state, action);
-        std::vector<SearchAction> childActions = this->currentNode.actions;
-        childActions.push_back(action);
-        int pathCost = this->currentNode.pathCost + 1;
-        int priority = 0;
+        std::optional<State> result = this->problem->tryResult(currentState, action);
+        if (!result)
+        {
+            continue;
+        }
+        this->addChild(result.value(), currentPathCost + 1, this->currentNode, action);
+    }
+    this->pruneFrontier();
+}
+
+template <class State, class SearchAction>
+inline std::tuple<int, int> Searcher<State, SearchAction>::priority(State state, int pathCost)
+{
+    // Get the (priority, tie breaker) of a node in the frontier
+    int priority = 0;
+    int tieBreaker = 0;
+    if (this->strategy == SearchStrategy::WEIGHTED_A_STAR)
+    {
+        tieBreaker = this->problem->heuristic(state);
+        priority = pathCost + (int)std::lround(this->weight * tieBreaker);
+    }
+    else if (this->strategy == SearchStrategy::BEAM)
+    {
+        // All nodes at one depth come before the next depth, and are
+        // ordered by the heuristic within it
+        priority = pathCost;
+        if (this->heuristicInPriority)
+        {
+            tieBreaker = this->problem->heuristic(state);
+        }
+    }
+    else
+    {
         if (this->pathCostInPriority)
         {
             priority += pathCost;
         }
         if (this->heuristicInPriority)
         {
-            priority += this->problem->heuristic(result);
+            int heuristic = this->problem->heuristic(state);
+            priority += heuristic;
+            if (this->pathCostInPriority)
+            {
+                tieBreaker = heuristic;
+            }
         }
-        Node<State, SearchAction> childNode = Node<State, SearchAction>(result, pathCost, childActions, priority);
+    }
+    return {priority, tieBreaker};
+}
 
-        if (this->avoidDuplicates)
+template <class State, class SearchAction>
+inline int Searcher<State, SearchAction>::addChild(State state,
+                                                   int pathCost,
+                                                   int parent,
+                                                   std::optional<SearchAction> action)
+{
+    // Add a node to the frontier where appropriate. Returns the index of the
+    // node with the state, which may be an existing one.
+    auto [priority, tieBreaker] = this->priority(state, pathCost);
+    bool severalStarts = this->startNodes.size() > 1 || parent == -1;
+    if (this->avoidDuplicates)
+    {
+        // If the frontier has a node with the same state, replace it if its path cost is higher
+        auto frontierIterator = this->frontierByState.find(state);
+        if (frontierIterator != this->frontierByState.end())
         {
-            // If the frontier has a node with the same state, replace it if its path cost is higher
-            if (this->frontierByState.find(childNode.state) != this->frontierByState.end())
+            std::tuple<int, int, int> otherEntry = std::get<1>(*frontierIterator);
+            int otherIndex = std::get<2>(otherEntry);
+            if (pathCost < this->nodes[otherIndex].pathCost)
             {
-                Node<State, SearchAction> otherNode = std::get<1>(*(this->frontierByState.find(childNode.state)));
-                if (childNode.pathCost < otherNode.pathCost)
+                this->frontier.erase(otherEntry);
+                int childIndex = this->addNode(Node<State, SearchAction>(state, pathCost, parent, action));
+                std::tuple<int, int, int> childEntry = {priority, tieBreaker, childIndex};
+                this->frontier.insert(childEntry);
+                frontierIterator->second = childEntry;
+                if (severalStarts)
                 {
-                    // Find the actual other node in the frontier and replace it. We
-                    // narrow it down to the nodes which the multiset considers to be
-                    // equivalent to the one from frontierByState, i.e. all nodes
-                    // with the same path cost.
-                    std::pair<typename std::multiset<Node<State, SearchAction>>::iterator,
-                              typename std::multiset<Node<State, SearchAction>>::iterator>
-                        range = this->frontier.equal_range(otherNode);
-                    typename std::multiset<Node<State, SearchAction>>::iterator it;
-                    for (it = std::get<0>(range); it != std::get<1>(range); ++it)
-                    {
-                        if (it->state == childNode.state)
-                        {
-                            frontier.erase(it);
-                            break;
-                        }
-                    }
-                    this->frontier.insert(childNode);
-                    this->frontierByState.insert(std::pair<State, Node<State, SearchAction>>(childNode.state, childNode));
+                    this->mergedNodes.push_back({otherIndex, childIndex});
                 }
+                return childIndex;
             }
-            // If it's not already in the frontier, add it if it's not explored
-            else if (explored.find(childNode.state) == this->explored.end())
+            if (severalStarts && parent != -1)
             {
-                this->frontier.insert(childNode);
-                this->frontierByState.insert(std::pair<State, Node<State, SearchAction>>(childNode.state, childNode));
+                this->mergedNodes.push_back({parent, otherIndex});
             }
+            return otherIndex;
         }
-        else
+        // If it's not already in the frontier, add it if it's not explored
+        auto exploredIterator = this->explored.find(state);
+        if (exploredIterator != this->explored.end())
         {
-            // If we don't avoid duplicates, things are a lot simpler
-            this->frontier.insert(childNode);
+            if (severalStarts && parent != -1)
+            {
+                this->mergedNodes.push_back({parent, exploredIterator->second});
+            }
+            return exploredIterator->second;
         }
+        int childIndex = this->addNode(Node<State, SearchAction>(state, pathCost, parent, action));
+        std::tuple<int, int, int> childEntry = {priority, tieBreaker, childIndex};
+        this->frontier.insert(childEntry);
+        this->frontierByState.insert({state, childEntry});
+        return childIndex;
     }
+    // If we don't avoid duplicates, things are a lot simpler
+    int childIndex = this->addNode(Node<State, SearchAction>(state, pathCost, parent, action));
+    this->frontier.insert({priority, tieBreaker, childIndex});
+    return childIndex;
+}
+
+template <class State, class SearchAction>
+inline int Searcher<State, SearchAction>::weightedHeuristic(State state)
+{
+    return (int)std::lround(this->weight * this->problem->heuristic(state));
+}
+
+template <class State, class SearchAction>
+inline void Searcher<State, SearchAction>::removeFromFrontier(std::set<std::tuple<int, int, int>>::iterator entry)
+{
+    if (this->avoidDuplicates && !this->nodes[std::get<2>(*entry)].deferred)
+    {
+        this->frontierByState.erase(this->nodes[std::get<2>(*entry)].state);
+    }
+    this->frontier.erase(entry);
+}
+
+template <class State, class SearchAction>
+inline void Searcher<State, SearchAction>::pruneFrontier()
+{
+    // Keep the beam width at the depth we just added nodes to. The frontier
+    // is sorted by depth first, so the nodes at that depth are together with
+    // the worst ones last.
+    if (this->strategy == SearchStrategy::BEAM)
+    {
+        int depth = this->nodes[this->currentNode].pathCost + 1;
+        auto layerStart = this->frontier.lower_bound({depth, INT_MIN, INT_MIN});
+        auto layerEnd = this->frontier.lower_bound({depth + 1, INT_MIN, INT_MIN});
+        int layerSize = std::distance(layerStart, layerEnd);
+        while (layerSize > this->beamWidth)
+        {
+            this->removeFromFrontier(std::prev(layerEnd));
+            layerSize--;
+        }
+    }
+    // Drop the worst nodes if the frontier is too large
+    if (this->frontierLimit)
+    {
+        while ((int)this->frontier.size() > this->frontierLimit.value())
+        {
+            this->removeFromFrontier(std::prev(this->frontier.end()));
+        }
+    }
+}
+
+template <class State, class SearchAction>
+inline int Searcher<State, SearchAction>::addNode(Node<State, SearchAction> node)
+{
+    this->nodes.push_back(node);
+    return this->nodes.size() - 1;
+}
+
+template <class State, class SearchAction>
+inline std::vector<SearchAction> Searcher<State, SearchAction>::getPath(int nodeIndex)
+{
+    // Follow the parents back to the root, then reverse the actions
+    std::vector<SearchAction> path = {};
+    for (int index = nodeIndex; this->nodes[index].parent != -1; index = this->nodes[index].parent)
+    {
+        path.push_back(this->nodes[index].action.value());
+    }
+    std::reverse(path.begin(), path.end());
+    return path;
 }
 
 template <class State, class SearchAction>
 inline void Searcher<State, SearchAction>::reset()
 {
     this->iterations = 0;
+    this->bestProgress = std::nullopt;
+    this->bestProgressPath = std::nullopt;
+    this->nodes = {};
     this->frontier = {};
     this->frontierByState = {};
     this->explored = {};
-    this->currentNode = Node<State, SearchAction>(this->problem->initialState(), 0, {}, 0);
-    if (this->avoidDuplicates)
-    {
-        this->explored.insert(problem->initialState());
-    }
-    this->expandCurrentNode();
+    this->mergedNodes = {};
+    this->initializeStarts();
 }
 
 template <class State, class SearchAction>
@@ -224,29 +614,32 @@ inline int Searcher<State, SearchAction>::getIterations()
 template <class State, class SearchAction>
 inline std::vector<SearchAction> Searcher<State, SearchAction>::getCurrentPath()
 {
-    return this->currentNode.actions;
+    return this->getPath(this->currentNode);
 }
 
 template <class State, class SearchAction>
 inline State Searcher<State, SearchAction>::getCurrentState()
 {
-    return this->currentNode.state;
+    return this->nodes[this->currentNode].state;
 }
 
 template <class State, class SearchAction>
 inline int Searcher<State, SearchAction>::getCurrentStateHeuristic()
 {
-    return this->problem->heuristic(this->currentNode.state);
+    return this->problem->heuristic(this->nodes[this->currentNode].state);
 }
 
 template <class State, class SearchAction>
 inline std::set<State> Searcher<State, SearchAction>::getFrontierStates()
 {
+    // Deferred nodes don't have their own states yet, so they are skipped
     std::set<State> frontierStates = {};
-    typename std::multiset<Node<State, SearchAction>>::iterator iterator;
-    for (iterator = this->frontier.begin(); iterator != this->frontier.end(); ++iterator)
+    for (auto iterator = this->frontier.begin(); iterator != this->frontier.end(); ++iterator)
     {
-        frontierStates.insert(iterator->state);
+        if (!this->nodes[std::get<2>(*iterator)].deferred)
+        {
+            frontierStates.insert(this->nodes[std::get<2>(*iterator)].state);
+        }
     }
     return frontierStates;
 }
@@ -257,7 +650,12 @@ inline std::set<SearchAction> Searcher<State, SearchAction>::getFrontierActions(
     std::set<SearchAction> frontierActions = {};
     for (auto iterator = this->frontier.begin(); iterator != this->frontier.end(); ++iterator)
     {
-        frontierActions.insert(iterator->actions[iterator->actions.size() - 1]);
+        // Extra start nodes have no action
+        std::optional<SearchAction> action = this->nodes[std::get<2>(*iterator)].action;
+        if (action)
+        {
+            frontierActions.insert(action.value());
+        }
     }
     return frontierActions;
 }
@@ -271,7 +669,12 @@ inline int Searcher<State, SearchAction>::getFrontierSize()
 template <class State, class SearchAction>
 inline std::set<State> Searcher<State, SearchAction>::getExplored()
 {
-    return this->explored;
+    std::set<State> exploredStates = {};
+    for (auto iterator = this->explored.begin(); iterator != this->explored.end(); ++iterator)
+    {
+        exploredStates.insert(iterator->first);
+    }
+    return exploredStates;
 }
 
 template <class State, class SearchAction>
@@ -280,17 +683,33 @@ inline int Searcher<State, SearchAction>::getExploredSize()
     return this->explored.size();
 }
 
+template <class State, class SearchAction>
+inline int Searcher<State, SearchAction>::getNodeCount()
+{
+    return this->nodes.size();
+}
+
 template <class State, class SearchAction>
 inline bool Searcher<State, SearchAction>::foundSolution()
 {
-    return this->problem->goalTest(this->currentNode.state);
+    return this->problem->goalTest(this->nodes[this->currentNode].state);
 }
 
 template <class State, class SearchAction>
 inline Solution<State, SearchAction> Searcher<State, SearchAction>::findSolution()
 {
+    if (this->strategy == SearchStrategy::IDA_STAR)
+    {
+        return this->findSolutionIdaStar();
+    }
     while (!this->foundSolution())
     {
+        // Check the budget first, since running out of it can also empty
+        // the frontier, when the problem fails actions it has no budget for
+        if (this->budget && this->budget->isExhausted())
+        {
+            return this->partialSolution(this->budget->exhaustedReason().value());
+        }
         if (this->frontier.size() == 0)
         {
             return Solution<State, SearchAction>(false, std::nullopt, std::nullopt, FailureReason::EXHAUSTED_FRONTIER);
@@ -299,8 +718,286 @@ inline Solution<State, SearchAction> Searcher<State, SearchAction>::findSolution
         {
             return Solution<State, SearchAction>(false, std::nullopt, std::nullopt, FailureReason::ITERATION_LIMIT_REACHED);
         }
+        if (this->exploredLimit && (int)this->explored.size() > this->exploredLimit.value())
+        {
+            return Solution<State, SearchAction>(false, std::nullopt, std::nullopt, FailureReason::MEMORY_LIMIT_REACHED);
+        }
         this->expandNextNode();
     }
-    return Solution<State, SearchAction>(true, this->currentNode.actions, this->currentNode.state);
+    return Solution<State, SearchAction>(true, this->getPath(this->currentNode), this->nodes[this->currentNode].state);
 };
+
+template <class State, class SearchAction>
+inline std::set<int> Searcher<State, SearchAction>::findReachableStarts()
+{
+    // Search from all starts at once, until we know every start reaches a
+    // goal or run out of nodes. Goal nodes aren't expanded further. If the
+    // budget runs out, this only has the starts found so far, even if the
+    // frontier is empty, so callers should check the budget.
+    if (this->strategy == SearchStrategy::IDA_STAR)
+    {
+        throw std::runtime_error("Can't search from several starts with IDA*");
+    }
+    std::vector<int> goalNodes = {};
+    if (this->foundSolution())
+    {
+        goalNodes.push_back(this->currentNode);
+    }
+    while (this->frontier.size() > 0 && !this->outOfIterations())
+    {
+        if (this->exploredLimit && (int)this->explored.size() > this->exploredLimit.value())
+        {
+            break;
+        }
+        if (!this->popNextNode())
+        {
+            continue;
+        }
+        if (this->foundSolution())
+        {
+            goalNodes.push_back(this->currentNode);
+            if (this->startsReaching(goalNodes).size() == this->startNodes.size())
+            {
+                break;
+            }
+            continue;
+        }
+        this->expandCurrentNode();
+    }
+    return this->startsReaching(goalNodes);
+}
+
+template <class State, class SearchAction>
+inline std::set<int> Searcher<State, SearchAction>::startsReaching(std::vector<int> goalNodes)
+{
+    // Go backwards from the goals, along parents and merged nodes
+    std::vector<std::vector<int>> reachedFrom(this->nodes.size());
+    for (int index = 0; index < (int)this->nodes.size(); ++index)
+    {
+        if (this->nodes[index].parent != -1)
+        {
+            reachedFrom[index].push_back(this->nodes[index].parent);
+        }
+    }
+    for (auto [from, to] : this->mergedNodes)
+    {
+        reachedFrom[to].push_back(from);
+    }
+    std::vector<bool> reachesGoal(this->nodes.size(), false);
+    std::vector<int> toVisit = goalNodes;
+    while (!toVisit.empty())
+    {
+        int index = toVisit.back();
+        toVisit.pop_back();
+        if (reachesGoal[index])
+        {
+            continue;
+        }
+        reachesGoal[index] = true;
+        toVisit.insert(toVisit.end(), reachedFrom[index].begin(), reachedFrom[index].end());
+    }
+    std::set<int> starts = {};
+    for (int start = 0; start < (int)this->startNodes.size(); ++start)
+    {
+        if (reachesGoal[this->startNodes[start]])
+        {
+            starts.insert(start);
+        }
+    }
+    return starts;
+}
+
+template <class State, class SearchAction>
+inline Solution<State, SearchAction> Searcher<State, SearchAction>::findSolutionIdaStar()
+{
+    int bound = this->weightedHeuristic(this->nodes[0].state);
+    while (true)
+    {
+        // Only keep the root between iterations
+        this->keepBestProgressPath(1);
+        this->nodes.erase(this->nodes.begin() + 1, this->nodes.end());
+        this->idaStarNextBound = std::nullopt;
+        if (this->idaStarSearch(0, bound))
+        {
+            return Solution<State, SearchAction>(true, this->getPath(this->currentNode), this->nodes[this->currentNode].state);
+        }
+        // The current node may have been removed, so point at something that
+        // still exists when inspecting the searcher
+        this->currentNode = 0;
+        if (this->budget && this->budget->isExhausted())
+        {
+            return this->partialSolution(this->budget->exhaustedReason().value());
+        }
+        if (this->iterations > this->iterationLimit)
+        {
+            return Solution<State, SearchAction>(false, std::nullopt, std::nullopt, FailureReason::ITERATION_LIMIT_REACHED);
+        }
+        if (!this->idaStarNextBound)
+        {
+            return Solution<State, SearchAction>(false, std::nullopt, std::nullopt, FailureReason::EXHAUSTED_FRONTIER);
+        }
+        bound = this->idaStarNextBound.value();
+    }
+}
+
+template <class State, class SearchAction>
+inline bool Searcher<State, SearchAction>::idaStarSearch(int nodeIndex, int bound)
+{
+    // Search below a node, which is the last one in the arena. Returns
+    // whether a goal was found, and then currentNode is the goal node.
+    // Otherwise the node's descendants are removed from the arena again.
+    this->currentNode = nodeIndex;
+    State state = this->nodes[nodeIndex].state;
+    int pathCost = this->nodes[nodeIndex].pathCost;
+    int heuristic = this->problem->heuristic(state);
+    int cost = pathCost + (int)std::lround(this->weight * heuristic);
+    if (cost > bound)
+    {
+        if (!this->idaStarNextBound || cost < this->idaStarNextBound.value())
+        {
+            this->idaStarNextBound = cost;
+        }
+        return false;
+    }
+    if (this->problem->goalTest(state))
+    {
+        return true;
+    }
+    if (this->outOfIterations())
+    {
+        return false;
+    }
+    this->iterations += 1;
+    if (this->budget)
+    {
+        this->budget->addExpansion();
+        this->recordProgress(nodeIndex, heuristic);
+    }
+    if (this->stats)
+    {
+        // IDA* has no frontier, but the path is kept in the node arena
+        recordPeakSizes(this->stats, 0, this->nodes.size());
+    }
+    std::vector<SearchAction> actions = this->problem->actions(state);
+    for (auto actionIterator = actions.begin(); actionIterator != actions.end(); ++actionIterator)
+    {
+        SearchAction action = *actionIterator;
+        std::optional<State> tryResult = this->problem->tryResult(state, action);
+        if (!tryResult)
+        {
+            continue;
+        }
+        State result = tryResult.value();
+        if (this->avoidDuplicates)
+        {
+            // There is no explored set, but avoid going in circles
+            bool onPath = false;
+            for (int index = nodeIndex; index != -1 && !onPath; index = this->nodes[index].parent)
+            {
+                onPath = this->nodes[index].state == result;
+            }
+            if (onPath)
+            {
+                continue;
+            }
+        }
+        int childIndex = this->addNode(Node<State, SearchAction>(result, pathCost + 1, nodeIndex, action));
+        if (this->idaStarSearch(childIndex, bound))
+        {
+            return true;
+        }
+        if (this->outOfIterations())
+        {
+            return false;
+        }
+        this->keepBestProgressPath(childIndex);
+        this->nodes.pop_back();
+    }
+    return false;
+}
+
+template <class State, class SearchAction>
+inline bool Searcher<State, SearchAction>::outOfIterations()
+{
+    return this->iterations > this->iterationLimit || (this->budget && this->budget->isExhausted());
+}
+
+template <class State, class SearchAction>
+inline void Searcher<State, SearchAction>::setBudget(SearchBudget *budget)
+{
+    this->budget = budget;
+}
+
+template <class State, class SearchAction>
+inline void Searcher<State, SearchAction>::setStats(SolveStats *stats)
+{
+    this->stats = stats;
+}
+
+template <class State, class SearchAction>
+inline std::optional<int> Searcher<State, SearchAction>::knownHeuristic(std::tuple<int, int, int> entry)
+{
+    // Get the heuristic of a node from its frontier entry, if the entry
+    // has it. See priority().
+    auto [priority, tieBreaker, nodeIndex] = entry;
+    if (!this->heuristicInPriority)
+    {
+        return std::nullopt;
+    }
+    if (this->strategy == SearchStrategy::BEST_FIRST && !this->pathCostInPriority)
+    {
+        return priority;
+    }
+    return tieBreaker;
+}
+
+template <class State, class SearchAction>
+inline void Searcher<State, SearchAction>::recordProgress(int nodeIndex, std::optional<int> heuristic)
+{
+    // Only remember the node, and build the path if it's needed
+    if (!heuristic)
+    {
+        heuristic = this->problem->heuristic(this->nodes[nodeIndex].state);
+    }
+    if (!this->bestProgress || heuristic.value() < std::get<0>(this->bestProgress.value()))
+    {
+        this->bestProgress = {heuristic.value(), nodeIndex};
+        this->bestProgressPath = std::nullopt;
+    }
+    this->budget->reportProgress(this->frontier.size(), std::get<0>(this->bestProgress.value()));
+}
+
+template <class State, class SearchAction>
+inline void Searcher<State, SearchAction>::keepBestProgressPath(int removedFrom)
+{
+    // IDA* is about to remove the nodes from this index on, so save the path
+    // to the best progress node if it's one of them
+    if (!this->bestProgress || this->bestProgressPath)
+    {
+        return;
+    }
+    int nodeIndex = std::get<1>(this->bestProgress.value());
+    if (nodeIndex >= removedFrom && nodeIndex < (int)this->nodes.size())
+    {
+        this->bestProgressPath = {this->getPath(nodeIndex), this->nodes[nodeIndex].state};
+    }
+}
+
+template <class State, class SearchAction>
+inline Solution<State, SearchAction> Searcher<State, SearchAction>::partialSolution(FailureReason failureReason)
+{
+    // A failed solution, but with the actions and state of the best
+    // progress so far
+    if (!this->bestProgress)
+    {
+        return Solution<State, SearchAction>(false, std::nullopt, std::nullopt, failureReason);
+    }
+    if (this->bestProgressPath)
+    {
+        auto [path, state] = this->bestProgressPath.value();
+        return Solution<State, SearchAction>(false, path, state, failureReason);
+    }
+    int nodeIndex = std::get<1>(this->bestProgress.value());
+    return Solution<State, SearchAction>(false, this->getPath(nodeIndex), this->nodes[nodeIndex].state, failureReason);
+}
 #endif // DRODBOT_SEARCH_Searcher_H
\ No newline at end of file
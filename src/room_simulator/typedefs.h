@@ -25,6 +25,13 @@ enum class Action
     CCW,
 };
 
+// The position of a room in a level, not necessarily matching the in-game coordinates
+typedef std::tuple<int, int> RoomPosition;
+// A position in a level, as (room position, tile position)
+typedef std::tuple<RoomPosition, Position> LevelPosition;
+// A way to leave a room, as (tile to leave from, movement action, position in the next room)
+typedef std::tuple<Position, Action, LevelPosition> RoomExit;
+
 // A type of element.
 enum class ElementType
 {
@@ -166,6 +173,10 @@ enum class FailureReason
     FAILED_PRECHECK,
     ITERATION_LIMIT_REACHED,
     EXHAUSTED_FRONTIER,
+    MONSTERS_UNREACHABLE,
+    MEMORY_LIMIT_REACHED,
+    DEADLINE_REACHED,
+    CANCELLED,
 };
 
 template <class State, class SearchAction>
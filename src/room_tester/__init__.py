@@ -1,4 +1,15 @@
+from .benchmark_search import benchmark_search
+from .benchmark_solve import benchmark_solve, compare_solve_stats
+from .compare_simulators import compare_simulators
 from .test_rooms_standalone import test_rooms_standalone
 from .room_tester import RoomTester, Test
 
-__all__ = ("test_rooms_standalone", "RoomTester", "Test")
+__all__ = (
+    "benchmark_search",
+    "benchmark_solve",
+    "compare_solve_stats",
+    "compare_simulators",
+    "test_rooms_standalone",
+    "RoomTester",
+    "Test",
+)
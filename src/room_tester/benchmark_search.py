@@ -0,0 +1,67 @@
+from typing import List, Optional
+import time
+
+from drod_bot import SolveSettings
+from room_simulator import SearchSettings, SearchStrategy
+from .room_tester import RoomTester
+
+
+def _default_settings():
+    settings = []
+    for explored_limit in [None, 10000, 1000]:
+        settings.append(SearchSettings(explored_limit=explored_limit))
+        settings.append(
+            SearchSettings(
+                SearchStrategy.WEIGHTED_A_STAR,
+                weight=2,
+                explored_limit=explored_limit,
+            )
+        )
+    for beam_width in [10, 100]:
+        settings.append(SearchSettings(SearchStrategy.BEAM, beam_width=beam_width))
+    settings.append(SearchSettings(SearchStrategy.IDA_STAR))
+    return settings
+
+
+def benchmark_search(
+    test_room_dir: str, settings: Optional[List[SearchSettings]] = None
+):
+    """Compare how many test rooms different search settings solve.
+
+    The explored limit and beam width bound how much memory the
+    search uses, so this shows the solve rate at different amounts
+    of memory.
+
+    Parameters
+    ----------
+    test_room_dir
+        Location of saved test rooms.
+    settings
+        The search settings to compare. By default, a selection of
+        strategies and limits.
+    """
+    if settings is None:
+        settings = _default_settings()
+    results = []
+    for search_settings in settings:
+        room_tester = RoomTester(
+            test_room_dir,
+            settings=SolveSettings(simulation_search_settings=search_settings),
+        )
+        room_tester.load_test_rooms()
+        time_before = time.time()
+        room_tester.run_tests()
+        time_taken = time.time() - time_before
+        tests = room_tester.get_tests()
+        solved = len([t for t in tests if t.passed])
+        results.append((search_settings, solved, len(tests), time_taken))
+    print("---")
+    for search_settings, solved, total, time_taken in results:
+        print(
+            f"{search_settings.strategy.name}"
+            f" weight={search_settings.weight}"
+            f" beam_width={search_settings.beam_width}"
+            f" explored_limit={search_settings.explored_limit}"
+            f" frontier_limit={search_settings.frontier_limit}:"
+            f" solved {solved}/{total} in {time_taken:.1f}s"
+        )
@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import json
+
+from drod_bot import SolveSettings, solve_room
+from search import NoSolutionError
+from .room_tester import RoomTester
+
+# The totals to print, as (name, function of a log line)
+_TOTALS = [
+    ("solved", lambda line: int(line["solved"])),
+    ("seconds", lambda line: line["seconds"]),
+    ("planner expansions", lambda line: line["stats"]["planner_expansions"]),
+    ("pathfinding expansions", lambda line: line["stats"]["pathfinding_expansions"]),
+    ("simulation expansions", lambda line: line["stats"]["simulation_expansions"]),
+    ("performed actions", lambda line: line["stats"]["performed_actions"]),
+]
+
+
+def benchmark_solve(
+    test_room_dir: str,
+    stats_log_file: Path | str,
+    settings: Optional[SolveSettings] = None,
+    max_expansions: Optional[int] = None,
+):
+    """Solve the test rooms and record what each search did.
+
+    Run this before and after a change, with different log files, and
+    compare them with compare_solve_stats().
+
+    Parameters
+    ----------
+    test_room_dir
+        Location of saved test rooms.
+    stats_log_file
+        The file to append the stats of each room to. See solve_room().
+    settings
+        Passed to solve_room().
+    max_expansions
+        Passed to solve_room(), so rooms that are too hard don't take
+        forever.
+    """
+    room_tester = RoomTester(test_room_dir)
+    room_tester.load_test_rooms()
+    for test in room_tester.get_tests():
+        try:
+            solve_room(
+                test.room,
+                test.objective,
+                settings=settings,
+                max_expansions=max_expansions,
+                stats_log_file=stats_log_file,
+            )
+        except NoSolutionError:
+            print(f"Failed to solve test room {test.file_name}")
+    _print_totals(_read_log(stats_log_file))
+
+
+def compare_solve_stats(before_log_file: Path | str, after_log_file: Path | str):
+    """Compare two runs of benchmark_solve().
+
+    Only rooms that are in both runs are compared. If a room was solved
+    several times in a run, the last time is used.
+
+    Parameters
+    ----------
+    before_log_file
+        The stats log of the first run.
+    after_log_file
+        The stats log of the second run.
+    """
+    before = _read_log(before_log_file)
+    after = _read_log(after_log_file)
+    common_keys = [key for key in before if key in after]
+    for key in common_keys:
+        if before[key]["solved"] != after[key]["solved"]:
+            solved = "solved" if after[key]["solved"] else "failed"
+            print(f"Room {key[0]} {key[1]} is now {solved}")
+    print(f"Compared {len(common_keys)} rooms")
+    for name, value in _TOTALS:
+        before_total = sum(value(before[key]) for key in common_keys)
+        after_total = sum(value(after[key]) for key in common_keys)
+        print(f"{name}: {before_total:.6g} -> {after_total:.6g}")
+    for field in ["peak_frontier_size", "peak_explored_size"]:
+        before_peak = max(
+            (before[key]["stats"][field] for key in common_keys), default=0
+        )
+        after_peak = max((after[key]["stats"][field] for key in common_keys), default=0)
+        print(f"max {field}: {before_peak} -> {after_peak}")
+
+
+def _read_log(stats_log_file: Path | str) -> Dict[Tuple[str, str], dict]:
+    with open(stats_log_file) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    return {
+        (line["room_hash"], _objective_key(line["objective"])): line for line in lines
+    }
+
+
+def _objective_key(objective_dict: dict) -> str:
+    # The tiles come from sets, so their order differs between runs
+    def sort_tiles(objective_dict):
+        if "tiles" in objective_dict:
+            return {**objective_dict, "tiles": sorted(objective_dict["tiles"])}
+        if "objectives" in objective_dict:
+            return {
+                **objective_dict,
+                "objectives": [sort_tiles(o) for o in objective_dict["objectives"]],
+            }
+        return objective_dict
+
+    return json.dumps(sort_tiles(objective_dict), sort_keys=True)
+
+
+def _print_totals(log: Dict[Tuple[str, str], dict]):
+    print("---")
+    print(f"{len(log)} rooms")
+    for name, value in _TOTALS:
+        print(f"{name}: {sum(value(line) for line in log.values()):.6g}")
@@ -0,0 +1,89 @@
+import random
+import time
+
+from common import ROOM_HEIGHT_IN_TILES, ROOM_WIDTH_IN_TILES
+from room_simulator import FastRoomPlayer, RoomPlayer
+from util import element_to_dict
+from .room_tester import RoomTester
+
+
+def compare_simulators(
+    test_room_dir: str, rollouts: int = 20, rollout_length: int = 100, seed: int = 0
+):
+    """Check that FastRoomPlayer gives the same results as RoomPlayer.
+
+    For each saved test room that FastRoomPlayer supports, do some random
+    rollouts and compare the rooms after each action. Also print how many
+    states per second each room player reaches.
+
+    Parameters
+    ----------
+    test_room_dir
+        Location of saved test rooms.
+    rollouts
+        The number of random rollouts per room.
+    rollout_length
+        The maximum number of actions in each rollout.
+    seed
+        Seed for choosing random actions.
+
+    Returns
+    -------
+    A list of (test room file name, actions) for the rollouts where
+    the room players disagree. The actions lead to the first difference.
+    """
+    room_tester = RoomTester(test_room_dir)
+    room_tester.load_test_rooms()
+    rng = random.Random(seed)
+    mismatches = []
+    drod_time = 0.0
+    fast_time = 0.0
+    states = 0
+    for test in room_tester.get_tests():
+        if not FastRoomPlayer.supports_room(test.room):
+            continue
+        drod_player = RoomPlayer(test.room)
+        fast_player = FastRoomPlayer(test.room)
+        for _ in range(rollouts):
+            actions = []
+            for _ in range(rollout_length):
+                possible_actions = drod_player.get_possible_actions()
+                if set(possible_actions) != set(fast_player.get_possible_actions()):
+                    mismatches.append((test.file_name, actions))
+                    break
+                if not possible_actions:
+                    break
+                actions.append(rng.choice(possible_actions))
+                time_before = time.perf_counter()
+                drod_player.set_actions(actions)
+                drod_room = drod_player.get_room()
+                drod_time += time.perf_counter() - time_before
+                time_before = time.perf_counter()
+                fast_player.set_actions(actions)
+                fast_room = fast_player.get_room()
+                fast_time += time.perf_counter() - time_before
+                states += 1
+                if _room_summary(drod_room) != _room_summary(fast_room):
+                    mismatches.append((test.file_name, list(actions)))
+                    break
+            drod_player.set_actions([])
+            fast_player.set_actions([])
+    print(f"Compared {states} states")
+    if states > 0:
+        print(f"RoomPlayer: {states / drod_time:.0f} states/s")
+        print(f"FastRoomPlayer: {states / fast_time:.0f} states/s")
+    for file_name, actions in mismatches:
+        print(f"Mismatch in {file_name} after {[a.name for a in actions]}")
+    return mismatches
+
+
+def _room_summary(room):
+    # Only the parts of the room that can change when playing it
+    return [
+        (
+            element_to_dict(room.get_tile((x, y)).room_piece),
+            element_to_dict(room.get_tile((x, y)).monster),
+        )
+        for x in range(ROOM_WIDTH_IN_TILES)
+        for y in range(ROOM_HEIGHT_IN_TILES)
+    ]
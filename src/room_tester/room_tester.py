@@ -12,7 +12,7 @@ from room_simulator import (
     StabObjective,
     Room,
 )
-from drod_bot import solve_room
+from drod_bot import SolveSettings, SolverPool, solve_room
 from search import NoSolutionError
 from util import room_from_dict, objective_from_dict
 
@@ -42,10 +42,24 @@ class RoomTester:
     ----------
     test_room_dir
         Location of saved test rooms
+    settings
+        Passed to solve_room(), e.g. to check that pruning waiting and
+        turning doesn't make rooms unsolvable, or to compare search
+        strategies.
+    processes
+        If more than 1, solve the rooms in parallel in this many worker
+        processes. The time taken for each room isn't recorded then.
     """
 
-    def __init__(self, test_room_dir: str):
+    def __init__(
+        self,
+        test_room_dir: str,
+        settings: Optional[SolveSettings] = None,
+        processes: int = 1,
+    ):
         self._test_room_dir = test_room_dir
+        self._settings = settings
+        self._processes = processes
         self._tests: List[Test] = []
         self._marked_test_name: Optional[str] = None
 
@@ -56,10 +70,17 @@ class RoomTester:
                 self._tests.append(Test.from_json(file_name, f.read()))
 
     def run_tests(self):
+        if self._processes > 1:
+            self._run_tests_in_parallel()
+            return
         for test in self._tests:
             try:
                 time_before = time.time()
-                solve_room(test.room, test.objective)
+                solve_room(
+                    test.room,
+                    test.objective,
+                    settings=self._settings,
+                )
                 time_taken = time.time() - time_before
                 test.passed = True
                 test.time_taken = time_taken
@@ -68,6 +89,22 @@ class RoomTester:
                 print(f"Failed to solve test room {test.file_name}")
                 test.passed = False
 
+    def _run_tests_in_parallel(self):
+        with SolverPool(self._processes) as pool:
+            futures = pool.solve_many(
+                [(test.room, test.objective) for test in self._tests],
+                settings=self._settings,
+            )
+            for test, future in zip(self._tests, futures):
+                try:
+                    future.result()
+                    test.passed = True
+                    test.time_taken = None
+                    print(f"Solved test room {test.file_name}")
+                except NoSolutionError:
+                    print(f"Failed to solve test room {test.file_name}")
+                    test.passed = False
+
     def get_tests(self):
         return self._tests
 
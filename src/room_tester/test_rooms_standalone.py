@@ -1,15 +1,31 @@
+from typing import Optional
+
+from drod_bot import SolveSettings
+
 from .room_tester import RoomTester
 
 
-def test_rooms_standalone(test_room_dir: str):
+def test_rooms_standalone(
+    test_room_dir: str,
+    settings: Optional[SolveSettings] = None,
+    processes: int = 1,
+):
     """Test saved rooms
 
     Parameters
     ----------
     test_room_dir
         Location of saved rooms
+    settings
+        Passed to solve_room().
+    processes
+        The number of worker processes to solve rooms in.
     """
-    room_tester = RoomTester(test_room_dir)
+    room_tester = RoomTester(
+        test_room_dir,
+        settings=settings,
+        processes=processes,
+    )
     room_tester.load_test_rooms()
     room_tester.run_tests()
     failed_tests = [t for t in room_tester.get_tests() if t.passed is False]
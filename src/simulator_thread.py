@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+
+# DRODLib's state is global, so everything that uses the room simulator
+# heavily runs in this one thread. The long-running room simulator
+# functions release the GIL, so the event loop keeps running meanwhile.
+_simulator_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="room_simulator"
+)
+
+
+async def run_in_simulator_thread(function, *args, **kwargs):
+    """Run a function that uses the room simulator, without blocking.
+
+    If the awaiting task is cancelled before the function has started,
+    it is not run at all. Once it has started, it runs to completion in
+    the background.
+
+    Parameters
+    ----------
+    function
+        The function to run.
+    *args
+        Positional arguments for the function.
+    **kwargs
+        Keyword arguments for the function.
+
+    Returns
+    -------
+    The return value of the function.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _simulator_executor, functools.partial(function, *args, **kwargs)
+    )
@@ -0,0 +1,52 @@
+from typing import Iterable, Tuple
+
+from common import ROOM_HEIGHT_IN_TILES, ROOM_WIDTH_IN_TILES
+from room_simulator import Direction, Element, ElementType, Room, Tile
+
+
+def floor_room(
+    player_position: Tuple[int, int] = (1, 1),
+    walls: Iterable[Tuple[int, int]] = (),
+) -> Room:
+    """Create a room with only floor, walls and the player.
+
+    Parameters
+    ----------
+    player_position
+        Where the player is, facing south-east.
+    walls
+        The positions of walls.
+
+    Returns
+    -------
+    The room.
+    """
+    wall_set = set(walls)
+    tiles = []
+    for x in range(ROOM_WIDTH_IN_TILES):
+        column = []
+        for y in range(ROOM_HEIGHT_IN_TILES):
+            room_piece = ElementType.WALL if (x, y) in wall_set else ElementType.FLOOR
+            monster = (
+                Element(ElementType.BEETHRO, Direction.SE)
+                if (x, y) == player_position
+                else Element()
+            )
+            column.append(Tile(room_piece=Element(room_piece), monster=monster))
+        tiles.append(column)
+    return Room(tiles=tiles)
+
+
+def wall_column(x: int) -> Iterable[Tuple[int, int]]:
+    """Get the positions of a wall across the whole height of a room.
+
+    Parameters
+    ----------
+    x
+        The x coordinate of the wall.
+
+    Returns
+    -------
+    The positions.
+    """
+    return [(x, y) for y in range(ROOM_HEIGHT_IN_TILES)]
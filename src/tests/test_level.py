@@ -0,0 +1,61 @@
+import unittest
+
+from drod_bot.state.level import Level
+from room_simulator import Action
+from .rooms import floor_room, wall_column
+
+
+class TestLevel(unittest.TestCase):
+    def setUp(self):
+        self._level = Level(rooms={(0, 0): floor_room(), (1, 0): floor_room()})
+
+    def test_get_room_exits(self):
+        self.assertEqual(
+            self._level.get_room_exits((0, 0)),
+            [((37, 16), Action.E, ((1, 0), (0, 16)))],
+        )
+        self.assertEqual(
+            len(self._level.get_room_exits((0, 0), allow_unexplored_target=True)), 4
+        )
+
+    def test_room_exits_are_not_shared_with_cache(self):
+        self._level.get_room_exits((0, 0)).clear()
+        self.assertEqual(len(self._level.get_room_exits((0, 0))), 1)
+
+    def test_set_room_updates_neighbor_exits(self):
+        self._level.get_room_exits((0, 0))
+        self._level.set_room((1, 0), floor_room(walls=wall_column(0)))
+        self.assertEqual(self._level.get_room_exits((0, 0)), [])
+
+    def test_add_transits_only_keeps_found_transits_in_known_rooms(self):
+        self._level.add_transits(
+            {
+                ((0, 0), (0, 5), (37, 5)): True,
+                ((0, 0), (0, 6), (37, 6)): False,
+                ((5, 5), (0, 5), (37, 5)): True,
+            }
+        )
+        self.assertEqual(self._level.get_transits(), {((0, 0), (0, 5), (37, 5)): True})
+
+    def test_changing_a_room_forgets_its_transits(self):
+        self._level.add_transits(
+            {((0, 0), (0, 5), (37, 5)): True, ((1, 0), (0, 5), (37, 5)): True}
+        )
+        self._level.set_room((0, 0), floor_room(walls=wall_column(10)))
+        self._level.make_room_conquered((1, 0))
+        self.assertEqual(self._level.get_transits(), {})
+
+    def test_set_room_keeps_other_transits(self):
+        self._level.add_transits(
+            {((0, 0), (0, 5), (37, 5)): True, ((1, 0), (0, 5), (37, 5)): True}
+        )
+        self._level.set_room((0, 0), floor_room(walls=wall_column(10)))
+        self.assertEqual(self._level.get_transits(), {((1, 0), (0, 5), (37, 5)): True})
+
+    def test_clear_forgets_exits_and_transits(self):
+        self._level.get_room_exits((0, 0))
+        self._level.add_transits({((0, 0), (0, 5), (37, 5)): True})
+        self._level.rooms[(1, 0)] = floor_room(walls=wall_column(0))
+        self._level.clear()
+        self.assertEqual(self._level.get_transits(), {})
+        self.assertEqual(self._level.get_room_exits((0, 0)), [])
@@ -0,0 +1,72 @@
+from itertools import count
+from pathlib import Path
+from unittest import mock
+import tempfile
+import unittest
+
+from drod_bot import SolutionCache
+from room_simulator import Action, ReachObjective, StabObjective
+from util import room_to_dict
+from .rooms import floor_room
+
+
+class TestSolutionCache(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = Path(self._directory.name) / "solutions.sqlite"
+        self._room = floor_room((1, 1))
+        self._final_room = floor_room((3, 1))
+        self._objective = ReachObjective(tiles={(3, 1), (3, 2)})
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_get_returns_stored_solution(self):
+        cache = SolutionCache(self._path)
+        cache.put(self._room, self._objective, [Action.E, Action.E], self._final_room)
+        solution = cache.get(self._room, ReachObjective(tiles={(3, 2), (3, 1)}))
+        cache.close()
+        self.assertIsNotNone(solution)
+        self.assertEqual(solution.actions, [Action.E, Action.E])
+        self.assertEqual(
+            room_to_dict(solution.final_room), room_to_dict(self._final_room)
+        )
+
+    def test_get_misses_other_rooms_and_objectives(self):
+        cache = SolutionCache(self._path)
+        cache.put(self._room, self._objective, [Action.E, Action.E], self._final_room)
+        other_room = cache.get(floor_room((2, 2)), self._objective)
+        other_objective = cache.get(self._room, StabObjective(tiles={(3, 1), (3, 2)}))
+        stats = cache.get_stats()
+        cache.close()
+        self.assertIsNone(other_room)
+        self.assertIsNone(other_objective)
+        self.assertEqual((stats.hits, stats.misses, stats.stores), (0, 2, 1))
+
+    def test_solutions_are_kept_on_disk(self):
+        cache = SolutionCache(self._path)
+        cache.put(self._room, self._objective, [Action.E, Action.E], self._final_room)
+        cache.close()
+        reopened_cache = SolutionCache(self._path)
+        solution = reopened_cache.get(self._room, self._objective)
+        reopened_cache.close()
+        self.assertIsNotNone(solution)
+        self.assertEqual(solution.actions, [Action.E, Action.E])
+
+    def test_least_recently_used_solution_is_evicted(self):
+        objectives = [ReachObjective(tiles={(x, 10)}) for x in range(3)]
+        # Make the usage times distinct, so the order doesn't depend on the
+        # resolution of the clock
+        clock = count()
+        with mock.patch("drod_bot.solution_cache.time") as mock_time:
+            mock_time.time.side_effect = lambda: next(clock)
+            cache = SolutionCache(self._path, max_entries=2)
+            cache.put(self._room, objectives[0], [Action.S], self._final_room)
+            cache.put(self._room, objectives[1], [Action.S], self._final_room)
+            cache.get(self._room, objectives[0])
+            cache.put(self._room, objectives[2], [Action.S], self._final_room)
+            found = [cache.get(self._room, o) is not None for o in objectives]
+            stats = cache.get_stats()
+            cache.close()
+        self.assertEqual(found, [True, False, True])
+        self.assertEqual(stats.evictions, 1)
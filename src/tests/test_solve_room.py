@@ -0,0 +1,122 @@
+from pathlib import Path
+import json
+import os
+import tempfile
+import unittest
+
+import room_simulator
+from drod_bot import SolutionCache, SolveSettings, solve_room, solve_room_from_starts
+from room_simulator import Direction, ReachObjective, SearchBudget
+from search import NoSolutionError
+from .rooms import floor_room, wall_column
+
+_original_directory = os.getcwd()
+_home_directory = tempfile.TemporaryDirectory()
+
+
+def setUpModule():
+    # The room simulator creates its fake home directory in the working
+    # directory
+    os.chdir(_home_directory.name)
+    room_simulator.initialize()
+
+
+def tearDownModule():
+    os.chdir(_original_directory)
+    _home_directory.cleanup()
+
+
+class TestSolveRoomFromStarts(unittest.TestCase):
+    def setUp(self):
+        # Only the right part of the room can reach the objective
+        self._room = floor_room(walls=wall_column(10))
+        self._objective = ReachObjective(tiles={(25, 5)})
+
+    def test_only_returns_starts_that_reach_the_objective(self):
+        reachable_starts = solve_room_from_starts(
+            self._room,
+            [((2, 2), Direction.N), ((20, 2), Direction.N)],
+            self._objective,
+        )
+        self.assertEqual(reachable_starts, [((20, 2), Direction.N)])
+
+    def test_tries_all_directions_if_none_is_given(self):
+        reachable_starts = solve_room_from_starts(
+            self._room, [((20, 2), None)], self._objective
+        )
+        self.assertEqual(
+            reachable_starts,
+            [
+                ((20, 2), direction)
+                for direction in [
+                    Direction.N,
+                    Direction.NE,
+                    Direction.E,
+                    Direction.SE,
+                    Direction.S,
+                    Direction.SW,
+                    Direction.W,
+                    Direction.NW,
+                ]
+            ],
+        )
+
+    def test_no_starts(self):
+        self.assertEqual(solve_room_from_starts(self._room, [], self._objective), [])
+
+    def test_raises_if_budget_runs_out(self):
+        budget = SearchBudget()
+        budget.cancel()
+        with self.assertRaises(NoSolutionError) as context:
+            solve_room_from_starts(
+                self._room, [((20, 2), Direction.N)], self._objective, budget=budget
+            )
+        self.assertTrue(context.exception.cancelled)
+
+
+class TestSolveRoom(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._stats_log_file = Path(self._directory.name) / "stats.jsonl"
+        self._room = floor_room(player_position=(20, 2), walls=wall_column(10))
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _logged_outcomes(self):
+        with open(self._stats_log_file) as f:
+            lines = [json.loads(line) for line in f]
+        return [(line["solved"], line["cached"]) for line in lines]
+
+    def test_cached_solution_is_logged_and_returned_with_stats(self):
+        objective = ReachObjective(tiles={(25, 5)})
+        cache = SolutionCache(Path(self._directory.name) / "solutions.sqlite")
+        actions = solve_room(
+            self._room,
+            objective,
+            solution_cache=cache,
+            stats_log_file=self._stats_log_file,
+        )
+        cached_actions, stats = solve_room(
+            self._room,
+            objective,
+            solution_cache=cache,
+            return_stats=True,
+            stats_log_file=self._stats_log_file,
+        )
+        cache.close()
+        self.assertEqual(cached_actions, actions)
+        self.assertEqual(stats.planner_expansions, 0)
+        self.assertEqual(self._logged_outcomes(), [(True, False), (True, True)])
+
+    def test_failure_is_logged_and_has_stats(self):
+        with self.assertRaises(NoSolutionError) as context:
+            solve_room(
+                self._room,
+                ReachObjective(tiles={(2, 2)}),
+                settings=SolveSettings(idle_pruning_radius=3, macro_action_radius=5),
+                return_stats=True,
+                stats_log_file=self._stats_log_file,
+            )
+        self.assertIsNotNone(context.exception.stats)
+        self.assertEqual(self._logged_outcomes(), [(False, False)])